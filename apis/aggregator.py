@@ -0,0 +1,87 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Shared, bounded pool for upstream provider calls (Yelp, Reddit, SerpAPI).
+# Provider calls are I/O bound, so a handful of threads per worker process is plenty.
+MAX_WORKERS = int(os.getenv("PROVIDER_POOL_SIZE", "8"))
+PROVIDER_DEADLINE = float(os.getenv("PROVIDER_DEADLINE", "6"))
+
+log = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="provider")
+
+
+def submit(fn, *args, **kwargs):
+    """Run fn on the shared provider pool and return its Future."""
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def start(providers):
+    """Kick off every provider in parallel.
+
+    providers maps a provider name to a zero-argument callable returning a list of events.
+    Returns a dict of name -> Future to pass to gather().
+    """
+    return {name: submit(fn) for name, fn in providers.items()}
+
+
+def as_completed(futures, deadline=PROVIDER_DEADLINE, deadlines=None):
+    """Yield (name, events, status) for each started provider as soon as it settles.
+
+    Providers come out in the order they finish; one that misses its deadline (deadline
+    seconds, or deadlines[name]) is cancelled and yielded as 'timeout' with no events, one
+    that raises as 'error'. Lets callers stream the fast providers before the slow ones.
+    """
+    deadlines = deadlines or {}
+    began = time.monotonic()
+    cutoff = {name: began + deadlines.get(name, deadline) for name in futures}
+    pending = {future: name for name, future in futures.items()}
+
+    while pending:
+        now = time.monotonic()
+        for future, name in list(pending.items()):
+            if not future.done() and now >= cutoff[name]:
+                future.cancel()
+                log.warning("Provider %s missed its %.1fs deadline, skipping", name, cutoff[name] - began)
+                del pending[future]
+                yield name, [], "timeout"
+        if not pending:
+            break
+
+        remaining = min(cutoff[name] for name in pending.values()) - now
+        done, _ = wait(list(pending), timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = pending.pop(future)
+            try:
+                events = future.result() or []
+            except Exception as e:
+                log.warning("Provider %s failed: %s", name, e)
+                yield name, [], "error"
+            else:
+                yield name, events, "ok"
+
+
+def gather(futures, deadline=PROVIDER_DEADLINE, deadlines=None):
+    """Wait for started providers, giving each one until its own deadline.
+
+    deadline is the default number of seconds per provider, deadlines optionally overrides it
+    by name. Providers that miss their deadline or raise are skipped so the caller still gets
+    partial results.
+
+    Returns (results, status): results maps name -> list of events for providers that finished,
+    status maps every name -> 'ok', 'timeout' or 'error'.
+    """
+    results = {}
+    status = {}
+    for name, events, outcome in as_completed(futures, deadline=deadline, deadlines=deadlines):
+        if outcome == "ok":
+            results[name] = events
+        status[name] = outcome
+    return results, status
+
+
+def fan_out(providers, deadline=PROVIDER_DEADLINE, deadlines=None):
+    """Query all providers concurrently; see gather() for the return value."""
+    return gather(start(providers), deadline=deadline, deadlines=deadlines)
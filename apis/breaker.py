@@ -0,0 +1,160 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))                 # recent calls the failure rate is taken over
+MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))            # calls in the window before it may open
+FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))  # failed or slow share of the window that opens it
+OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))   # how long it stays open before a probe
+# A call slower than this counts as a failure even if it succeeds: a provider that answers in
+# ten seconds is as good as down for a page that waits on it
+SLOW_CALL_SECONDS = {
+    'yelp': 3.0,
+    'serpapi': 5.0,
+    'gemini': 8.0,
+    'reddit': 5.0,
+}
+DEFAULT_SLOW_CALL_SECONDS = 5.0
+
+
+class CircuitOpen(Exception):
+    """The provider's breaker is open; the call wasn't made."""
+
+
+def is_failure(exc):
+    """Whether exc says something about the provider's health. Client errors (a 4xx other than 429,
+    e.g. a location Yelp can't place) are the request's fault, not the provider's."""
+    status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return not (status and 400 <= status < 500 and status != 429)
+
+
+class CircuitBreaker:
+    """Failure-rate and latency breaker for one provider.
+
+    Closed, it lets calls through and keeps the outcome of the last window of them; once at
+    least min_calls are in and failure_rate of them failed or were slower than slow_call, it
+    opens. Open, it rejects every call for open_seconds, then goes half open and lets a single
+    probe through: success closes it with a clean window, failure opens it again.
+    """
+
+    def __init__(self, name, slow_call=DEFAULT_SLOW_CALL_SECONDS, window=WINDOW, min_calls=MIN_CALLS,
+                 failure_rate=FAILURE_RATE, open_seconds=OPEN_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.slow_call = slow_call
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._calls = deque(maxlen=window)  # (failed, seconds)
+        self._state = CLOSED
+        self._opened_at = None
+        self._probing = False
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self):
+        """Whether a call may go ahead now. A True in the half-open state makes that call the probe,
+        so the caller must report it with record() or abandon()."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._rejected += 1
+            return False
+
+    def abandon(self):
+        """The call allow() let through wasn't made after all (e.g. it was rate limited)."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, seconds, exc=None):
+        """Report a call that took seconds and raised exc (None if it succeeded)."""
+        failed = (exc is not None and is_failure(exc)) or seconds > self.slow_call
+        with self._lock:
+            if self._current_state() == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._open()
+                else:
+                    log.info("Circuit for %s closed", self.name)
+                    self._state = CLOSED
+                    self._calls.clear()
+                    self._calls.append((False, seconds))
+                return
+            self._calls.append((failed, seconds))
+            if self._state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(failed for failed, _ in self._calls)
+                if failures >= self.failure_rate * len(self._calls):
+                    self._open()
+
+    def _open(self):
+        log.warning("Circuit for %s opened", self.name)
+        self._state = OPEN
+        self._opened_at = self._clock()
+
+    def snapshot(self):
+        """State, recent failure rate and latency, for the admin endpoint."""
+        with self._lock:
+            state = self._current_state()
+            calls = list(self._calls)
+            retry_in = self.open_seconds - (self._clock() - self._opened_at) if state == OPEN else None
+            rejected = self._rejected
+        latencies = sorted(seconds for _, seconds in calls)
+        return {
+            'state': state,
+            'calls': len(calls),
+            'failure_rate': round(sum(failed for failed, _ in calls) / len(calls), 3) if calls else 0.0,
+            'p50_seconds': round(latencies[len(latencies) // 2], 3) if latencies else None,
+            'max_seconds': round(latencies[-1], 3) if latencies else None,
+            'slow_call_seconds': self.slow_call,
+            'retry_in_seconds': round(max(retry_in, 0), 1) if retry_in is not None else None,
+            'rejected': rejected,
+        }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(provider):
+    """provider's process-wide CircuitBreaker."""
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(
+                provider, slow_call=SLOW_CALL_SECONDS.get(provider, DEFAULT_SLOW_CALL_SECONDS))
+        return _breakers[provider]
+
+
+def snapshot():
+    """{provider: breaker snapshot} for every known provider, used or not."""
+    for provider in SLOW_CALL_SECONDS:
+        breaker(provider)
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: b.snapshot() for name, b in sorted(breakers.items())}
+
+
+def reset():
+    """Forget every breaker's history, closing them all."""
+    with _breakers_lock:
+        _breakers.clear()
@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from apis.db_pool import get_connection
+
+CACHE_DB = os.getenv("CACHE_DB", "cache.db")
+# Longest a process serves an entry from its memory layer before reading the shared table again,
+# so values another process writes (e.g. prefetch_worker.py refreshing a feed) show up this quickly
+MEMORY_TTL = float(os.getenv("CACHE_MEMORY_TTL", "5"))
+
+def _create_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, last_used)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_expiry ON cache_entries (namespace, expires_at)")
+    conn.commit()
+
+
+def _connect(db_path):
+    """This thread's pooled connection to db_path, with the cache table in place."""
+    return get_connection(db_path, on_connect=_create_table)
+
+
+class Cache:
+    """A small in-process LRU in front of a shared SQLite table.
+
+    Values must be JSON-serializable. Every get returns a fresh copy, so callers may mutate
+    what they get back without touching the cached value. Entries expire after their TTL and
+    the least recently used ones are evicted once a namespace holds more than max_entries.
+    The memory layer holds an entry for at most memory_ttl seconds before going back to disk.
+    """
+
+    def __init__(self, namespace, ttl, max_entries=10000, memory_entries=256, db_path=None,
+                 memory_ttl=MEMORY_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory_ttl = memory_ttl
+        self.db_path = db_path or CACHE_DB
+        self._memory = OrderedDict()  # key -> (recheck_at, serialized value)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'memory_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+    # --- in-process layer ---
+
+    def _remember(self, key, expires_at, raw, now):
+        with self._lock:
+            self._memory[key] = (min(expires_at, now + self.memory_ttl), raw)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _recall(self, key, now):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry[1]
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+    # --- public API ---
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys):
+        """Return {key: value} for every key that is cached and unexpired."""
+        now = time.time()
+        found = {}
+        to_fetch = []
+        for key in dict.fromkeys(keys):
+            raw = self._recall(key, now)
+            if raw is None:
+                to_fetch.append(key)
+            else:
+                found[key] = json.loads(raw)
+        self._count('memory_hits', len(found))
+
+        if to_fetch:
+            conn = _connect(self.db_path)
+            rows = []
+            # stay well under SQLite's bound-parameter limit
+            for i in range(0, len(to_fetch), 500):
+                chunk = to_fetch[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(conn.execute(
+                    f"SELECT key, value, expires_at FROM cache_entries "
+                    f"WHERE namespace = ? AND key IN ({placeholders}) AND expires_at > ?",
+                    (self.namespace, *chunk, now)
+                ).fetchall())
+            if rows:
+                with conn:
+                    conn.executemany(
+                        "UPDATE cache_entries SET last_used = ? WHERE namespace = ? AND key = ?",
+                        [(now, self.namespace, key) for key, _, _ in rows]
+                    )
+            for key, raw, expires_at in rows:
+                self._remember(key, expires_at, raw, now)
+                found[key] = json.loads(raw)
+
+        self._count('hits', len(found))
+        self._count('misses', len(dict.fromkeys(keys)) - len(found))
+        return found
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl=ttl)
+
+    def set_many(self, mapping, ttl=None):
+        """Store every key in mapping in one transaction, then enforce the TTL and size bound."""
+        if not mapping:
+            return
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        rows = [(self.namespace, key, json.dumps(value), expires_at, now) for key, value in mapping.items()]
+        conn = _connect(self.db_path)
+        with conn:
+            conn.executemany("""
+                INSERT INTO cache_entries (namespace, key, value, expires_at, last_used) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(namespace, key) DO UPDATE SET
+                    value = excluded.value, expires_at = excluded.expires_at, last_used = excluded.last_used
+            """, rows)
+            evicted = conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, now)
+            ).rowcount
+            evicted += conn.execute("""
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.namespace, self.namespace, self.max_entries)).rowcount
+        for _, key, raw, _, _ in rows:
+            self._remember(key, expires_at, raw, now)
+        self._count('sets', len(rows))
+        self._count('evictions', evicted)
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        conn = _connect(self.db_path)
+        with conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        conn = _connect(self.db_path)
+        with conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def stats(self):
+        """Hit/miss counters for this process plus the number of entries on disk."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['memory_size'] = len(self._memory)
+        stats['size'] = _connect(self.db_path).execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        return stats
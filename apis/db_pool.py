@@ -0,0 +1,93 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from apis.metrics import SQL_SECONDS, statement_kind
+
+# Applied once to every pooled connection
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",       # readers don't block the writer and vice versa
+    "PRAGMA synchronous=NORMAL",     # fsync at checkpoints only, safe with WAL
+    "PRAGMA mmap_size=268435456",    # map up to 256MB of the file instead of read() calls
+    "PRAGMA cache_size=-16000",      # ~16MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+# sqlite3 keeps this many compiled statements per connection, keyed by SQL text, so reusing a
+# connection means each query is prepared once rather than on every call
+CACHED_STATEMENTS = 256
+
+_local = threading.local()
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection that records each statement's latency in SQL_SECONDS."""
+    db_label = ''
+
+    def execute(self, sql, *args):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            SQL_SECONDS.observe(time.perf_counter() - start, db=self.db_label, statement=statement_kind(sql))
+
+    def executemany(self, sql, *args):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            SQL_SECONDS.observe(time.perf_counter() - start, db=self.db_label, statement=statement_kind(sql))
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            SQL_SECONDS.observe(time.perf_counter() - start, db=self.db_label, statement='COMMIT')
+
+
+def get_connection(db_path, on_connect=None):
+    """Return this thread's connection to db_path, opening and configuring it on first use.
+
+    on_connect(conn) runs once right after a new connection is opened, e.g. to create tables.
+    """
+    # Connections must not cross a fork (e.g. gunicorn workers), so the pool is per process too
+    if getattr(_local, 'pid', None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.conns = {}
+    conn = _local.conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=5, cached_statements=CACHED_STATEMENTS, factory=TimedConnection)
+        conn.db_label = os.path.basename(db_path)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        if on_connect:
+            on_connect(conn)
+        _local.conns[db_path] = conn
+    return conn
+
+
+@contextmanager
+def transaction(db_path):
+    """Run the block in one write transaction on the pooled connection, rolling back on error.
+
+    BEGIN IMMEDIATE takes the write lock up front so read-then-write sequences can't be
+    interleaved with another writer.
+    """
+    conn = get_connection(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def close_connections():
+    """Close every connection this thread holds (tests and worker shutdown)."""
+    for conn in getattr(_local, 'conns', {}).values():
+        conn.close()
+    _local.conns = {}
@@ -0,0 +1,60 @@
+class Event:
+    """One event from any provider, in the canonical shape routes, templates and the DB layer share.
+
+    Each provider module has an adapter that builds these from its own payloads (from_yelp,
+    from_google, post_to_event, row_to_event), so request handling never patches fields. Slotted
+    because feeds and caches hold hundreds of them at once.
+    """
+    __slots__ = ('source', 'external_id', 'global_id', 'title', 'time', 'location', 'url', 'description',
+                 'tag', 'tags', 'image', 'price', 'rating', 'type', 'timezone', 'created_at')
+
+    # Keys older payloads (saved_events rows, browser requests) use for canonical fields
+    ALIASES = {'date': 'time', 'event_time': 'time', 'link': 'url', 'address': 'location'}
+
+    def __init__(self, source, external_id, title, time='TBD', location='', url='', description='',
+                 tag=None, tags=None, image=None, price=None, rating=None, type=None, timezone=None,
+                 created_at=None, global_id=None):
+        self.source = source
+        self.external_id = external_id
+        self.global_id = global_id or f"{source}_{external_id}"
+        self.title = title
+        self.time = time
+        self.location = location
+        self.url = url
+        self.description = description
+        self.tag = tag
+        self.tags = tags or []
+        self.image = image
+        self.price = price
+        self.rating = rating
+        self.type = type
+        self.timezone = timezone
+        self.created_at = created_at
+
+    def __repr__(self):
+        return f"Event({self.global_id!r}, {self.title!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Event) and self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        """JSON-ready dict (API responses, cache entries)."""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an Event from to_dict() output or a client payload, accepting ALIASES."""
+        fields = {cls.ALIASES.get(key, key): value for key, value in data.items()}
+        fields = {key: value for key, value in fields.items() if key in cls.__slots__}
+        if isinstance(fields.get('location'), list):
+            fields['location'] = ', '.join(fields['location'])
+        if isinstance(fields.get('tags'), str):
+            fields['tags'] = [t.strip() for t in fields['tags'].split(',')]
+        fields['source'] = fields.get('source') or 'unknown'
+        if not fields.get('external_id'):
+            # client payloads only carry the global id ('google_1a2b...')
+            global_id = fields.get('global_id') or ''
+            prefix = f"{fields.get('source')}_"
+            fields['external_id'] = global_id[len(prefix):] if global_id.startswith(prefix) else global_id
+        fields['title'] = fields.get('title') or ''
+        return cls(**fields)
@@ -1,34 +1,50 @@
 import os
-from dotenv import load_dotenv 
+from functools import partial
 from apis.yelp import search_yelp_businesses
 from apis.reddit_api import search_reddit_events
+from apis.aggregator import fan_out, PROVIDER_DEADLINE
 
-# getting keys 
+# getting keys
 YELP_API_KEY = os.environ.get('YELP_KEY')
 REDDIT_CLIENT_ID = os.environ.get('REDDIT_CLIENT_ID')
 REDDIT_CLIENT_SECRET = os.environ.get('REDDIT_CLIENT_SECRET')
 REDDIT_USER_AGENT = os.environ.get('REDDIT_USER_AGENT')
 
-def search_all_events(location: str, terms: str = ""):
-    all_events = []
+def get_providers(location: str, terms: str = ""):
+    """Pick the providers relevant to a search, as name -> zero-argument callable."""
+    providers = {}
     terms_lower = terms.lower() if terms else ""
     # If user is searching for free food/events, use Reddit only
     if "free food" in terms_lower or terms_lower.strip() == "free":
-        reddit_events = search_reddit_events(
+        providers['reddit'] = partial(
+            search_reddit_events,
             location=location,
             terms=terms,
             reddit_client_id=REDDIT_CLIENT_ID,
             reddit_client_secret=REDDIT_CLIENT_SECRET,
             reddit_user_agent=REDDIT_USER_AGENT
         )
-        all_events.extend(reddit_events)
     else:
-        yelp_events = search_yelp_businesses(
+        providers['yelp'] = partial(
+            search_yelp_businesses,
             location=location,
             terms=terms,
             yelp_api_key=YELP_API_KEY,
             limit=10,
             radius=40000,
         )
-        all_events.extend(yelp_events)
-    return all_events
\ No newline at end of file
+    return providers
+
+def search_events(location: str, terms: str = "", deadline: float = PROVIDER_DEADLINE):
+    """(events, status): every relevant provider's events in provider order, and each provider's
+    'ok', 'timeout' or 'error'."""
+    # Query every relevant provider in parallel; a slow or failing one only drops its own results
+    providers = get_providers(location, terms)
+    results, status = fan_out(providers, deadline=deadline)
+    all_events = []
+    for name in providers:
+        all_events.extend(results.get(name, []))
+    return all_events, status
+
+def search_all_events(location: str, terms: str = "", deadline: float = PROVIDER_DEADLINE):
+    return search_events(location, terms, deadline)[0]
@@ -0,0 +1,175 @@
+import os
+import csv
+import json
+import time
+import hashlib
+import sqlite3
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from apis import user_events
+from apis.db_pool import transaction
+from apis.tagging import ALLOWED_TAGS
+
+CHUNK_SIZE = 1000      # rows per executemany/commit; also how often progress is checkpointed
+MAX_ERRORS = 50        # rejected rows reported back individually, the rest are only counted
+MAX_IMPORT_BYTES = int(os.getenv("MAX_IMPORT_BYTES", str(1024 ** 3)))  # biggest file the admin endpoint takes
+REQUIRED_FIELDS = ('title', 'location', 'event_time', 'timezone')
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+def init_import_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS event_imports (
+            name TEXT PRIMARY KEY,
+            rows_done INTEGER NOT NULL DEFAULT 0,
+            imported INTEGER NOT NULL DEFAULT 0,
+            rejected INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL,
+            fingerprint TEXT,
+            completed_at TEXT
+        )
+    ''')
+    # fingerprint: sha256 of the rows_done rows, so a resume can tell it's reading the same input
+    for column in ('fingerprint', 'completed_at'):
+        try:
+            conn.execute(f"ALTER TABLE event_imports ADD COLUMN {column} TEXT")
+        except sqlite3.OperationalError as e:
+            if 'duplicate column name' not in str(e):
+                raise
+
+
+def detect_format(filename):
+    """'partners.csv' -> 'csv', 'feed.jsonl' -> 'jsonl'"""
+    for ext, fmt in FORMATS.items():
+        if filename.lower().endswith(ext):
+            return fmt
+    raise ValueError(f"Can't tell the format of {filename!r}; expected one of {', '.join(FORMATS)}")
+
+
+def read_records(f, fmt):
+    """Stream raw records from a text file: dicts for CSV, one JSON string per line for JSON-lines."""
+    if fmt == 'csv':
+        yield from csv.DictReader(f)
+    elif fmt == 'jsonl':
+        for line in f:
+            if line.strip():
+                yield line  # parsed in normalize_record so one bad line is one rejected row
+    else:
+        raise ValueError(f"Unknown format {fmt!r}")
+
+
+def normalize_record(record):
+    """Validate one raw record and return its INSERT_EVENT_SQL parameters. Raises ValueError."""
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    fields = {key: str(record.get(key) or '').strip() for key in REQUIRED_FIELDS + ('tag', 'description')}
+    missing = [key for key in REQUIRED_FIELDS if not fields[key]]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    try:
+        event_time = datetime.fromisoformat(fields['event_time']).strftime(user_events.EVENT_TIME_FORMAT)
+    except ValueError:
+        raise ValueError(f"bad event_time {fields['event_time']!r}")
+    try:
+        ZoneInfo(fields['timezone'])
+    except Exception:
+        raise ValueError(f"unknown timezone {fields['timezone']!r}")
+    tag = fields['tag'].lower()
+    tag = tag if tag in ALLOWED_TAGS else 'other'
+    return user_events.event_values(fields['title'], fields['location'], event_time, fields['timezone'],
+                                    tag, fields['description'])
+
+
+def update_fingerprint(digest, record):
+    digest.update((record if isinstance(record, str) else repr(record)).encode('utf-8') + b'\0')
+
+
+def ingest(records, name=None, chunk_size=CHUNK_SIZE, resume=True, db_path=None):
+    """Validate and insert records into user_events, chunk_size rows per transaction.
+
+    With a name, progress is checkpointed in event_imports in the same transaction as each
+    chunk, so re-running an interrupted import skips the rows already done (resume=False
+    starts over). Only an unfinished import is resumed: once one completes, the next run under
+    its name starts from the top. Raises ValueError if the rows being skipped aren't the ones the
+    checkpoint was taken over, i.e. a different input under the same name; nothing is written then.
+    Returns a report dict with counts, the first MAX_ERRORS rejections and rows/sec.
+    """
+    db_path = db_path or user_events.DB_PATH
+    skip, fingerprint = 0, None
+    with transaction(db_path) as conn:
+        init_import_table(conn)
+        if name:
+            row = conn.execute("SELECT rows_done, fingerprint, completed_at FROM event_imports WHERE name = ?",
+                               (name,)).fetchone()
+            if row and resume and not row[2]:
+                skip, fingerprint = row[0], row[1]
+            elif row:
+                conn.execute("DELETE FROM event_imports WHERE name = ?", (name,))
+
+    def mismatch():
+        return ValueError(f"{name!r} was stopped at row {skip} of a different file; "
+                          f"import it under another name or restart it")
+
+    report = {"name": name, "skipped": skip, "rows": 0, "imported": 0, "rejected": 0, "errors": []}
+    chunk, rejected, done = [], 0, skip
+    digest = hashlib.sha256()
+
+    def flush():
+        with transaction(db_path) as conn:
+            conn.executemany(user_events.INSERT_EVENT_SQL, chunk)
+            if name:
+                conn.execute('''
+                    INSERT INTO event_imports (name, rows_done, imported, rejected, updated_at, fingerprint)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET rows_done = excluded.rows_done,
+                        imported = imported + excluded.imported, rejected = rejected + excluded.rejected,
+                        updated_at = excluded.updated_at, fingerprint = excluded.fingerprint
+                ''', (name, done, len(chunk), rejected, datetime.utcnow().isoformat(), digest.hexdigest()))
+        report["imported"] += len(chunk)
+        report["rejected"] += rejected
+
+    start = time.perf_counter()
+    n = 0
+    for n, record in enumerate(records, 1):
+        update_fingerprint(digest, record)
+        if n <= skip:
+            # checkpoints from before fingerprints were kept can't be checked
+            if n == skip and fingerprint and digest.hexdigest() != fingerprint:
+                raise mismatch()
+            continue
+        try:
+            chunk.append(normalize_record(record))
+        except ValueError as e:
+            rejected += 1
+            if len(report["errors"]) < MAX_ERRORS:
+                report["errors"].append({"row": n, "error": str(e)})
+        done = n
+        report["rows"] += 1
+        if len(chunk) + rejected >= chunk_size:
+            flush()
+            chunk, rejected = [], 0
+    if n < skip:
+        raise mismatch()
+    if chunk or rejected:
+        flush()
+    if name:
+        with transaction(db_path) as conn:
+            conn.execute("UPDATE event_imports SET completed_at = ? WHERE name = ?",
+                         (datetime.utcnow().isoformat(), name))
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["rows_per_sec"] = round(report["rows"] / report["seconds"]) if report["seconds"] else report["rows"]
+    return report
+
+
+def import_events(f, fmt, name=None, **kwargs):
+    """ingest() the records of an open text file in 'csv' or 'jsonl' format."""
+    return ingest(read_records(f, fmt), name=name, **kwargs)
+
+
+def import_file(path, fmt=None, name=None, **kwargs):
+    """import_events() from a path; the checkpoint name defaults to the path."""
+    with open(path, newline='', encoding='utf-8') as f:
+        return import_events(f, fmt or detect_format(path), name=name or os.path.abspath(path), **kwargs)
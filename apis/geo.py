@@ -0,0 +1,87 @@
+import os
+import re
+import csv
+import math
+
+GAZETTEER_FILE = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+CELL_DEGREES = 0.5  # grid cell size; ~35 miles north-south, less east-west away from the equator
+
+US_STATES = {
+    'al', 'ak', 'az', 'ar', 'ca', 'co', 'ct', 'de', 'fl', 'ga', 'hi', 'id', 'il', 'in', 'ia', 'ks', 'ky', 'la',
+    'me', 'md', 'ma', 'mi', 'mn', 'ms', 'mo', 'mt', 'ne', 'nv', 'nh', 'nj', 'nm', 'ny', 'nc', 'nd', 'oh', 'ok',
+    'or', 'pa', 'ri', 'sc', 'sd', 'tn', 'tx', 'ut', 'vt', 'va', 'wa', 'wv', 'wi', 'wy', 'dc',
+}
+CITY_ALIASES = {
+    'nyc': 'new york', 'new york city': 'new york', 'manhattan': 'new york',
+    'la': 'los angeles', 'sf': 'san francisco', 'philly': 'philadelphia', 'washington dc': 'washington',
+}
+_TRAILING_PART = re.compile(r'^(usa|us|united states|\d{5}(-\d{4})?|[a-z]{2} \d{5}(-\d{4})?)$')
+_STATE_ZIP = re.compile(r'^(' + '|'.join(sorted(US_STATES)) + r') \d{5}(-\d{4})?$')
+
+_by_city = {}       # 'new york' -> (lat, lon), first listed wins for names shared across states
+_by_city_state = {} # ('arlington', 'va') -> (lat, lon)
+
+
+def normalize_city(location):
+    """'Rooftop Bar, New York' / 'New York, NY 10001, USA' -> 'new york'"""
+    parts = [p.strip().lower() for p in (location or '').split(',') if p.strip()]
+    # Drop trailing country, zip and state parts so the city is the last piece left
+    while len(parts) > 1 and (parts[-1] in US_STATES or _TRAILING_PART.match(parts[-1])):
+        parts.pop()
+    city = re.sub(r'\s+', ' ', parts[-1]) if parts else ''
+    return CITY_ALIASES.get(city, city)
+
+
+def load_gazetteer(path=GAZETTEER_FILE):
+    _by_city.clear()
+    _by_city_state.clear()
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            city = row['city'].strip().lower()
+            state = row['state'].strip().lower()
+            coords = (float(row['lat']), float(row['lon']))
+            _by_city.setdefault(city, coords)
+            _by_city_state[(city, state)] = coords
+
+
+def geocode(location):
+    """Look up (lat, lon) for a free-text location like 'City Park, Austin, TX'. None if unknown."""
+    if not location:
+        return None
+    city = normalize_city(location)
+    parts = [p.strip().lower() for p in location.split(',')]
+    state = next((p[:2] for p in reversed(parts) if p != city and (p in US_STATES or _STATE_ZIP.match(p))), None)
+    if state and (city, state) in _by_city_state:
+        return _by_city_state[(city, state)]
+    return _by_city.get(city)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return EARTH_RADIUS_MILES * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def cell_id(lat, lon):
+    """Grid bucket for a point, stored alongside each event and indexed."""
+    return f"{math.floor(lat / CELL_DEGREES)}:{math.floor(lon / CELL_DEGREES)}"
+
+
+def cells_within(lat, lon, radius_miles):
+    """Every grid cell that overlaps the bounding box of a radius_miles circle around (lat, lon)."""
+    dlat = radius_miles / MILES_PER_DEGREE_LAT
+    # longitude degrees shrink with latitude; use the widest point of the box
+    widest = min(max(abs(lat) + dlat, 0), 89.0)
+    dlon = radius_miles / (MILES_PER_DEGREE_LAT * math.cos(math.radians(widest)))
+    rows = range(math.floor((lat - dlat) / CELL_DEGREES), math.floor((lat + dlat) / CELL_DEGREES) + 1)
+    cols = range(math.floor((lon - dlon) / CELL_DEGREES), math.floor((lon + dlon) / CELL_DEGREES) + 1)
+    return [f"{r}:{c}" for r in rows for c in cols]
+
+
+load_gazetteer()
@@ -1,45 +1,75 @@
 import os
-import requests
-import json
 import time
+import hashlib
+import logging
+from apis.cache import Cache
+from apis import http_client, throttle
+from apis.event import Event
+from apis.images import normalize_image_url
 
-CACHE_FILE = os.path.join(os.path.dirname(__file__), 'google_events_cache.json')
-CACHE_TTL = 24 * 3600  # 24 hours
+log = logging.getLogger(__name__)
 
-def load_cache():
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+CACHE_FILE = os.path.join(os.path.dirname(__file__), 'google_events_cache.json')  # legacy, see migrate_google_events_cache.py
+CACHE_TTL = 24 * 3600  # 24 hours; older entries are stale and get refreshed
+STALE_TTL = 24 * 3600  # how long past CACHE_TTL a stale entry may still be served while it is refreshed
+IMAGE_FIELDS = ('image', 'photo', 'picture', 'thumbnail', 'banner')  # in order of preference
 
-def save_cache(cache):
-    with open(CACHE_FILE, 'w') as f:
-        json.dump(cache, f)
+# v4: cached entries are {'fetched_at': epoch seconds, 'events': [Event.to_dict(), ...]}, adapted (and
+# image URLs normalized) once at fetch
+events_cache = Cache('google_events:v4', ttl=CACHE_TTL + STALE_TTL, max_entries=2000)
 
-def get_google_events(location, query=None, hl='en', gl='us'):
+def from_google(event):
+    """Adapt one SerpAPI events_results entry to an Event."""
+    link = event.get('link') or event.get('event_url', '')
+    address = event.get('address', [])
+    date_val = event.get('date', '')
+    image = next((event[field] for field in IMAGE_FIELDS if event.get(field)), None)
+    external_id = hashlib.md5((link or event.get('title', '')).encode('utf-8')).hexdigest()[:16]
+    return Event(
+        source="google",
+        external_id=external_id,
+        title=event.get('title', ''),
+        time=(date_val.get('when') if isinstance(date_val, dict) else date_val) or 'TBD',
+        location=', '.join(address) if isinstance(address, list) else address,
+        url=link,
+        description=event.get('description', ''),
+        image=normalize_image_url(str(image)) if image else None,
+        type='social',
+    )
+
+def default_query(location):
+    # Try to use user interests from environment/session if available
+    user_interests = os.getenv('USER_INTERESTS')
+    if user_interests:
+        return f"{user_interests} events in {location}"
+    return f"Events in {location}"
+
+def cache_key(location, query=None, hl='en', gl='us'):
+    return f"{location}:{query or default_query(location)}:{hl}:{gl}"
+
+def cached_google_events(location, query=None, hl='en', gl='us'):
+    """(events, age in seconds) from the cache, stale or not, or (None, None) if nothing is cached."""
+    cached = events_cache.get(cache_key(location, query, hl, gl))
+    if cached is None:
+        return None, None
+    return [Event.from_dict(e) for e in cached['events']], time.time() - cached['fetched_at']
+
+def refresh_google_events(location, query=None, hl='en', gl='us'):
+    """Fetch from SerpAPI and cache the result, whatever is cached now.
+
+    Concurrent refreshes of the same entry share one SerpAPI call; raises throttle.RateLimited
+    if SerpAPI's rate limit doesn't allow one in time, CircuitOpen while SerpAPI is down.
+    """
+    key = cache_key(location, query, hl, gl)
+    return [Event.from_dict(e) for e in throttle.call('serpapi', key, _fetch_google_events, location, query, hl, gl)]
+
+def _fetch_google_events(location, query, hl, gl):
     api_key = os.getenv('SERPAPI_KEY')
     if not api_key:
         raise ValueError('SERPAPI_KEY not set in environment')
-    if not query:
-        # Try to use user interests from environment/session if available
-        user_interests = os.getenv('USER_INTERESTS')
-        if user_interests:
-            query = f"{user_interests} events in {location}"
-        else:
-            query = f"Events in {location}"
-    cache = load_cache()
-    now = time.time()
-    cache_key = f"{location}:{query}:{hl}:{gl}"
-    if cache_key in cache:
-        cached = cache[cache_key]
-        if now - cached['timestamp'] < CACHE_TTL:
-            print(f"Using cached Google events for {cache_key}")
-            return cached['events']
-    # Not cached or expired, fetch from API
-    print(f"Fetching new Google events from API for {cache_key}")
+    query = query or default_query(location)
+    key = cache_key(location, query, hl, gl)
+    log.info("Fetching new Google events from API for %s", key)
     params = {
         'engine': 'google_events',
         'q': query,
@@ -49,12 +79,29 @@ def get_google_events(location, query=None, hl='en', gl='us'):
         'api_key': api_key
     }
     url = 'https://serpapi.com/search.json'
-    response = requests.get(url, params=params)
+    response = http_client.get(url, params=params)
+    if response.status_code == 429 or response.status_code >= 500:
+        # raised rather than cached as no events, so SerpAPI's breaker counts it
+        response.raise_for_status()
     if response.status_code != 200:
         return []
     data = response.json()
-    events = data.get('events_results', [])
+    events = [from_google(e).to_dict() for e in data.get('events_results', [])]
     # Cache the result
-    cache[cache_key] = {'timestamp': now, 'events': events}
-    save_cache(cache)
+    events_cache.set(key, {'fetched_at': time.time(), 'events': events})
     return events
+
+def get_google_events(location, query=None, hl='en', gl='us'):
+    """Cached events while they are fresh, otherwise a blocking fetch (or the stale entry, if
+    SerpAPI is rate limited or down). See apis.prefetch for the stale-while-revalidate path the feed uses."""
+    events, age = cached_google_events(location, query, hl, gl)
+    if events is not None and age < CACHE_TTL:
+        log.debug("Using cached Google events for %s", cache_key(location, query, hl, gl))
+        return events
+    try:
+        return refresh_google_events(location, query, hl, gl)
+    except throttle.UNAVAILABLE as e:
+        if events is None:
+            raise
+        log.info("%s; serving stale Google events for %s", e, cache_key(location, query, hl, gl))
+        return events
@@ -0,0 +1,73 @@
+import gzip
+import logging
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+# Textual responses worth compressing; images are compressed already and streams are left alone
+COMPRESSIBLE = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript',
+                'image/svg+xml')
+MIN_COMPRESS_BYTES = 512  # below this the headers outweigh the saving
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5        # brotli's fast settings still beat gzip -6 on JSON
+
+
+def compress(response, accept_encodings):
+    """Encode response's body with brotli (if installed and accepted) or gzip, in place."""
+    if response.mimetype not in COMPRESSIBLE or 'Content-Encoding' in response.headers:
+        return
+    # shared caches must keep the encoded and plain copies apart
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return
+    if brotli and accept_encodings['br']:
+        data, coding = brotli.compress(data, quality=BROTLI_QUALITY), 'br'
+    elif accept_encodings['gzip']:
+        data, coding = gzip.compress(data, compresslevel=GZIP_LEVEL), 'gzip'
+    else:
+        return
+    response.set_data(data)
+    response.headers['Content-Encoding'] = coding
+
+
+def install(app):
+    """ETag, revalidate and compress every buffered response.
+
+    Successful GETs get a weak ETag of their body and, unless the view set its own
+    Cache-Control, 'private, no-cache': the browser keeps the copy but asks each time, and an
+    unchanged page or poll costs a bodiless 304 instead of the full payload. Views that can be
+    shared (see cache_publicly) set Cache-Control themselves.
+    """
+    from flask import request
+
+    @app.after_request
+    def _cache_and_compress(response):
+        if response.is_streamed or response.direct_passthrough:
+            return response
+        if request.method in ('GET', 'HEAD') and response.status_code == 200 and response.mimetype in COMPRESSIBLE:
+            if not response.get_etag()[0]:
+                # weak: gzip and brotli copies of the same body share it
+                response.add_etag(weak=True)
+            if 'Cache-Control' not in response.headers:
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+            response.make_conditional(request.environ)
+        if response.status_code == 200:
+            compress(response, request.accept_encodings)
+        return response
+
+
+def cache_publicly(response, max_age, stale_while_revalidate=0):
+    """Let browsers and shared caches reuse response for max_age seconds (for responses that are
+    the same for every user, such as a location search). Returns response."""
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if stale_while_revalidate:
+        # werkzeug has no attribute for this directive yet
+        response.cache_control['stale-while-revalidate'] = stale_while_revalidate
+    return response
@@ -0,0 +1,80 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from apis.metrics import upstream
+
+log = logging.getLogger(__name__)
+
+# (connect, read) seconds; a hung upstream can no longer pin a worker
+DEFAULT_TIMEOUT = (3.05, 10)
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.25   # seconds, doubled per attempt
+BACKOFF_CAP = 4.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+# metrics label per upstream host; anything else is labelled with its host name
+PROVIDERS = {"api.yelp.com": "yelp", "serpapi.com": "serpapi"}
+
+_session = None
+_session_pid = None
+
+
+def get_session():
+    """The process-wide requests.Session, so keep-alive connections are reused across calls."""
+    global _session, _session_pid
+    # Sockets must not be shared across a fork (e.g. gunicorn workers)
+    if _session is None or _session_pid != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff: anywhere from 0 up to base * 2^attempt, capped."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, retries=MAX_RETRIES):
+    """GET through the shared session, retrying connection errors, timeouts, 429 and 5xx.
+
+    Returns the last response (callers still check status); raises the last exception if
+    every attempt failed to get a response at all.
+    """
+    host = urlsplit(url).hostname or ""
+    with upstream(PROVIDERS.get(host, host)) as labels:
+        response = _get_with_retries(get_session(), url, params, headers, timeout, retries)
+        if response.status_code >= 400:
+            labels["outcome"] = "http_error"
+        return response
+
+
+def _get_with_retries(session, url, params, headers, timeout, retries):
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            log.warning("GET %s failed (%s), retrying", url, e)
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            log.warning("GET %s returned %s, retrying", url, response.status_code)
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                time.sleep(min(int(retry_after), BACKOFF_CAP))
+                continue
+        time.sleep(backoff_delay(attempt))
+
+
+async def async_get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, retries=MAX_RETRIES):
+    """Awaitable get(): runs on a worker thread and shares the same connection pool."""
+    return await asyncio.to_thread(get, url, params=params, headers=headers, timeout=timeout, retries=retries)
@@ -0,0 +1,30 @@
+import re
+from functools import lru_cache
+
+# Google serves resized copies via a size suffix on the URL: '=w120-h120-p', '=s120-c', ...
+GOOGLE_SIZE = '=w1200-h900'
+_GOOGLE_SIZED = re.compile(r'=(?:w\d+-h\d+|s\d+)(?:-[a-z])?')
+
+# (host, compiled pattern, replacement), applied in order when the host appears in the URL.
+# Host None applies to every URL.
+IMAGE_RULES = (
+    (None, _GOOGLE_SIZED, GOOGLE_SIZE),
+    # lone width/height limits left on Google thumbnails
+    ('googleusercontent.com', re.compile(r'=w120(?!\d)'), '=w2000'),
+    ('googleusercontent.com', re.compile(r'=h120(?!\d)'), '=h1200'),
+    # static map tiles
+    ('maps.googleapis.com', re.compile(r'size=120x120'), 'size=1200x800'),
+    ('maps.googleapis.com', re.compile(r'zoom=15(?!\d)'), 'zoom=18'),
+)
+MEMO_SIZE = 4096
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def normalize_image_url(url):
+    """Rewrite a provider image URL to the high resolution copy we display. Idempotent."""
+    if not url:
+        return url
+    for host, pattern, replacement in IMAGE_RULES:
+        if host is None or host in url:
+            url = pattern.sub(replacement, url)
+    return url
@@ -0,0 +1,140 @@
+import os
+import time
+import bisect
+import cProfile
+import logging
+import threading
+from functools import lru_cache
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Upper bounds in seconds, Prometheus' defaults; a +Inf bucket is implied
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Per-request cProfile dumps: only when PROFILE_DIR is set, and only for requests that ask
+# with ?profile=1 or an X-Profile header
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+
+class Histogram:
+    """A labelled latency histogram rendered in the Prometheus text exposition format."""
+
+    def __init__(self, name, help, labels, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the block takes; labels may be updated inside it (e.g. outcome)."""
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        """{label values: (cumulative bucket counts incl. +Inf, count, sum)}"""
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        result = {}
+        for key, series in snapshot.items():
+            cumulative, total = [], 0
+            for count in series[:-1]:
+                total += count
+                cumulative.append(total)
+            result[key] = (cumulative, total, series[-1])
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (cumulative, count, total) in sorted(self.samples().items()):
+            labels = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key))
+            for bound, value in zip(self.buckets + (float('inf'),), cumulative):
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {value}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time spent handling a request, by route.',
+                            ('endpoint', 'method', 'status'))
+UPSTREAM_SECONDS = Histogram('upstream_request_duration_seconds', 'Time spent in calls to external services.',
+                             ('provider', 'outcome'))
+SQL_SECONDS = Histogram('sql_statement_duration_seconds', 'Time spent executing SQLite statements.',
+                        ('db', 'statement'))
+REGISTRY = (REQUEST_SECONDS, UPSTREAM_SECONDS, SQL_SECONDS)
+
+
+def render_metrics():
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+@contextmanager
+def upstream(provider):
+    """Time a call to an external service; outcome is 'error' if the block raises."""
+    with UPSTREAM_SECONDS.time(provider=provider, outcome='ok') as labels:
+        try:
+            yield labels
+        except BaseException:
+            labels['outcome'] = 'error'
+            raise
+
+
+@lru_cache(maxsize=1024)
+def statement_kind(sql):
+    """'  SELECT id FROM ...' -> 'SELECT'; keeps the sql label to a handful of values."""
+    words = sql.split(None, 1)
+    return words[0].upper() if words else ''
+
+
+def instrument(app):
+    """Time every request by route and, when enabled, profile the ones that ask for it."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+        if PROFILE_DIR and (request.args.get('profile') or request.headers.get('X-Profile')):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def _record(response):
+        profiler = g.pop('profiler', None)
+        if profiler:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{request.endpoint or 'unknown'}-{time.time():.0f}-{os.getpid()}.prof")
+            profiler.dump_stats(path)
+            response.headers['X-Profile-Dump'] = os.path.basename(path)
+            log.info("Wrote profile for %s to %s", request.path, path)
+        started = g.pop('request_started', None)
+        if started is not None:
+            # the url rule ('/api/events'), not the path, so ids in URLs don't explode the label set
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint,
+                                    method=request.method, status=response.status_code)
+        return response
@@ -0,0 +1,162 @@
+import os
+import hmac
+import base64
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# Hashes are stored as '<algorithm>$<params>$<salt>$<hash>' so the algorithm and cost can change
+# without a migration: verify_password reads them from the stored hash and needs_rehash tells
+# login to re-hash with the current settings.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "scrypt")
+SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14)))  # ~50ms and 16 MiB per hash on one core
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "600000"))
+SALT_BYTES = 16
+
+# hashlib releases the GIL while it hashes, so a pool of HASH_WORKERS threads runs that many
+# hashes in parallel without holding up other requests. Past MAX_PENDING queued hashes, new
+# logins are turned away (PasswordServiceBusy) instead of piling up behind a burst.
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", str(HASH_WORKERS * 8)))
+HASH_TIMEOUT = 10  # seconds a caller waits for its hash
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="passwords")
+_pending = threading.BoundedSemaphore(MAX_PENDING)
+
+
+class PasswordServiceBusy(Exception):
+    """Too many hashes are queued already; the caller should ask the user to retry."""
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+class ScryptHasher:
+    algorithm = 'scrypt'
+
+    def __init__(self, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+        self.n, self.r, self.p = n, r, p
+
+    def _derive(self, password, salt, n, r, p):
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+    def encode(self, password, salt):
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return f"{self.algorithm}${self.n},{self.r},{self.p}${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password, encoded):
+        _, params, salt, digest = encoded.split('$')
+        n, r, p = (int(x) for x in params.split(','))
+        return hmac.compare_digest(self._derive(password, _unb64(salt), n, r, p), _unb64(digest))
+
+    def params(self):
+        return f"{self.n},{self.r},{self.p}"
+
+
+class Pbkdf2Hasher:
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations=PBKDF2_ITERATIONS):
+        self.iterations = iterations
+
+    def encode(self, password, salt):
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, self.iterations)
+        return f"{self.algorithm}${self.iterations}${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password, encoded):
+        _, iterations, salt, digest = encoded.split('$')
+        derived = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), _unb64(salt), int(iterations))
+        return hmac.compare_digest(derived, _unb64(digest))
+
+    def params(self):
+        return str(self.iterations)
+
+
+class LegacySha256Hasher:
+    """Unsalted SHA-256 hex digests from before the KDF; verified so those users can log in once more."""
+    algorithm = 'sha256'
+
+    def encode(self, password, salt=None):
+        return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+    def verify(self, password, encoded):
+        return hmac.compare_digest(self.encode(password), encoded)
+
+    def params(self):
+        return ''
+
+
+HASHERS = {hasher.algorithm: hasher for hasher in (ScryptHasher(), Pbkdf2Hasher())}
+LEGACY = LegacySha256Hasher()
+
+
+def get_hasher(encoded=None):
+    """The hasher that made encoded, or the configured one for new hashes."""
+    if encoded is None:
+        return HASHERS[PASSWORD_HASHER]
+    algorithm = encoded.split('$', 1)[0] if '$' in encoded else LEGACY.algorithm
+    if algorithm == LEGACY.algorithm:
+        return LEGACY
+    return HASHERS[algorithm]
+
+
+def needs_rehash(encoded):
+    """True if encoded wasn't made by the configured hasher at its current cost."""
+    hasher = get_hasher()
+    parts = encoded.split('$')
+    return parts[0] != hasher.algorithm or len(parts) != 4 or parts[1] != hasher.params()
+
+
+def _submit(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise PasswordServiceBusy("password hashing queue is full")
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except FutureTimeout:
+        # drops it if it's still queued; one already hashing runs on and frees its slot when done
+        future.cancel()
+        raise PasswordServiceBusy(f"password hash took over {HASH_TIMEOUT}s")
+
+
+def hash_password(password):
+    """A salted hash of password with the configured hasher, computed on the hashing pool."""
+    return _submit(get_hasher().encode, password, os.urandom(SALT_BYTES))
+
+
+def verify_password(password, encoded):
+    """Check password against a stored hash of any supported algorithm, on the hashing pool."""
+    try:
+        hasher = get_hasher(encoded)
+    except KeyError:
+        return False
+    try:
+        return _submit(hasher.verify, password, encoded)
+    except (ValueError, TypeError):
+        # malformed stored hash
+        return False
+
+
+_dummy_hash = None
+
+
+def dummy_verify(password):
+    """Spend as long as a real check, so a login for an unknown name can't be told apart by timing."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(os.urandom(SALT_BYTES).hex())
+    verify_password(password, _dummy_hash)
+    return False
@@ -0,0 +1,114 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from apis import google_events
+from apis.tagging import tag_events
+
+log = logging.getLogger(__name__)
+
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "900"))  # seconds between warming passes
+PREFETCH_TOP = int(os.getenv("PREFETCH_TOP", "25"))                # most popular locations to keep warm
+# Refresh this long before an entry goes stale, so popular locations are never served stale at all.
+# Must exceed PREFETCH_INTERVAL or an entry can go stale between two passes.
+REFRESH_MARGIN = float(os.getenv("PREFETCH_MARGIN", "3600"))
+
+# Background refreshes get their own small pool so they never queue behind (or hold up) the
+# provider calls of live requests on the aggregator pool
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+_inflight = set()
+_inflight_lock = threading.Lock()
+
+
+def warm(location, margin=REFRESH_MARGIN):
+    """Refresh location's Google events and their tags unless they stay fresh for another margin seconds.
+
+    Returns True if it fetched.
+    """
+    _, age = google_events.cached_google_events(location)
+    if age is not None and age < google_events.CACHE_TTL - margin:
+        return False
+    events = google_events.refresh_google_events(location)
+    # Classify now so the feed request after this finds every tag cached too
+    tag_events(events)
+    return True
+
+
+def revalidate(location):
+    """Refresh location in the background, at most once at a time. Returns the Future, or None if
+    a refresh is already running."""
+    with _inflight_lock:
+        if location in _inflight:
+            return None
+        _inflight.add(location)
+
+    def job():
+        try:
+            return warm(location, margin=0)
+        except Exception as e:
+            log.warning("Background refresh of %s failed: %s", location, e)
+        finally:
+            with _inflight_lock:
+                _inflight.discard(location)
+
+    return _executor.submit(job)
+
+
+def feed_google_events(location):
+    """Google events for the feed, stale-while-revalidate.
+
+    Fresh entries are returned as is. Stale ones (up to STALE_TTL past CACHE_TTL) are returned
+    immediately while a background refresh replaces them; only a location with nothing cached
+    blocks on SerpAPI.
+    """
+    events, age = google_events.cached_google_events(location)
+    if events is None:
+        return google_events.refresh_google_events(location)
+    if age >= google_events.CACHE_TTL:
+        log.debug("Serving stale Google events for %s (%.0fs old), refreshing", location, age)
+        revalidate(location)
+    return events
+
+
+def run_once(locations, margin=REFRESH_MARGIN):
+    """Warm every location in order; one failing location doesn't stop the rest."""
+    report = {'checked': 0, 'refreshed': 0, 'failed': 0}
+    for location in locations:
+        report['checked'] += 1
+        try:
+            if warm(location, margin=margin):
+                report['refreshed'] += 1
+        except Exception as e:
+            report['failed'] += 1
+            log.warning("Prefetch of %s failed: %s", location, e)
+    return report
+
+
+class Prefetcher(threading.Thread):
+    """Daemon thread that re-warms the popular locations every interval seconds.
+
+    popular is a callable returning the locations to keep warm, most popular first (e.g.
+    db.get_popular_locations), re-read on every pass so new users' cities are picked up.
+    """
+
+    def __init__(self, popular, interval=PREFETCH_INTERVAL, top=PREFETCH_TOP, margin=REFRESH_MARGIN):
+        super().__init__(name="prefetcher", daemon=True)
+        self.popular = popular
+        self.interval = interval
+        self.top = top
+        self.margin = margin
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.is_set():
+            started = time.monotonic()
+            try:
+                report = run_once(self.popular(self.top), margin=self.margin)
+                log.info("Prefetch pass: %(checked)d locations, %(refreshed)d refreshed, %(failed)d failed", report)
+            except Exception:
+                log.exception("Prefetch pass failed")
+            self._halt.wait(max(self.interval - (time.monotonic() - started), 0))
+
+    def stop(self):
+        self._halt.set()
@@ -1,9 +1,17 @@
 import os
 import praw
 import json
-from datetime import datetime
+import time
+import logging
+import threading
 from dotenv import load_dotenv
 import google.generativeai as genai
+from apis.cache import Cache
+from apis.event import Event
+from apis.metrics import upstream
+from apis import throttle
+
+log = logging.getLogger(__name__)
 
 load_dotenv()
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
@@ -11,12 +19,15 @@ genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 # Initialize Gemini model (text only)
 model_text = genai.GenerativeModel("gemini-2.5-flash")
 
+def _generate(model, prompt):
+    with upstream('gemini'):
+        return model.generate_content(prompt).text
+
 def genai_call(prompt: str) -> str:
     try:
-        response = model_text.generate_content(prompt)
-        return response.text
+        return throttle.call('gemini', prompt, _generate, model_text, prompt)
     except Exception as e:
-        print("GenAI error:", e)
+        log.warning("GenAI error: %s", e)
         return "No response"
 
 city_to_subreddit = {
@@ -28,67 +39,140 @@ city_to_subreddit = {
     "boston": "boston", "Washington DC" : "dc", "maryland": "dmv"
 }
 
-def search_reddit_events(location, terms, reddit_client_id, reddit_client_secret, reddit_user_agent):
-
-    try: 
-        # Initialize Reddit API
-        reddit = praw.Reddit(
-            client_id=reddit_client_id,
-            client_secret=reddit_client_secret,
-            user_agent=reddit_user_agent
-        )
-    except Exception as e: 
-        print(f"ERROR INITIALIZING REDDIT API: {e}")
+SEARCH_KEYWORDS = "free food OR pizza OR snacks OR lunch OR bbq OR dinner OR admission OR parking"
+SEARCH_LIMIT = 20
+REDDIT_SEARCH_TTL = 10 * 60           # new posts show up often, keep searches short-lived
+REDDIT_STALE_TTL = 24 * 3600          # how long past REDDIT_SEARCH_TTL a search may still be served while Reddit is down
+DIETARY_VERDICT_TTL = 7 * 24 * 3600   # a post's title doesn't change, neither does the verdict
+
+# v2: entries are {'fetched_at': epoch seconds, 'posts': [...]}
+search_cache = Cache('reddit_search:v2', ttl=REDDIT_SEARCH_TTL + REDDIT_STALE_TTL, max_entries=500)
+verdict_cache = Cache('reddit_dietary', ttl=DIETARY_VERDICT_TTL, max_entries=20000)
+
+# ---------- REDDIT CLIENT ----------
+
+# One praw.Reddit per set of credentials for the life of the process. PRAW isn't thread safe,
+# so calls through a client hold its lock.
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_reddit_client(reddit_client_id, reddit_client_secret, reddit_user_agent):
+    key = (reddit_client_id, reddit_client_secret, reddit_user_agent)
+    with _clients_lock:
+        if key not in _clients:
+            reddit = praw.Reddit(
+                client_id=reddit_client_id,
+                client_secret=reddit_client_secret,
+                user_agent=reddit_user_agent
+            )
+            _clients[key] = (reddit, threading.Lock())
+        return _clients[key]
+
+def fetch_subreddit_posts(reddit, reddit_lock, subreddit_name):
+    """Newest posts matching SEARCH_KEYWORDS as plain dicts, cached for REDDIT_SEARCH_TTL (and
+    served stale for up to REDDIT_STALE_TTL more while Reddit is down)."""
+    cache_key = f"{subreddit_name}:{SEARCH_KEYWORDS}:{SEARCH_LIMIT}"
+    cached = search_cache.get(cache_key)
+    if cached is not None and time.time() - cached['fetched_at'] < REDDIT_SEARCH_TTL:
+        return cached['posts']
+    try:
+        # concurrent searches of the same subreddit wait for one listing rather than queue on the lock
+        return throttle.call('reddit', cache_key, _search_subreddit, reddit, reddit_lock, subreddit_name, cache_key)
+    except throttle.UNAVAILABLE as e:
+        if cached is None:
+            raise
+        log.info("%s; serving stale posts for r/%s", e, subreddit_name)
+        return cached['posts']
+
+def _search_subreddit(reddit, reddit_lock, subreddit_name, cache_key):
+    with reddit_lock:
+        with upstream('reddit'):
+            results = reddit.subreddit(subreddit_name).search(SEARCH_KEYWORDS, sort="new", limit=SEARCH_LIMIT)
+            # the listing is lazy; iterating it is what hits the API
+            posts = [{"id": post.id, "title": post.title, "permalink": post.permalink} for post in results]
+    search_cache.set(cache_key, {'fetched_at': time.time(), 'posts': posts})
+    return posts
+
+# ---------- DIETARY FILTER ----------
+
+def _dietary_prompt(posts, dietary_filters):
+    lines = [
+        f"For each numbered event below, does it match these dietary preferences: {dietary_filters}?",
+        "Reply with only a JSON array of 'yes' or 'no', one per event, in the same order.",
+        "",
+    ]
+    for i, post in enumerate(posts, 1):
+        lines.append(f"{i}. {post['title']}")
+    return "\n".join(lines)
+
+def classify_dietary(posts, dietary_filters, model=None):
+    """Return {post id: True/False} for whether each post matches dietary_filters.
+
+    Verdicts are cached per (post id, filter); the uncached posts are judged together in one
+    model call. Posts the model couldn't judge are left out (treated as no) and not cached.
+    """
+    filter_key = dietary_filters.strip().lower()
+    keys = {post['id']: f"{post['id']}:{filter_key}" for post in posts}
+    cached = verdict_cache.get_many(keys.values())
+    verdicts = {post_id: cached[key] for post_id, key in keys.items() if key in cached}
+
+    missing = [post for post in posts if post['id'] not in verdicts]
+    if missing:
+        model = model or model_text
+        prompt = _dietary_prompt(missing, dietary_filters)
+        try:
+            text = throttle.call('gemini', prompt, _generate, model, prompt)
+            answers = json.loads(text[text.find('['):text.rfind(']') + 1])
+        except Exception as e:
+            log.warning("GenAI error: %s", e)
+            answers = None
+        if isinstance(answers, list) and len(answers) == len(missing):
+            learned = {post['id']: str(answer).strip().lower().startswith('yes') for post, answer in zip(missing, answers)}
+            verdict_cache.set_many({keys[post_id]: verdict for post_id, verdict in learned.items()})
+            verdicts.update(learned)
+    return verdicts
+
+# ---------- SEARCH ----------
+
+def post_to_event(post, subreddit_name):
+    """Adapt one cached subreddit post to an Event."""
+    return Event(
+        source="reddit",
+        external_id=post['id'],
+        title=post['title'].strip(),
+        time="TBD",
+        url=f"https://reddit.com{post['permalink']}",
+        location=subreddit_name,
+        price='Free',
+        type='food',
+    )
+
+def search_reddit_events(location, terms, reddit_client_id, reddit_client_secret, reddit_user_agent, model=None):
+
+    try:
+        # Reuse the process-wide Reddit API client
+        reddit, reddit_lock = get_reddit_client(reddit_client_id, reddit_client_secret, reddit_user_agent)
+    except Exception as e:
+        log.error("Error initializing Reddit API: %s", e)
         return []
-    
+
     subreddit_name = city_to_subreddit.get(location.lower())
     if not subreddit_name:
-        print(f" Sorry, no subreddit found for inputted city. Try a major city next time")
+        log.info("No subreddit known for %r", location)
         return []
-    
+
     try:
-        reddit_subreddit_obj = reddit.subreddit(subreddit_name)
+        posts = fetch_subreddit_posts(reddit, reddit_lock, subreddit_name)
     except Exception as e:
-        print(f"Error accessing Reddit subreddit '{subreddit_name}': {e}")
+        log.warning("Error searching Reddit for events in %s: %s", subreddit_name, e)
         return []
-    
-    keywords = "free food OR pizza OR snacks OR lunch OR bbq OR dinner OR admission OR parking"
-    posts = []
+
+    free_posts = [post for post in posts if "free" in post['title'].lower()]
 
     dietary_filters = terms if terms else ""
+    if dietary_filters and free_posts:
+        # Use Gemini once for all posts to check which match the dietary filters
+        verdicts = classify_dietary(free_posts, dietary_filters, model=model)
+        free_posts = [post for post in free_posts if verdicts.get(post['id'])]
 
-    try:
-        for post in reddit_subreddit_obj.search(keywords, sort="new", limit=20):
-            title_lower = post.title.lower()
-            is_free = "free" in title_lower
-            if is_free:
-                event_price = 'Free'
-                # Use Gemini to check if the post matches dietary filters
-                if dietary_filters:
-                    prompt = f"Does this event match these dietary preferences: {dietary_filters}? Event: {post.title}. Reply 'yes' or 'no'."
-                    gemini_response = genai_call(prompt)
-                    if gemini_response.strip().lower().startswith('yes'):
-                        posts.append({
-                            "source" : "reddit",
-                            "external_id": post.id,
-                            "global_id": f"reddit_{post.id}",
-                            "title": post.title.strip(),
-                            "time": "TBD",
-                            "url": f"https://reddit.com{post.permalink}",
-                            "location": subreddit_name,
-                            "price": event_price
-                        })
-                else:
-                    posts.append({
-                        "source" : "reddit",
-                        "external_id": post.id,
-                        "global_id": f"reddit_{post.id}",
-                        "title": post.title.strip(),
-                        "time": "TBD",
-                        "url": f"https://reddit.com{post.permalink}",
-                        "location": subreddit_name,
-                        "price": event_price
-                    })
-    except Exception as e:
-        print(f"Error searching Reddit for events in {subreddit_name}: {e}")
-    return posts
\ No newline at end of file
+    return [post_to_event(post, subreddit_name) for post in free_posts]
@@ -0,0 +1,154 @@
+import os
+import re
+import json
+import hashlib
+import logging
+from dotenv import load_dotenv
+from apis.cache import Cache
+from apis import throttle
+from apis.metrics import upstream
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+log = logging.getLogger(__name__)
+
+load_dotenv()
+
+ALLOWED_TAGS = ('food', 'music', 'sports', 'comedy', 'networking', 'art', 'education', 'festival', 'other')
+
+TAG_TTL = 30 * 24 * 3600  # 30 days, event titles/descriptions don't change meaning
+TAG_CACHE_MAX = 50000     # least recently used tags are evicted past this many rows
+TAG_BATCH_SIZE = 40       # events classified per model call
+TAG_TIMEOUT = 10          # seconds to wait on one batched model call
+
+tag_cache = Cache('event_tags', ttl=TAG_TTL, max_entries=TAG_CACHE_MAX, memory_entries=2048)
+
+GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
+if genai and GEMINI_API_KEY:
+    genai.configure(api_key=GEMINI_API_KEY)
+    tag_model = genai.GenerativeModel("gemini-2.5-flash")
+else:
+    tag_model = None
+
+# Local fallback classifier: first tag (in ALLOWED_TAGS order) with the most keyword hits wins
+TAG_KEYWORDS = {
+    'food': ['food', 'pizza', 'taco', 'bbq', 'brunch', 'lunch', 'dinner', 'breakfast', 'potluck', 'tasting',
+             'wine', 'beer', 'coffee', 'vegan', 'restaurant', 'chef', 'cooking', 'snacks', 'dessert', 'food truck'],
+    'music': ['music', 'concert', 'jazz', 'rock', 'dj', 'band', 'live music', 'orchestra', 'recital', 'hip hop',
+              'tour', 'karaoke', 'open mic', 'symphony', 'choir'],
+    'sports': ['sports', 'soccer', 'basketball', 'baseball', 'football', 'hockey', 'run', '5k', 'marathon', 'yoga',
+               'fitness', 'pickleball', 'tennis', 'game day', 'tournament', 'cycling'],
+    'comedy': ['comedy', 'comedian', 'stand-up', 'standup', 'improv', 'laugh', 'roast', 'sketch'],
+    'networking': ['networking', 'mixer', 'career', 'startup', 'pitch', 'meetup', 'professionals', 'business',
+                   'entrepreneur', 'job fair', 'founders'],
+    'art': ['art', 'gallery', 'exhibit', 'exhibition', 'museum', 'painting', 'sculpture', 'photography', 'craft',
+            'theater', 'theatre', 'dance', 'film screening'],
+    'education': ['education', 'workshop', 'lecture', 'class', 'seminar', 'talk', 'bootcamp', 'book club',
+                  'library', 'course', 'webinar', 'panel', 'science', 'history'],
+    'festival': ['festival', 'fest', 'parade', 'fair', 'carnival', 'celebration', 'block party', 'market'],
+}
+_KEYWORD_PATTERNS = {
+    tag: re.compile(r'\b(?:' + '|'.join(re.escape(w) for w in words) + r')\b', re.IGNORECASE)
+    for tag, words in TAG_KEYWORDS.items()
+}
+
+
+def keyword_tag(title, description=""):
+    """Classify an event from keywords alone, no model call."""
+    text = f"{title} {description}"
+    best_tag, best_hits = 'other', 0
+    for tag, pattern in _KEYWORD_PATTERNS.items():
+        hits = len(pattern.findall(text))
+        if hits > best_hits:
+            best_tag, best_hits = tag, hits
+    return best_tag
+
+
+def event_key(title, description=""):
+    return hashlib.sha256(f"{title}\x1f{description}".encode('utf-8')).hexdigest()
+
+
+# ---------- BATCHED MODEL CLASSIFICATION ----------
+
+def _batch_prompt(items):
+    lines = [
+        "Classify each event below with a single tag (one word, lowercase) that best categorizes it.",
+        f"Allowed tags: {', '.join(ALLOWED_TAGS)}. If unsure, use 'other'.",
+        "Reply with only a JSON array of tags, one per event, in the same order.",
+        "",
+    ]
+    for i, (title, description) in enumerate(items, 1):
+        lines.append(f"{i}. Title: {title}\n   Description: {description}")
+    return "\n".join(lines)
+
+
+def _parse_batch_response(text, expected):
+    text = text.strip()
+    start, end = text.find('['), text.rfind(']')
+    if start == -1 or end == -1:
+        return None
+    try:
+        tags = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(tags, list) or len(tags) != expected:
+        return None
+    return [str(t).strip().lower() if str(t).strip().lower() in ALLOWED_TAGS else 'other' for t in tags]
+
+
+def _generate(model, prompt):
+    with upstream('gemini'):
+        return model.generate_content(prompt, request_options={"timeout": TAG_TIMEOUT}).text
+
+
+def classify_batch(items, model=None):
+    """Tag a list of (title, description) pairs in one model call. Returns None if the model is
+    unavailable or rate limited."""
+    model = model or tag_model
+    if not model or not items:
+        return None
+    prompt = _batch_prompt(items)
+    try:
+        # the same batch asked for by concurrent feed requests is classified once
+        text = throttle.call('gemini', prompt, _generate, model, prompt)
+        return _parse_batch_response(text, len(items))
+    except Exception as e:
+        log.warning("Gemini batch tag error: %s", e)
+        return None
+
+
+def tag_events(events, model=None):
+    """Return one tag per Event (by its title and description), in order.
+
+    Cached tags are reused; the rest are classified TAG_BATCH_SIZE at a time in a single prompt,
+    falling back to keyword_tag when the model is unavailable or its answer can't be parsed.
+    """
+    items = [(e.title or '', e.description or '') for e in events]
+    keys = [event_key(title, desc) for title, desc in items]
+    tags_by_key = tag_cache.get_many(keys)
+
+    missing = {}
+    for key, item in zip(keys, items):
+        if key not in tags_by_key:
+            missing.setdefault(key, item)
+
+    if missing:
+        missing_keys = list(missing)
+        learned = {}
+        for i in range(0, len(missing_keys), TAG_BATCH_SIZE):
+            chunk = missing_keys[i:i + TAG_BATCH_SIZE]
+            tags = classify_batch([missing[k] for k in chunk], model=model)
+            if tags:
+                learned.update(zip(chunk, tags))
+            else:
+                # Keyword tags aren't cached so the model gets another try next time
+                for k in chunk:
+                    tags_by_key[k] = keyword_tag(*missing[k])
+        tag_cache.set_many(learned)
+        tags_by_key.update(learned)
+
+    return [tags_by_key[k] for k in keys]
+
@@ -0,0 +1,136 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+from apis.breaker import breaker, CircuitOpen
+from apis.metrics import UPSTREAM_SECONDS
+
+# Requests per second and burst per provider, overridable with e.g. THROTTLE_YELP_RATE /
+# THROTTLE_YELP_BURST. Buckets are per process: with N workers, set rate to quota / N.
+# Providers not listed are coalesced but not rate limited.
+LIMITS = {
+    'yelp': (5.0, 10),
+    'serpapi': (1.0, 5),
+    'gemini': (2.0, 5),
+}
+# Longest a call queues for a token before it gives up and the caller serves what it has cached
+MAX_WAIT = float(os.getenv("THROTTLE_MAX_WAIT", "2"))
+
+
+class RateLimited(Exception):
+    """No token came up for the provider within the allowed wait."""
+
+
+# What call() raises instead of calling an upstream that is rate limited or down; callers serve
+# what they have cached (or a local fallback) instead
+UNAVAILABLE = (RateLimited, CircuitOpen)
+
+
+class TokenBucket:
+    """rate tokens per second, holding at most burst.
+
+    A caller that finds the bucket empty reserves the next token and sleeps until it is due, so
+    waiters are served in arrival order; one whose turn is further off than its timeout is turned
+    away without reserving anything.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=MAX_WAIT):
+        """Take a token, waiting up to timeout seconds for it. Returns False if it wouldn't come in time."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > timeout:
+                return False
+            # may go negative: each waiter ahead of us holds one token of debt
+            self._tokens -= 1
+        if wait:
+            self._sleep(wait)
+        return True
+
+
+class SingleFlight:
+    """Run one call per key at a time; callers arriving while it runs share its result (or exception)."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_flights = SingleFlight()
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket(provider):
+    """provider's process-wide TokenBucket, or None if it isn't rate limited."""
+    with _buckets_lock:
+        if provider not in _buckets:
+            limit = LIMITS.get(provider)
+            if limit is not None:
+                name = provider.upper()
+                rate = float(os.getenv(f"THROTTLE_{name}_RATE", limit[0]))
+                burst = int(os.getenv(f"THROTTLE_{name}_BURST", limit[1]))
+                limit = TokenBucket(rate, burst)
+            _buckets[provider] = limit
+        return _buckets[provider]
+
+
+def call(provider, key, fn, *args, wait=MAX_WAIT, **kwargs):
+    """fn(*args, **kwargs) against provider, through its circuit breaker and within its rate limit.
+
+    Concurrent calls with the same key share one upstream call and its result, so fn should
+    return something the callers won't mutate (plain dicts, strings). Raises CircuitOpen at once
+    while provider's breaker is open, RateLimited if no token comes up within wait seconds.
+    """
+    def guarded():
+        circuit = breaker(provider)
+        if not circuit.allow():
+            UPSTREAM_SECONDS.observe(0, provider=provider, outcome='circuit_open')
+            raise CircuitOpen(f"{provider} is unavailable")
+        limiter = bucket(provider)
+        started = time.perf_counter()
+        if limiter is not None and not limiter.acquire(wait):
+            circuit.abandon()
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, provider=provider, outcome='throttled')
+            raise RateLimited(f"{provider} rate limit reached")
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            circuit.record(time.perf_counter() - started, e)
+            raise
+        circuit.record(time.perf_counter() - started)
+        return result
+
+    return _flights.do((provider, key), guarded)
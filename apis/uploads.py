@@ -0,0 +1,199 @@
+import os
+import re
+import hashlib
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+log = logging.getLogger(__name__)
+
+# Uploads are stored as '<sha256>.<ext>', so the same picture posted twice is one file and a
+# name can never overwrite someone else's. The feed shows a resized copy ('<sha256>-<width>.webp'
+# or '.jpg') made in the background; the original is only served until that copy exists.
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join('static', 'uploads'))
+UPLOAD_URL = '/static/uploads'
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+MAX_PIXELS = 40_000_000  # refuse to decode anything bigger (decompression bombs)
+
+CARD_WIDTH = int(os.getenv("IMAGE_CARD_WIDTH", "1080"))  # the For You cards are at most this wide
+# (format, extension, save options); the feed shows the first, the JPEG is for clients without WebP
+VARIANT_FORMATS = (
+    ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+# Leading bytes of each accepted type; the client's filename and Content-Type aren't trusted
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+SNIFF_BYTES = 12
+
+_VARIANT_NAME = re.compile(r'^[0-9a-f]{64}-\d+\.[a-z]+$')
+
+# Resizing is CPU bound and can take a second on a large photo, so it runs on its own pool
+# rather than in the request that uploaded it
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("IMAGE_WORKERS", "2")), thread_name_prefix="images")
+_inflight = set()
+_inflight_lock = threading.Lock()
+
+
+class UploadRejected(Exception):
+    """The upload is too big or not an image we accept; the message is safe to show the user."""
+
+
+def sniff(head):
+    """The extension for an image starting with head, or None."""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    for signature, ext in SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+def upload_url(name):
+    return f"{UPLOAD_URL}/{name}"
+
+
+def uploaded_name(url):
+    """The file name under UPLOAD_DIR that url points at, or None if it isn't one of ours."""
+    prefix = UPLOAD_URL + '/'
+    if not url or not url.startswith(prefix):
+        return None
+    name = url[len(prefix):]
+    return name if name and '/' not in name and name not in ('.', '..') else None
+
+
+def store_image(stream, max_bytes=MAX_UPLOAD_BYTES):
+    """Copy an uploaded image from stream to UPLOAD_DIR, CHUNK_SIZE bytes at a time.
+
+    Returns the stored file name ('<sha256>.<ext>'). Raises UploadRejected past max_bytes or
+    if the bytes aren't a PNG, JPEG, GIF or WebP; nothing is left on disk in either case.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    digest, size, head = hashlib.sha256(), 0, b''
+    tmp = tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix='.upload-', delete=False)
+    try:
+        with tmp:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadRejected(f"Images must be under {max_bytes // (1024 * 1024)} MB.")
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                digest.update(chunk)
+                tmp.write(chunk)
+        ext = sniff(head)
+        if ext is None:
+            raise UploadRejected("Images must be PNG, JPEG, GIF or WebP.")
+        name = f"{digest.hexdigest()}.{ext}"
+        path = os.path.join(UPLOAD_DIR, name)
+        if os.path.exists(path):
+            os.remove(tmp.name)  # seen these bytes before
+        else:
+            os.replace(tmp.name, path)
+        return name
+    except BaseException:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+
+
+def variant_name(name, width, ext):
+    return f"{name.rsplit('.', 1)[0]}-{width}.{ext}"
+
+
+def _card_image(path, width):
+    """The picture at path, upright and at most width wide, as RGB or RGBA."""
+    with Image.open(path) as img:
+        if img.width * img.height > MAX_PIXELS:
+            raise ValueError(f"{img.width}x{img.height} is too large to decode")
+        # JPEGs can decode straight to a smaller scale, far cheaper than a full decode and resize
+        img.draft('RGB', (width, width * 4))
+        img = ImageOps.exif_transpose(img)
+        alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+        img = img.convert('RGBA' if alpha else 'RGB')
+    img.thumbnail((width, width * 4), Image.LANCZOS)
+    return img
+
+
+def make_variants(name, width=CARD_WIDTH):
+    """Write the VARIANT_FORMATS copies of upload name at width, skipping ones already on disk.
+
+    Returns the variant file names in VARIANT_FORMATS order; empty without Pillow.
+    """
+    if Image is None:
+        log.warning("Pillow isn't installed; serving %s without resized copies", name)
+        return []
+    img, names = None, []
+    for fmt, ext, options in VARIANT_FORMATS:
+        variant = variant_name(name, width, ext)
+        path = os.path.join(UPLOAD_DIR, variant)
+        if not os.path.exists(path):
+            if img is None:
+                img = _card_image(os.path.join(UPLOAD_DIR, name), width)
+            out = img
+            if fmt == 'JPEG' and img.mode == 'RGBA':
+                out = Image.new('RGB', img.size, 'white')
+                out.paste(img, mask=img.getchannel('A'))
+            tmp = f"{path}.tmp"
+            out.save(tmp, format=fmt, **options)
+            os.replace(tmp, path)
+        names.append(variant)
+    return names
+
+
+def card_url(name):
+    """Make (or find) name's resized copies and return the URL the feed should show, or None."""
+    variants = make_variants(name)
+    return upload_url(variants[0]) if variants else None
+
+
+def ready_card_url(name):
+    """The URL of name's resized copy if it's already on disk (the same picture posted before), else None."""
+    variant = variant_name(name, CARD_WIDTH, VARIANT_FORMATS[0][1])
+    return upload_url(variant) if os.path.exists(os.path.join(UPLOAD_DIR, variant)) else None
+
+
+def process_image(name, on_ready):
+    """Resize upload name in the background, then call on_ready(original_url, card_url).
+
+    At most one job per name runs at a time; returns the Future, or None if one is already
+    running. Failures are logged and leave the original in place.
+    """
+    with _inflight_lock:
+        if name in _inflight:
+            return None
+        _inflight.add(name)
+
+    def job():
+        try:
+            url = card_url(name)
+            if url:
+                on_ready(upload_url(name), url)
+            return url
+        except Exception as e:
+            log.warning("Resizing upload %s failed: %s", name, e)
+        finally:
+            with _inflight_lock:
+                _inflight.discard(name)
+
+    return _executor.submit(job)
+
+
+def is_variant(name):
+    """True if name is a resized copy made by make_variants rather than an upload."""
+    return bool(_VARIANT_NAME.match(name))
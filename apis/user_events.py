@@ -1,39 +1,139 @@
 import os
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
 from dotenv import load_dotenv
+from apis.db_pool import get_connection, transaction
+from apis.event import Event
+from apis.geo import normalize_city, geocode, cell_id, cells_within, haversine
 
 load_dotenv()
 
 DB_PATH = os.getenv("USER_EVENTS_DB", "user_events.db")
 
+EVENT_TIME_FORMAT = "%Y-%m-%dT%H:%M"  # as post_event's datetime-local field submits it
+# event_time is wall-clock time in the event's own zone; the furthest behind UTC is UTC-12
+MAX_ZONE_LAG = timedelta(hours=12)
+
+EVENT_COLUMNS = 'id, title, location, event_time, timezone, tag, description, created_at, image_url'
+
 def init_user_events_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS user_events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            location TEXT NOT NULL,
-            event_time TEXT NOT NULL,
-            timezone TEXT NOT NULL,
-            tag TEXT,
-            description TEXT,
-            created_at TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-def add_user_event(title, location, event_time, timezone, tag=None, description=""):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO user_events (title, location, event_time, timezone, tag, description, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (title, location, event_time, timezone, tag, description, datetime.utcnow().isoformat()))
-    conn.commit()
-    conn.close()
+    with transaction(DB_PATH) as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                location TEXT NOT NULL,
+                event_time TEXT NOT NULL,
+                timezone TEXT NOT NULL,
+                tag TEXT,
+                description TEXT,
+                created_at TEXT NOT NULL,
+                city TEXT,
+                lat REAL,
+                lon REAL,
+                geo_cell TEXT,
+                image_url TEXT
+            )
+        ''')
+        ensure_city_column(conn)
+        ensure_geo_columns(conn)
+        ensure_image_column(conn)
+        ensure_event_time_format(conn)
+
+def ensure_city_column(conn):
+    """Add and backfill the normalized city column and the feed query indexes if missing.
+
+    Returns the number of rows backfilled.
+    """
+    try:
+        conn.execute("ALTER TABLE user_events ADD COLUMN city TEXT")
+    except sqlite3.OperationalError as e:
+        if 'duplicate column name' not in str(e):
+            raise
+    rows = conn.execute("SELECT id, location FROM user_events WHERE city IS NULL").fetchall()
+    conn.executemany("UPDATE user_events SET city = ? WHERE id = ?", [(normalize_city(loc), i) for i, loc in rows])
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_events_city_time ON user_events (city, event_time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_events_tag_time ON user_events (tag, event_time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_events_time ON user_events (event_time)")
+    return len(rows)
+
+def ensure_geo_columns(conn):
+    """Add lat/lon/geo_cell columns and their index if missing, geocoding rows that lack them.
+
+    Returns the number of rows that could be geocoded.
+    """
+    for column, kind in (('lat', 'REAL'), ('lon', 'REAL'), ('geo_cell', 'TEXT')):
+        try:
+            conn.execute(f"ALTER TABLE user_events ADD COLUMN {column} {kind}")
+        except sqlite3.OperationalError as e:
+            if 'duplicate column name' not in str(e):
+                raise
+    updates = []
+    for event_id, location in conn.execute("SELECT id, location FROM user_events WHERE lat IS NULL").fetchall():
+        coords = geocode(location)
+        if coords:
+            updates.append((coords[0], coords[1], cell_id(*coords), event_id))
+    conn.executemany("UPDATE user_events SET lat = ?, lon = ?, geo_cell = ? WHERE id = ?", updates)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_events_geo_cell ON user_events (geo_cell, event_time)")
+    return len(updates)
+
+def ensure_image_column(conn):
+    """Add the image_url column if missing, moving '[IMAGE]<url>' suffixes out of descriptions into it.
+
+    Returns the number of rows moved.
+    """
+    try:
+        conn.execute("ALTER TABLE user_events ADD COLUMN image_url TEXT")
+    except sqlite3.OperationalError as e:
+        if 'duplicate column name' not in str(e):
+            raise
+    updates = []
+    for event_id, description in conn.execute(
+            "SELECT id, description FROM user_events WHERE instr(description, '[IMAGE]') > 0").fetchall():
+        description, image_url = (part.strip() for part in description.split('[IMAGE]', 1))
+        updates.append((description, image_url or None, event_id))
+    conn.executemany("UPDATE user_events SET description = ?, image_url = ? WHERE id = ?", updates)
+    return len(updates)
+
+def ensure_event_time_format(conn):
+    """Rewrite 'YYYY-MM-DD HH:MM' event times (as the bulk importer used to store them) to EVENT_TIME_FORMAT,
+    so they sort and compare with the rest.
+
+    Returns the number of rows rewritten.
+    """
+    return conn.execute(
+        "UPDATE user_events SET event_time = replace(event_time, ' ', 'T') "
+        "WHERE event_time GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]'").rowcount
+
+INSERT_EVENT_SQL = '''
+    INSERT INTO user_events (title, location, event_time, timezone, tag, description, image_url, created_at,
+                             city, lat, lon, geo_cell)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+@lru_cache(maxsize=4096)
+def locate(location):
+    """(city, lat, lon, geo_cell) for a location string; imports repeat the same venues a lot."""
+    lat, lon = geocode(location) or (None, None)
+    geo_cell = cell_id(lat, lon) if lat is not None else None
+    return normalize_city(location), lat, lon, geo_cell
+
+def event_values(title, location, event_time, timezone, tag=None, description="", image_url=None):
+    """Parameters for INSERT_EVENT_SQL, shared by single posts and bulk imports."""
+    # Geocode once at post time so proximity queries never have to
+    return (title, location, event_time, timezone, tag, description, image_url, datetime.utcnow().isoformat(),
+            *locate(location))
+
+def add_user_event(title, location, event_time, timezone, tag=None, description="", image_url=None):
+    with transaction(DB_PATH) as conn:
+        conn.execute(INSERT_EVENT_SQL, event_values(title, location, event_time, timezone, tag, description, image_url))
+
+def replace_image_url(old_url, new_url):
+    """Point every event showing old_url at new_url (an upload's resized copy once it's ready)."""
+    with transaction(DB_PATH) as conn:
+        return conn.execute("UPDATE user_events SET image_url = ? WHERE image_url = ?", (new_url, old_url)).rowcount
 
 def format_event_time(event_time_str):
     """Convert '2025-07-23T09:57' to 'July 23, 2025 at 9:57 AM'"""
@@ -51,22 +151,73 @@ def format_created_at(created_at_str):
     except:
         return created_at_str
 
+def row_to_event(row):
+    """Adapt a user_events row (EVENT_COLUMNS first) to an Event."""
+    return Event(
+        source="user",
+        external_id=str(row[0]),
+        title=row[1],
+        location=row[2],
+        time=format_event_time(row[3]),
+        timezone=row[4],
+        tag=row[5],
+        description=row[6] or '',
+        image=row[8],
+        created_at=format_created_at(row[7]),
+        type="social",
+    )
+
+def query_user_events(city=None, start=None, end=None, tag=None, limit=None, offset=0, near=None, radius_miles=50):
+    """Fetch user events filtered in SQL, ordered by event time.
+
+    city is matched after normalize_city, start/end bound event_time (ISO date or datetime
+    strings, end exclusive) and tag matches exactly. near=(lat, lon) keeps events within
+    radius_miles, found through the geo_cell index rather than by scanning; when city is
+    given too, events that couldn't be geocoded still match on city.
+    """
+    clauses, params = [], []
+    if near:
+        cells = cells_within(near[0], near[1], radius_miles)
+        geo_clause = f"geo_cell IN ({','.join('?' * len(cells))})"
+        params += cells
+        if city:
+            geo_clause = f"({geo_clause} OR (geo_cell IS NULL AND city = ?))"
+            params.append(normalize_city(city))
+        clauses.append(geo_clause)
+    elif city:
+        clauses.append("city = ?")
+        params.append(normalize_city(city))
+    if start:
+        clauses.append("event_time >= ?")
+        params.append(start)
+    if end:
+        clauses.append("event_time < ?")
+        params.append(end)
+    if tag:
+        clauses.append("tag = ?")
+        params.append(tag)
+    sql = f"SELECT {EVENT_COLUMNS}, lat, lon FROM user_events"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY event_time ASC"
+    if not near:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit if limit is not None else -1, offset]
+    cursor = get_connection(DB_PATH).execute(sql, params)
+    rows = cursor
+    if near:
+        # Grid cells cover a square; trim the corners with the exact distance, reading rows off the
+        # cursor only until limit of them are in
+        rows = (r for r in rows if r[9] is None or haversine(near[0], near[1], r[9], r[10]) <= radius_miles)
+        rows = islice(rows, offset, offset + limit if limit is not None else None)
+    events = [row_to_event(row) for row in rows]
+    cursor.close()  # don't leave a half-read statement open on the pooled connection
+    return events
+
+def upcoming_start(now=None):
+    """The earliest event_time that may still be upcoming somewhere, as a query_user_events start bound."""
+    now = now or datetime.utcnow()
+    return (now - MAX_ZONE_LAG).strftime(EVENT_TIME_FORMAT)
+
 def get_user_events():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT id, title, location, event_time, timezone, tag, description, created_at FROM user_events ORDER BY event_time ASC')
-    events = c.fetchall()
-    conn.close()
-    return [
-        {
-            "id": row[0],
-            "title": row[1],
-            "location": row[2],
-            "event_time": format_event_time(row[3]),
-            "timezone": row[4],
-            "tag": row[5],
-            "description": row[6],
-            "created_at": format_created_at(row[7])
-        }
-        for row in events
-    ]
+    return query_user_events()
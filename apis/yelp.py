@@ -1,26 +1,52 @@
 import json 
 import os 
-import requests 
+import time
+import logging
+from datetime import datetime
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
+from apis.cache import Cache
+from apis import http_client, throttle
+from apis.event import Event
 #from dateutil import parser
 
+log = logging.getLogger(__name__)
+
 load_dotenv()
 
 
-key_value = os.environ['YELP_KEY']
+# Optional so the app starts without it; Yelp searches then fail (401) and the aggregator skips them
+key_value = os.environ.get('YELP_KEY', '')
 url = "https://api.yelp.com/v3/businesses/search"
 headers = {"Authorization": f"Bearer {key_value}", "accept": "application/json"}
 
-def format_date(iso_str):
-    
-    try: 
+YELP_CACHE_TTL = 3600  # 1 hour
+YELP_STALE_TTL = 24 * 3600  # how long past YELP_CACHE_TTL a result may still be served while Yelp is rate limited or down
+# v2: entries are {'fetched_at': epoch seconds, 'events': [Event.to_dict(), ...]}
+search_cache = Cache('yelp_search:v2', ttl=YELP_CACHE_TTL + YELP_STALE_TTL, max_entries=5000)
 
-        months = []
-    except:
+def format_date(iso_str):
+    """Convert '2025-07-23T12:00:00Z' to 'July 23, 2025 at 12:00 PM'"""
+    try:
+        return datetime.fromisoformat(iso_str).strftime("%B %d, %Y at %I:%M %p")
+    except (TypeError, ValueError):
         return "Invalid Date"
 
 
+def from_yelp(business):
+    """Adapt one Yelp business to an Event."""
+    return Event(
+        source="yelp",
+        external_id=business["id"],
+        title=business["name"],
+        location=", ".join(business["location"]["display_address"]),
+        rating=business.get("rating"),
+        tags=[cat["title"] for cat in business.get("categories", [])],
+        url=business["url"],
+        price="Less than $10",
+        type="food",
+    )
+
 def search_yelp_businesses(location, terms, yelp_api_key, limit, radius):
     # Map user dietary terms to Yelp categories
     dietary_map = {
@@ -59,7 +85,23 @@ def search_yelp_businesses(location, terms, yelp_api_key, limit, radius):
     # Remove None values
     params = {k: v for k, v in params.items() if v}
 
-    response = requests.get(url, headers=headers, params=params)
+    cache_key = json.dumps(params, sort_keys=True)
+    cached = search_cache.get(cache_key)
+    if cached is not None and time.time() - cached['fetched_at'] < YELP_CACHE_TTL:
+        return [Event.from_dict(e) for e in cached['events']]
+
+    try:
+        found = throttle.call('yelp', cache_key, fetch_yelp_businesses, params, cache_key)
+    except throttle.UNAVAILABLE as e:
+        if cached is None:
+            raise
+        log.info("%s; serving stale Yelp results for %s", e, cache_key)
+        found = cached['events']
+    return [Event.from_dict(e) for e in found]
+
+def fetch_yelp_businesses(params, cache_key):
+    """Search Yelp and cache the '$' businesses; returns them as Event dicts."""
+    response = http_client.get(url, headers=headers, params=params)
     response.raise_for_status()
 
     yelp_businesses = []
@@ -67,18 +109,9 @@ def search_yelp_businesses(location, terms, yelp_api_key, limit, radius):
         price = business.get("price", "?")
         # Only include businesses with price = '$' (under $10)
         if price == "$":
-            yelp_businesses.append(
-                {
-                    "source": "yelp",
-                    "external_id": business["id"],
-                    "global_id": f"yelp_{business['id']}",
-                    "title": business["name"],
-                    "location": ", ".join(business["location"]["display_address"]),
-                    "rating": business.get("rating"),
-                    "tags": [cat["title"] for cat in business.get("categories", [])],
-                    "url": business["url"],
-                    "price": "Less than $10"
-                }
-            )
-
-    return yelp_businesses
\ No newline at end of file
+            yelp_businesses.append(from_yelp(business))
+
+    found = [e.to_dict() for e in yelp_businesses]
+    search_cache.set(cache_key, {'fetched_at': time.time(), 'events': found})
+    return found
+
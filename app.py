@@ -10,12 +10,8 @@ from werkzeug.utils import secure_filename
 from db import init_auth_db, register_user, login_user, save_event, get_saved_events, delete_saved_event
 from forms import RegistrationForm, LoginForm
 from apis.event_handler import search_all_events
-from apis.user_events import init_user_events_db, add_user_event, get_user_events
+from apis.user_events import init_user_events_db, add_user_event, get_user_events, query_user_events
 from apis.google_events import get_google_events
-import google.generativeai as genai
-
-UPLOAD_FOLDER = os.path.join('static', 'uploads')
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # Tag to default image mapping
 TAG_IMAGES = {
@@ -29,17 +25,27 @@ TAG_IMAGES = {
     'festival': 'https://images.unsplash.com/photo-1506744038136-46273834b3fb?w=1200&h=800&fit=crop&q=90',
     'other': 'https://images.unsplash.com/photo-1517245386807-bb43f82c33c4?w=1200&h=800&fit=crop&q=90'
 }
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
+from flask import Flask, Request, render_template, request, jsonify, redirect, url_for, session, Response
+from werkzeug.exceptions import RequestEntityTooLarge
 from db import init_auth_db, register_user, login_user, save_event, get_saved_events, delete_saved_event
 from forms import RegistrationForm, LoginForm
-from apis.event_handler import search_all_events
-from apis.user_events import init_user_events_db, add_user_event, get_user_events
+from apis.event_handler import search_events
+from apis.user_events import init_user_events_db, add_user_event, get_user_events, query_user_events, replace_image_url, upcoming_start
 from apis.google_events import get_google_events
-import google.generativeai as genai
+from apis.uploads import UPLOAD_DIR, MAX_UPLOAD_BYTES, UploadRejected, store_image, upload_url, ready_card_url, process_image
+from apis.prefetch import feed_google_events, Prefetcher
+from apis.aggregator import submit, gather, PROVIDER_DEADLINE
+from apis.tagging import tag_events
+from feed import create_feed, get_feed, MAX_USER_EVENTS, NEARBY_RADIUS_MILES
+from apis.geo import geocode
+from apis.event import Event
+from apis.event_import import import_events, detect_format, FORMATS, MAX_IMPORT_BYTES
+from apis.metrics import instrument, render_metrics
+from apis import http_cache, breaker
+from functools import wraps
+import hmac
+import logging
+import io
 import sqlite3
 import re
 
@@ -51,47 +57,44 @@ import os
 
 
 load_dotenv()  
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+log = logging.getLogger(__name__)
+
+class AppRequest(Request):
+    @property
+    def max_content_length(self):
+        # bulk imports are admin-only and legitimately far bigger than an event post
+        if self.endpoint == 'admin_import_events':
+            return MAX_IMPORT_BYTES
+        return super().max_content_length
+
 app = Flask(__name__)
+app.request_class = AppRequest
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'Wnv1I6Tsd7')
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel("gemini-2.5-flash")
-else:
-    gemini_model = None
-
-# Jinja2 filter for upscaling Google image URLs
-@app.template_filter('upscale_google_img')
-def upscale_google_img(url):
-    if not url:
-        return url
-    # Look for Google image URL patterns with =wXXX-hXXX or =sXXX at the end
-    # Replace with =w1200-h900 for higher res
-    upscale = re.sub(r'=w\d+-h\d+(-[a-z])?', '=w1200-h900', url)
-    upscale = re.sub(r'=s\d+(-[a-z])?', '=w1200-h900', upscale)
-    return upscale
-
-def gemini_tag(title, description):
-    if not gemini_model:
-        # fallback
-        return 'other'
-    prompt = f"""Given the following event title and description, return a single tag (one word, lowercase) that best categorizes the event. Example tags: food, music, sports, comedy, networking, art, education, festival, other. If unsure, return 'other'.\n\nTitle: {title}\nDescription: {description}\nTag:"""
-    try:
-        response = gemini_model.generate_content(prompt)
-        tag = response.text.strip().split()[0].lower()
-        # Only allow known tags
-        allowed_tags = {'food','music','sports','comedy','networking','art','education','festival','other'}
-        return tag if tag in allowed_tags else 'other'
-    except Exception as e:
-        print(f"Gemini tag error: {e}")
-        return 'other'
-
+app.config['UPLOAD_FOLDER'] = UPLOAD_DIR
+# Bodies bigger than this are refused with a 413 before any of it is read or spooled to disk;
+# the slack covers the form fields around the image. store_image still holds the image itself
+# to MAX_UPLOAD_BYTES.
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + 64 * 1024
+# How long a complete location search may be reused by browsers and shared caches; the
+# providers' own caches (apis/yelp.py, apis/reddit_api.py) hold results at least this long
+SEARCH_MAX_AGE = int(os.getenv('SEARCH_MAX_AGE', '300'))
+# Admin endpoints are off unless a token is configured; callers send it as X-Admin-Token
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
 
 init_auth_db()
 init_user_events_db()
+# Route timings for /metrics; PROFILE_DIR enables per-request cProfile dumps
+instrument(app)
+# ETags, 304s for unchanged responses and gzip/brotli
+http_cache.install(app)
+
+# Keep the popular locations' feeds warm from this process; off by default because every
+# worker process would run its own (prefetch_worker.py runs one for the whole deployment)
+if os.getenv('PREFETCH_IN_PROCESS', '').lower() in ('1', 'true', 'yes'):
+    Prefetcher(db.get_popular_locations).start()
+
 # ---------- AUTHENTICATION ----------
 
 # ---------- USER FREE EVENTS ----------
@@ -105,24 +108,34 @@ def post_event():
         timezone = request.form.get("timezone", "").strip()
         tag = request.form.get("tag", "other").strip().lower()
         description = request.form.get("description", "").strip()
-        image_url = None
-        # Handle file upload
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                image_url = f"/static/uploads/{filename}"
         if not (title and location and event_time and timezone and tag):
             return render_template("post_event.html", error="All fields are required.")
-        # Save event with image_url in description (or extend DB if needed)
-        try:
-            add_user_event(title, location, event_time, timezone, tag, description + (f"\n[IMAGE]{image_url}" if image_url else ""))
-        except TypeError:
-            add_user_event(title, location, event_time, timezone)
+        # Stored under its content hash; the event shows the original until the background
+        # resize swaps in the smaller copy
+        image = request.files.get('image')
+        image_url, resize = None, None
+        if image and image.filename:
+            try:
+                image_name = store_image(image.stream)
+            except UploadRejected as e:
+                return render_template("post_event.html", error=str(e))
+            image_url = ready_card_url(image_name)
+            if not image_url:
+                image_url, resize = upload_url(image_name), image_name
+        add_user_event(title, location, event_time, timezone, tag, description, image_url=image_url)
+        if resize:
+            process_image(resize, replace_image_url)
         return redirect(url_for("user_events"))
     return render_template("post_event.html")
 
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    if request.endpoint == 'post_event':
+        return render_template("post_event.html",
+                               error=f"Images must be under {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."), 413
+    limit = request.max_content_length
+    return jsonify({'status': 'fail', 'message': f"Request bodies must be under {limit // (1024 * 1024)} MB."}), 413
+
 @app.route("/user_events")
 def user_events():
     events = get_user_events()
@@ -138,9 +151,8 @@ def signup():
     # error handling, easier to test w 
     try:
         form = RegistrationForm()
-        print("Form created successfully")
     except Exception as e:
-        print(f"Error creating form: {e}")
+        log.exception("Error creating signup form")
         return f"Form creation error: {e}"
 
     error_message = None  # Ensure this is always defined
@@ -158,7 +170,7 @@ def signup():
             session['user_id'] = result.get('user_id')
             return redirect(url_for('onboarding_location'))
         else:
-            print(f"REGISTRATION FAILED WITH STATUS {result['status']}")
+            log.info("Registration failed: %s", result['message'])
             error_message = result['message']  # Capture the error message
 
     return render_template("signup.html", form=form, error_message=error_message)
@@ -211,8 +223,12 @@ def home():
             # Use the real user id returned from login_user
             session['user_id'] = result.get('user_id')
             return redirect(url_for('for_you'))
+        elif result["status"] == "busy":
+            log.warning("Login rejected, password hashing is saturated")
+            form.password.errors.append(result["message"])
+            return render_template("login.html", form=form), 503
         else:
-            print(f"LOGIN FAILED WITH STATUS {result['status']}")
+            log.info("Login failed with status %s", result['status'])
             # No redirect, stay on the login page to show error
 
     return render_template("login.html", form=form)
@@ -221,8 +237,7 @@ def home():
 
 @app.route("/search")
 def search():
-    if 'user_id' not in session:
-        session['user_id'] = MOCK_USER_ID # TEMPORARY
+    # open to visitors; saving from the results still asks them to log in
     return render_template("search.html")
 
 #@app.route("/for_you")
@@ -243,12 +258,12 @@ def api_save_event():
     if 'user_id' not in session:
         return jsonify({"status": "fail", "message": "User not logged in."}), 401
     user_id = session.get('user_id')
-    event_data = request.json
+    event_data = request.get_json(silent=True)
 
     if not event_data:
         return jsonify({"status": "fail", "message": "No event data provided."}), 400
 
-    result = save_event(user_id, event_data)
+    result = save_event(user_id, Event.from_dict(event_data))
     if result['status'] == 'success':
         return jsonify({"status": "success", "message": result.get('message', "Event saved successfully!")}), 200
     else:
@@ -261,7 +276,7 @@ def api_delete_saved_event():
         return jsonify({"status": "fail", "message": "User not logged in."}), 401
 
     user_id = session.get('user_id')
-    event_global_id = request.json.get('global_id')
+    event_global_id = (request.get_json(silent=True) or {}).get('global_id')
 
     if not event_global_id:
         return jsonify({"status": "fail", "message": "No event global_id provided for deletion."}), 400
@@ -272,13 +287,26 @@ def api_delete_saved_event():
     else:
         return jsonify({"status": "fail", "message": result.get('message', "Failed to remove event.")}), 400
 
+def page_args():
+    """(after, limit) from ?after=<cursor>&limit=<n>; raises ValueError for malformed values."""
+    after = request.args.get('after') or None
+    if after is not None and not after.isdigit():
+        raise ValueError(f"bad cursor {after!r}")
+    limit = int(request.args.get('limit', db.PAGE_SIZE))
+    return after, min(max(limit, 1), db.MAX_PAGE_SIZE)
+
 @app.route('/api/saved_events', methods=['GET'])
 def api_saved_events():
     user_id = session.get('user_id')
     if not user_id:
         return jsonify({'message': 'User not logged in'}), 401
-    saved_events = db.get_saved_events(user_id) 
-    return jsonify({'events': saved_events})
+    try:
+        after, limit = page_args()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    saved_events, next_cursor = db.get_saved_events_page(user_id, after=after, limit=limit)
+    # pass next back as ?after= for the following page; null on the last one
+    return jsonify({'events': [event.to_dict() for event in saved_events], 'next': next_cursor})
 
 # ---------- FETCH API DATA ----------
 
@@ -290,19 +318,53 @@ def api_events():
         return jsonify({"error": "location is required"}), 400
 
     try:
-        raw_events = search_all_events(location, term)
+        raw_events, status = search_events(location, term)
         
-        data_to_send = {"events": raw_events} 
+        data_to_send = {"events": [event.to_dict() for event in raw_events]} 
         
-        print("Data from search_all_events (wrapped):", data_to_send) 
-        return jsonify(data_to_send) 
+        log.debug("api_events: %d events for %r", len(data_to_send["events"]), location)
+        response = jsonify(data_to_send)
+        # The same for everyone searching this location, so browsers and proxies may reuse it;
+        # results missing a provider aren't, so the next search tries that provider again
+        if all(outcome == 'ok' for outcome in status.values()):
+            http_cache.cache_publicly(response, SEARCH_MAX_AGE, stale_while_revalidate=SEARCH_MAX_AGE)
+        return response
     except Exception as e:
-        print(f"Error in api_events: {e}")
+        log.exception("Error in api_events")
         return jsonify({"error" : str(e)}), 502
-    
+
 #------------- USERS PREFERENCES AND LOCATION ----------
 
 
+def collect_feed_events(location):
+    """Gather user events near location plus tagged Google events for the For You feed."""
+    # Start the SerpAPI lookup now so it overlaps with the user event work below; stale results
+    # are served while they refresh in the background, so only a never-seen location waits
+    google_future = submit(feed_google_events, location)
+
+    # fetch only the upcoming user events near the user (filtered and capped in SQL, via the geo
+    # index when their location is in the gazetteer, otherwise by city name); without the start
+    # bound the cap would keep the oldest, long past events
+    user_events = query_user_events(city=location, start=upcoming_start(), near=geocode(location),
+                                    radius_miles=NEARBY_RADIUS_MILES, limit=MAX_USER_EVENTS)
+
+    # Collect and tag api events (empty if SerpAPI misses its deadline or fails)
+    results, _ = gather({'google': google_future}, deadline=PROVIDER_DEADLINE)
+    google_events = results.get('google', [])
+
+    # One batched, cached classification for the whole list instead of a model call per event
+    for event, tag in zip(google_events, tag_events(google_events)):
+        event.tag = tag
+
+    # Events are already in canonical form (apis/event.py); only events without a picture
+    # of their own still need the default image for their tag
+    for event in user_events + google_events:
+        if not event.image:
+            event.image = TAG_IMAGES.get(event.tag, TAG_IMAGES['other'])
+
+    # Combine all events (only user events in user's city)
+    return user_events + google_events
+
 @app.route("/for_you")
 def for_you():
     if 'user_id' not in session:
@@ -314,195 +376,18 @@ def for_you():
 
     location = prefs["location"]
     user_prefs = prefs["preferences"]
+    batch_num = int(request.args.get('batch', 1))
+    cursor = request.args.get('cursor')
 
-    # fetch user events and use stored tag/description, filter by user city
-    user_events = get_user_events()
-    # City to (lat, lon) lookup for major US cities
-    city_coords = {
-        'new york': (40.7128, -74.0060),
-        'los angeles': (34.0522, -118.2437),
-        'chicago': (41.8781, -87.6298),
-        'houston': (29.7604, -95.3698),
-        'phoenix': (33.4484, -112.0740),
-        'philadelphia': (39.9526, -75.1652),
-        'san antonio': (29.4241, -98.4936),
-        'san diego': (32.7157, -117.1611),
-        'dallas': (32.7767, -96.7970),
-        'san jose': (37.3382, -121.8863)
-    }
-
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 3958.8  # Earth radius in miles
-        phi1, phi2 = math.radians(lat1), math.radians(lat2)
-        dphi = math.radians(lat2 - lat1)
-        dlambda = math.radians(lon2 - lon1)
-        a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
-
-    user_city = None
-    user_latlon = None
-    if location:
-        user_city = location.split(',')[0].strip().lower()
-        user_latlon = city_coords.get(user_city)
-
-    filtered_user_events = []
-    for ue in user_events:
-        event_city = ue.get('location', '').split(',')[-1].strip().lower() if ',' in ue.get('location', '') else ue.get('location', '').strip().lower()
-        event_latlon = city_coords.get(event_city)
-        # If both user and event have coordinates, filter by distance (<= 50 miles)
-        if user_latlon and event_latlon:
-            dist = haversine(user_latlon[0], user_latlon[1], event_latlon[0], event_latlon[1])
-            if dist > 50:
-                continue
-        elif user_city and user_city not in event_city:
-            continue
-        ue['tag'] = ue.get('tag', 'other')
-        ue['source'] = 'user'
-        ue['title'] = ue.get('title', '')
-        ue['date'] = ue.get('event_time', '')
-        ue['description'] = ue.get('description', '')
-        ue['address'] = ue.get('location', '')
-        ue['link'] = ''
-        # Try to extract uploaded image from description
-        img_url = None
-        if ue['description'] and '[IMAGE]' in ue['description']:
-            parts = ue['description'].split('[IMAGE]')
-            ue['description'] = parts[0].strip()
-            img_url = parts[1].strip()
-        ue['image'] = img_url or TAG_IMAGES.get(ue['tag'], TAG_IMAGES['other'])
-        filtered_user_events.append(ue)
-
-    # Fetch and tag api events
-    try:
-        google_events = get_google_events(location)
-    except Exception as e:
-        print(f"Error fetching Google events: {e}")
-        google_events = []
-
-    for ge in google_events:
-        title = ge.get('title', '')
-        desc = ge.get('description', '')
-        tag = gemini_tag(title, desc)
-        ge['tag'] = tag
-        ge['source'] = 'google'
-
-        date_val = ge.get('date', '')
-        ge['date'] = date_val.get('when') if isinstance(date_val, dict) else str(date_val)
-        ge['address'] = ', '.join(ge.get('address', [])) if isinstance(ge.get('address', ''), list) else ge.get('address', '')
-        ge['description'] = desc
-        ge['link'] = ge.get('link', ge.get('event_url', ''))
-        
-        # Try to get the best quality image available with multiple fallbacks
-        image = None
-        
-        # Try multiple image fields in order of preference
-        for img_field in ['image', 'photo', 'picture', 'thumbnail', 'banner']:
-            if ge.get(img_field):
-                image = ge.get(img_field)
-                break
-        
-        if image:
-            # Try to get higher resolution version if it's a Google image
-            if 'googleusercontent.com' in str(image):
-                # Try multiple resolution attempts
-                original_image = str(image)
-                # First attempt: very high resolution
-                image = original_image.replace('=w120-h120-p', '=w2000-h1200-p')
-                image = image.replace('=s120', '=s2000')
-                image = image.replace('=w120', '=w2000')
-                image = image.replace('=h120', '=h1200')
-                image = image.replace('=w120-h120', '=w2000-h1200')
-                image = image.replace('=s120-c', '=s2000-c')
-                # Remove any remaining size restrictions
-                image = image.replace('=w120', '=w2000')
-                image = image.replace('=h120', '=h1200')
-                image = image.replace('=s120', '=s2000')
-            elif 'lh3.googleusercontent.com' in str(image):
-                # For Google Photos, try to get original size
-                image = str(image).replace('=s120', '=s0')
-                image = str(image).replace('=w120', '=w0')
-                image = str(image).replace('=h120', '=h0')
-            elif 'maps.googleapis.com' in str(image):
-                # For Google Maps images, try to get higher resolution
-                image = str(image).replace('size=120x120', 'size=1200x800')
-                image = str(image).replace('zoom=15', 'zoom=18')
-            ge['image'] = image
-        else:
-            ge['image'] = TAG_IMAGES.get(tag, TAG_IMAGES['other'])
+    # Later batches are sliced from the feed built on the first page load; only a fresh
+    # visit (or an expired cursor) re-fetches and re-orders the events
+    feed = get_feed(cursor, session['user_id']) if batch_num > 1 else None
+    if feed is None:
+        feed = create_feed(session['user_id'], collect_feed_events(location), user_prefs, token=cursor if batch_num > 1 else None)
 
-    # Combine all events (only user events in user's city)
-    all_events = filtered_user_events + google_events
+    batch_to_show, more_batches = feed.batch(batch_num)
 
-    # --- BATCHING LOGIC: 5 events per batch, 70% from liked tags (weighted), 30% from unliked tags ---
-    import random
-    BATCH_SIZE = 5
-    LIKE_RATIO = 0.7
-    batch_num = int(request.args.get('batch', 1))
-    user_liked_tags = {tag: count for tag, count in user_prefs.items() if count > 0}
-    unliked_tags = set([e.get('tag', 'other') for e in all_events]) - set(user_liked_tags.keys())
-
-    # Partition events by tag
-    tag_to_events = {}
-    for event in all_events:
-        tag = event.get('tag', 'other')
-        tag_to_events.setdefault(tag, []).append(event)
-
-    # Calculate how many liked/unliked events per batch
-    num_liked = round(BATCH_SIZE * LIKE_RATIO)
-    num_unliked = BATCH_SIZE - num_liked
-
-    # Weighted selection for liked tags
-    liked_tag_total = sum(user_liked_tags.values())
-    liked_tag_weights = {tag: (count / liked_tag_total) if liked_tag_total > 0 else 0 for tag, count in user_liked_tags.items()}
-
-    # Flatten all events in a deterministic order for batching
-    all_batch_events = []
-    used_indices = set()
-    total_batches = 0
-    while True:
-        liked_events = []
-        liked_tags = list(user_liked_tags.keys())
-        for _ in range(num_liked):
-            if not liked_tags:
-                break
-            tag = random.choices(liked_tags, weights=[liked_tag_weights[t] for t in liked_tags], k=1)[0]
-            if tag_to_events.get(tag):
-                liked_events.append(tag_to_events[tag].pop(0))
-            else:
-                liked_tags.remove(tag)
-        unliked_events = []
-        unliked_tags_list = list(unliked_tags)
-        random.shuffle(unliked_tags_list)
-        for tag in unliked_tags_list:
-            if tag_to_events.get(tag):
-                unliked_events.append(tag_to_events[tag].pop(0))
-            if len(unliked_events) >= num_unliked:
-                break
-        batch_events = liked_events + unliked_events
-        if len(batch_events) < BATCH_SIZE:
-            remaining = []
-            for evs in tag_to_events.values():
-                remaining.extend(evs)
-            random.shuffle(remaining)
-            batch_events += remaining[:BATCH_SIZE - len(batch_events)]
-        if not batch_events:
-            break
-        random.shuffle(batch_events)
-        all_batch_events.extend(batch_events)
-        total_batches += 1
-        if sum(len(evs) for evs in tag_to_events.values()) == 0:
-            break
-
-    # Serve the correct batch
-    start_idx = (batch_num - 1) * BATCH_SIZE
-    end_idx = start_idx + BATCH_SIZE
-    batch_to_show = all_batch_events[start_idx:end_idx]
-
-    # For frontend: let it know if more batches exist
-    more_batches = end_idx < len(all_batch_events)
-
-    return render_template("for_you.html", events=batch_to_show, preferences=prefs, batch=batch_num, more_batches=more_batches)
+    return render_template("for_you.html", events=batch_to_show, preferences=prefs, batch=batch_num, more_batches=more_batches, cursor=feed.token)
 
 @app.route('/api/like_event', methods=['POST'])
 def api_like_event():
@@ -510,12 +395,12 @@ def api_like_event():
         return jsonify({"status": "fail", "message": "User not logged in."}), 401
 
     user_id = session['user_id']
-    event_data = request.json
+    event_data = request.get_json(silent=True) or {}
 
     if not event_data.get('global_id'):
         return jsonify({"status": "fail", "message": "Event data is required."}), 400
 
-    result = db.like_event(user_id, event_data)
+    result = db.like_event(user_id, Event.from_dict(event_data))
     return jsonify(result)
 
 @app.route('/api/liked_events', methods=['GET'])
@@ -524,8 +409,13 @@ def api_liked_events():
         return jsonify({'status': 'fail', 'message': 'User not logged in.'}), 401
 
     user_id = session['user_id']
-    liked_events = db.get_liked_events(user_id)
-    return jsonify({'status': 'success', 'events': liked_events}), 200
+    try:
+        after, limit = page_args()
+    except ValueError as e:
+        return jsonify({'status': 'fail', 'message': str(e)}), 400
+    liked_events, next_cursor = db.get_liked_events_page(user_id, after=after, limit=limit)
+    return jsonify({'status': 'success', 'events': [event.to_dict() for event in liked_events],
+                    'next': next_cursor}), 200
 
 @app.route('/api/posted_events', methods=['GET'])
 def api_posted_events():
@@ -553,19 +443,61 @@ def account():
         else:
             username = 'User'
             email = 'user@example.com'
-
-        liked_events = db.get_liked_events(user_id)
-        print(f"[DEBUG] Liked events returned: {liked_events}")
     except Exception as e:
-        print(f"Error in account route: {e}")
+        log.exception("Error in account route")
         username = 'User'
         email = 'user@example.com'
-        liked_events = []
 
+    # Liked events are fetched page by page from /api/liked_events once the page is up
     return render_template('account.html', 
                          username=username,
-                         email=email,
-                         liked_events=liked_events)
+                         email=email)
+# ---------- ADMIN ----------
+
+def admin_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('X-Admin-Token', '')
+        if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+            return jsonify({'status': 'fail', 'message': 'Admin token required.'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/admin/import_events', methods=['POST'])
+@admin_required
+def admin_import_events():
+    """Bulk-load an uploaded CSV/JSON-lines file of events; re-posting an unfinished import under its name resumes it."""
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'status': 'fail', 'message': 'A CSV or JSON-lines file is required.'}), 400
+    try:
+        fmt = request.form.get('format') or detect_format(upload.filename)
+    except ValueError as e:
+        return jsonify({'status': 'fail', 'message': str(e)}), 400
+    if fmt not in FORMATS.values():
+        return jsonify({'status': 'fail', 'message': f"Unknown format {fmt!r}."}), 400
+
+    name = request.form.get('name') or f"upload:{secure_filename(upload.filename)}"
+    restart = request.form.get('restart', '').lower() in ('1', 'true', 'yes')
+    try:
+        report = import_events(io.TextIOWrapper(upload.stream, encoding='utf-8', newline=''), fmt,
+                               name=name, resume=not restart)
+    except ValueError as e:
+        return jsonify({'status': 'fail', 'message': str(e)}), 409
+    return jsonify({'status': 'success', **report}), 200
+
+@app.route('/admin/breakers', methods=['GET'])
+@admin_required
+def admin_breakers():
+    """Each upstream provider's circuit breaker: state, recent failure rate and latency."""
+    return jsonify({'status': 'success', 'breakers': breaker.snapshot()}), 200
+
+# ---------- METRICS ----------
+
+@app.route('/metrics')
+def metrics():
+    """Request, upstream and SQL latency histograms in the Prometheus text format."""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,99 @@
+"""Micro-benchmark: pooled connections (apis.db_pool) vs. a fresh sqlite3.connect per call.
+
+Run from the repo root:
+    python -m benchmarks.bench_db_pool [--ops 5000]
+"""
+import os
+import time
+import sqlite3
+import argparse
+import tempfile
+
+import db
+from apis.event import Event
+from apis.db_pool import close_connections
+
+
+# --- connect-per-call baseline, the way db.py worked before the pool ---
+
+def baseline_save_event(user_id, event_data):
+    conn = sqlite3.connect(db.DB_PATH)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO events (global_id, source, title, time, location, url, type)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(global_id) DO UPDATE SET title = excluded.title
+            RETURNING id
+        """, (event_data['global_id'], event_data['source'], event_data['title'], event_data['date'],
+              event_data['location'], event_data['url'], event_data['type']))
+        event_id = cursor.fetchone()[0]
+        cursor.execute("INSERT INTO saved_events (user_id, event_id) VALUES (?, ?)", (user_id, event_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def baseline_get_saved_events(user_id, limit=None):
+    # the same query and Event construction as db.get_saved_events(_page); only the connection differs
+    conn = sqlite3.connect(db.DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT se.id, e.global_id, e.source, e.title, e.time, e.location, e.url, e.type
+        FROM saved_events se
+        JOIN events e ON e.id = se.event_id
+        WHERE se.user_id = ?
+        ORDER BY se.id DESC
+    """ + (" LIMIT ?" if limit else ""), (user_id, limit + 1) if limit else (user_id,))
+    rows = cursor.fetchall()
+    conn.close()
+    return [db.catalog_row_to_event(row[1:]) for row in rows[:limit]]
+
+
+def baseline_get_user_info(user_id):
+    conn = sqlite3.connect(db.DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, email FROM users WHERE id = ?", (user_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return row
+
+
+def event(i, prefix):
+    return {'global_id': f'{prefix}_{i}', 'source': 'bench', 'title': f'Event {i}', 'date': '2025-08-01',
+            'location': 'New York', 'url': 'https://example.com', 'type': 'social'}
+
+
+def ops_per_sec(fn, ops):
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return ops / (time.perf_counter() - start)
+
+
+def run(ops):
+    workdir = tempfile.mkdtemp()
+    db.DB_PATH = os.path.join(workdir, 'bench_user_info.db')
+    db.init_auth_db()
+    db.register_user('bench', 'bench@example.com', 'benchpass', '5555555555')
+
+    cases = [
+        ('save_event', lambda i: baseline_save_event(1, event(i, 'base')), lambda i: db.save_event(1, Event.from_dict(event(i, 'pool')))),
+        ('get_saved_events', lambda i: baseline_get_saved_events(1), lambda i: db.get_saved_events(1)),
+        ('saved_events_page', lambda i: baseline_get_saved_events(1, db.PAGE_SIZE), lambda i: db.get_saved_events_page(1)),
+        ('get_user_info', lambda i: baseline_get_user_info(1), lambda i: db.get_user_info(1)),
+    ]
+    print(f"{'operation':<20}{'connect/call':>15}{'pooled':>12}{'speedup':>10}")
+    for name, baseline, pooled in cases:
+        # get_saved_events reads every row save_event left behind, so keep it short
+        n = max(ops // 10, 100) if name == 'get_saved_events' else ops
+        base_rate = ops_per_sec(baseline, n)
+        pooled_rate = ops_per_sec(pooled, n)
+        print(f"{name:<20}{base_rate:>13.0f}/s{pooled_rate:>10.0f}/s{pooled_rate / base_rate:>9.1f}x")
+    close_connections()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ops', type=int, default=5000, help='operations per write case')
+    run(parser.parse_args().ops)
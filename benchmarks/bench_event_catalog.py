@@ -0,0 +1,205 @@
+"""Benchmark: saved/liked events stored as per-user copies (the old layout) vs. the shared events catalog.
+
+Run from the repo root:
+    python -m benchmarks.bench_event_catalog [--scale 200000] [--queries 2000] [--out results.json]
+
+Builds the old layout from benchmarks.synthetic's saved and liked pairs, measures its size and
+the listing and save queries, migrates the same file in place with db.ensure_event_catalog and
+measures again. Sizes are after VACUUM; latencies are per query on a warm pooled connection.
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+
+LEGACY_SCHEMA = """
+    CREATE TABLE saved_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        event_global_id TEXT NOT NULL,
+        event_source TEXT NOT NULL,
+        event_title TEXT NOT NULL,
+        event_date TEXT,
+        event_location TEXT,
+        event_url TEXT,
+        type TEXT NOT NULL,
+        saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(user_id, event_global_id)
+    );
+    CREATE TABLE liked_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        event_global_id TEXT NOT NULL,
+        liked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(user_id, event_global_id)
+    );
+    CREATE INDEX idx_saved_events_user ON saved_events (user_id, id);
+    CREATE INDEX idx_liked_events_user ON liked_events (user_id, id, event_global_id);
+"""
+PAGE = 21  # a PAGE_SIZE page plus the row that says there's another
+
+QUERIES = {
+    'legacy': {
+        'saved_page': f"""
+            SELECT id, event_global_id, event_source, event_title, event_date, event_location, event_url, type
+            FROM saved_events WHERE user_id = ? ORDER BY id DESC LIMIT {PAGE}""",
+        'liked_page': f"""
+            SELECT le.id, se.event_global_id, se.event_source, se.event_title, se.event_date,
+                   se.event_location, se.event_url, se.type
+            FROM liked_events le
+            JOIN saved_events se ON se.user_id = le.user_id AND se.event_global_id = le.event_global_id
+            WHERE le.user_id = ? ORDER BY le.id DESC LIMIT {PAGE}""",
+    },
+    'catalog': {
+        'saved_page': f"""
+            SELECT se.id, e.global_id, e.source, e.title, e.time, e.location, e.url, e.type
+            FROM saved_events se JOIN events e ON e.id = se.event_id
+            WHERE se.user_id = ? ORDER BY se.id DESC LIMIT {PAGE}""",
+        'liked_page': f"""
+            SELECT le.id, e.global_id, e.source, e.title, e.time, e.location, e.url, e.type
+            FROM liked_events le JOIN events e ON e.id = le.event_id
+            WHERE le.user_id = ? ORDER BY le.id DESC LIMIT {PAGE}""",
+    },
+}
+
+
+def build_legacy(path, counts, seed):
+    from apis.db_pool import transaction, get_connection
+    from benchmarks.synthetic import saved_pairs, provider_event, CHUNK
+
+    pairs, liked = saved_pairs(counts, random.Random(seed))
+    get_connection(path).executescript(LEGACY_SCHEMA)
+    rows = []
+    for user_id, k in pairs:
+        event = provider_event(k)
+        rows.append((user_id, event['global_id'], event['source'], event['title'], event['time'],
+                     event['location'], event['url'], event['type']))
+    for i in range(0, len(rows), CHUNK):
+        with transaction(path) as conn:
+            conn.executemany("""
+                INSERT INTO saved_events (user_id, event_global_id, event_source, event_title, event_date,
+                                          event_location, event_url, type)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows[i:i + CHUNK])
+    with transaction(path) as conn:
+        conn.executemany("INSERT INTO liked_events (user_id, event_global_id) VALUES (?, ?)",
+                         [(user_id, f'google_bench{k}') for user_id, k in liked])
+    return set(pairs)
+
+
+def table_sizes(path):
+    """Bytes per table, its indexes included, after a VACUUM; plus the whole file."""
+    from apis.db_pool import get_connection
+    conn = get_connection(path)
+    conn.execute("VACUUM")
+    owner = dict(conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')"))
+    sizes = {}
+    for name, size in conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"):
+        table = owner.get(name, name)
+        if table in ('saved_events', 'liked_events', 'events'):
+            sizes[table] = sizes.get(table, 0) + size
+    sizes['file'] = os.path.getsize(path)
+    return sizes
+
+
+def latencies(fn, args):
+    from benchmarks.bench_routes import percentile
+    times = []
+    for arg in args:
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {'p50_ms': round(percentile(times, 50) * 1000, 4), 'p99_ms': round(percentile(times, 99) * 1000, 4)}
+
+
+def measure(layout, path, users, new_saves):
+    import db
+    from apis.event import Event
+    from apis.db_pool import get_connection, transaction
+    from benchmarks.synthetic import provider_event
+
+    conn = get_connection(path)
+    results = {}
+    for name, sql in QUERIES[layout].items():
+        results[name] = latencies(lambda user_id: conn.execute(sql, (user_id,)).fetchall(), users)
+
+    def save(pair):
+        user_id, k = pair
+        with transaction(path) as conn:
+            if layout == 'legacy':
+                event = provider_event(k)
+                conn.execute("""
+                    INSERT INTO saved_events (user_id, event_global_id, event_source, event_title, event_date,
+                                              event_location, event_url, type)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (user_id, event['global_id'], event['source'], event['title'], event['time'],
+                      event['location'], event['url'], event['type']))
+            else:
+                event_id = db.upsert_event(conn, Event.from_dict(provider_event(k)))
+                conn.execute("INSERT INTO saved_events (user_id, event_id) VALUES (?, ?)", (user_id, event_id))
+
+    results['save_event'] = latencies(save, new_saves)
+    return results
+
+
+def run(scale, queries, seed):
+    import db
+    from apis.db_pool import transaction, close_connections
+    from benchmarks.synthetic import sizes, event_pool_size
+
+    counts = sizes(scale)
+    path = os.path.join(tempfile.mkdtemp(), 'bench_catalog.db')
+    db.DB_PATH = path
+    taken = build_legacy(path, counts, seed)
+
+    rng = random.Random(seed + 1)
+    users = [rng.randint(1, counts['users']) for _ in range(queries)]
+    pool = event_pool_size(counts)
+    fresh = set()
+    while len(fresh) < 2 * queries:
+        pair = (rng.randint(1, counts['users']), rng.randrange(pool))
+        if pair not in taken:
+            fresh.add(pair)
+    fresh = sorted(fresh, key=lambda _: rng.random())
+
+    report = {'scale': scale, 'rows': {'saved_events': len(taken), 'distinct_events': len({k for _, k in taken})}}
+    report['legacy'] = {'bytes': table_sizes(path), **measure('legacy', path, users, fresh[:queries])}
+    started = time.perf_counter()
+    with transaction(path) as conn:
+        db.ensure_event_catalog(conn)
+    report['migration_seconds'] = round(time.perf_counter() - started, 2)
+    report['catalog'] = {'bytes': table_sizes(path), **measure('catalog', path, users, fresh[queries:])}
+    close_connections()
+    return report
+
+
+def print_report(report):
+    rows = report['rows']
+    print(f"{rows['saved_events']} saved rows over {rows['distinct_events']} distinct events; "
+          f"migration took {report['migration_seconds']}s\n")
+    legacy, catalog = report['legacy'], report['catalog']
+    print(f"{'size (MB)':<28}{'copies':>10}{'catalog':>10}")
+    for key in ('saved_events', 'liked_events', 'events', 'file'):
+        before, after = legacy['bytes'].get(key, 0), catalog['bytes'].get(key, 0)
+        print(f"{key:<28}{before / 1e6:>10.2f}{after / 1e6:>10.2f}")
+    print(f"\n{'latency (ms)':<28}{'copies p50/p99':>18}{'catalog p50/p99':>18}")
+    for key in ('saved_page', 'liked_page', 'save_event'):
+        print(f"{key:<28}{legacy[key]['p50_ms']:>9.3f}/{legacy[key]['p99_ms']:<8.3f}"
+              f"{catalog[key]['p50_ms']:>9.3f}/{catalog[key]['p99_ms']:<8.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=200_000, help='saved rows (users = scale / 10)')
+    parser.add_argument('--queries', type=int, default=2000, help='queries per measurement')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='write the results as JSON here')
+    args = parser.parse_args()
+    report = run(args.scale, args.queries, args.seed)
+    print_report(report)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,111 @@
+"""Benchmark: vectorized feed ordering (feed.order_feed) vs. the old per-event batching loop.
+
+Run from the repo root:
+    python -m benchmarks.bench_feed [--sizes 10000 100000 1000000] [--legacy-max 10000]
+"""
+import time
+import random
+import argparse
+
+import numpy as np
+
+from feed import order_feed, BATCH_SIZE, LIKE_RATIO
+from apis.event import Event
+
+TAGS = ['food', 'music', 'sports', 'comedy', 'networking', 'art', 'education', 'festival', 'other']
+PREFS = {'food': 5, 'music': 2, 'art': 1}
+
+
+def legacy_order_feed(all_events, user_prefs):
+    """The batching loop /for_you used before vectorizing, kept for comparison."""
+    user_liked_tags = {tag: count for tag, count in user_prefs.items() if count > 0}
+    unliked_tags = set([e.get('tag', 'other') for e in all_events]) - set(user_liked_tags.keys())
+    tag_to_events = {}
+    for event in all_events:
+        tag_to_events.setdefault(event.get('tag', 'other'), []).append(event)
+    num_liked = round(BATCH_SIZE * LIKE_RATIO)
+    num_unliked = BATCH_SIZE - num_liked
+    liked_tag_total = sum(user_liked_tags.values())
+    liked_tag_weights = {tag: count / liked_tag_total for tag, count in user_liked_tags.items()}
+    all_batch_events = []
+    while True:
+        liked_events = []
+        liked_tags = list(user_liked_tags.keys())
+        for _ in range(num_liked):
+            if not liked_tags:
+                break
+            tag = random.choices(liked_tags, weights=[liked_tag_weights[t] for t in liked_tags], k=1)[0]
+            if tag_to_events.get(tag):
+                liked_events.append(tag_to_events[tag].pop(0))
+            else:
+                liked_tags.remove(tag)
+        unliked_events = []
+        unliked_tags_list = list(unliked_tags)
+        random.shuffle(unliked_tags_list)
+        for tag in unliked_tags_list:
+            if tag_to_events.get(tag):
+                unliked_events.append(tag_to_events[tag].pop(0))
+            if len(unliked_events) >= num_unliked:
+                break
+        batch_events = liked_events + unliked_events
+        if len(batch_events) < BATCH_SIZE:
+            remaining = []
+            for evs in tag_to_events.values():
+                remaining.extend(evs)
+            random.shuffle(remaining)
+            for event in remaining[:BATCH_SIZE - len(batch_events)]:
+                tag_to_events[event.get('tag', 'other')].remove(event)
+                batch_events.append(event)
+        if not batch_events:
+            break
+        random.shuffle(batch_events)
+        all_batch_events.extend(batch_events)
+        if sum(len(evs) for evs in tag_to_events.values()) == 0:
+            break
+    return all_batch_events
+
+
+def make_events(n):
+    rng = random.Random(0)
+    return [Event('user', str(i), f'Event {i}', tag=rng.choice(TAGS)) for i in range(n)]
+
+
+def as_dicts(events):
+    """The legacy loop worked on plain dicts."""
+    return [{'title': e.title, 'tag': e.tag} for e in events]
+
+
+def liked_share(events, batches=100):
+    head = events[:batches * BATCH_SIZE]
+    return sum(1 for e in head if PREFS.get(e['tag'] if isinstance(e, dict) else e.tag, 0) > 0) / len(head)
+
+
+def run(sizes, legacy_max):
+    print(f"{'candidates':>11}{'vectorized':>13}{'legacy':>11}{'liked share (vec/legacy)':>27}")
+    for n in sizes:
+        events = make_events(n)
+        start = time.perf_counter()
+        ordered = order_feed(events, PREFS, np.random.default_rng(0))
+        vec_time = time.perf_counter() - start
+        assert len(ordered) == n
+
+        legacy_time, legacy_share = None, None
+        if n <= legacy_max:
+            random.seed(0)
+            start = time.perf_counter()
+            legacy = legacy_order_feed(as_dicts(make_events(n)), PREFS)
+            legacy_time = time.perf_counter() - start
+            legacy_share = liked_share(legacy)
+
+        legacy_col = f"{legacy_time:>10.3f}s" if legacy_time is not None else f"{'skipped':>11}"
+        share_col = f"{liked_share(ordered):.2f}/" + (f"{legacy_share:.2f}" if legacy_share is not None else "-")
+        print(f"{n:>11}{vec_time:>12.3f}s{legacy_col}{share_col:>27}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=10_000,
+                        help='largest size to run the quadratic legacy loop on')
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_max)
@@ -0,0 +1,62 @@
+"""Micro-benchmark: apis.http_client's pooled keep-alive session vs. a bare requests.get per call.
+
+Run from the repo root:
+    python -m benchmarks.bench_http_client [--requests 500]
+
+Both clients call the same local stub server (tests/test_http_client.py's StubHandler), so the
+difference is the connection setup the pool saves; against a remote HTTPS provider each new
+connection also pays a TLS handshake and round trips, and the gap is much wider.
+"""
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer
+
+import requests
+from apis import http_client
+from benchmarks.bench_routes import percentile
+from tests.test_http_client import StubHandler
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.lock = threading.Lock()
+    server.connections = set()
+    server.hits = {}
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def latencies(fn, url, n):
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn(url).raise_for_status()
+        times.append(time.perf_counter() - start)
+    return sorted(times)
+
+
+def run(n):
+    server = start_server()
+    url = f'http://127.0.0.1:{server.server_address[1]}/ok'
+    cases = [
+        ('requests.get', lambda url: requests.get(url, timeout=http_client.DEFAULT_TIMEOUT)),
+        ('http_client.get', http_client.get),
+    ]
+    print(f"{'client':<18}{'p50 ms':>10}{'p99 ms':>10}{'connections':>14}")
+    try:
+        for name, fn in cases:
+            server.connections.clear()
+            times = latencies(fn, url, n)
+            print(f"{name:<18}{percentile(times, 50) * 1000:>10.3f}{percentile(times, 99) * 1000:>10.3f}"
+                  f"{len(server.connections):>14}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='requests per client')
+    run(parser.parse_args().requests)
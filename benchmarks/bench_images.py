@@ -0,0 +1,102 @@
+"""Benchmark: apis.images.normalize_image_url vs. the old per-request replace chain + Jinja filter.
+
+Run from the repo root:
+    python -m benchmarks.bench_images [--urls 20000] [--distinct 500] [--repeat 5]
+"""
+import re
+import time
+import random
+import argparse
+
+from apis import images
+
+
+def legacy_image(image):
+    """The replace chain for_you ran on every Google event, kept for comparison."""
+    if 'googleusercontent.com' in str(image):
+        original_image = str(image)
+        image = original_image.replace('=w120-h120-p', '=w2000-h1200-p')
+        image = image.replace('=s120', '=s2000')
+        image = image.replace('=w120', '=w2000')
+        image = image.replace('=h120', '=h1200')
+        image = image.replace('=w120-h120', '=w2000-h1200')
+        image = image.replace('=s120-c', '=s2000-c')
+        image = image.replace('=w120', '=w2000')
+        image = image.replace('=h120', '=h1200')
+        image = image.replace('=s120', '=s2000')
+    elif 'lh3.googleusercontent.com' in str(image):
+        image = str(image).replace('=s120', '=s0')
+        image = str(image).replace('=w120', '=w0')
+        image = str(image).replace('=h120', '=h0')
+    elif 'maps.googleapis.com' in str(image):
+        image = str(image).replace('size=120x120', 'size=1200x800')
+        image = str(image).replace('zoom=15', 'zoom=18')
+    return image
+
+
+def legacy_filter(url):
+    """The upscale_google_img Jinja filter, run again at every render."""
+    if not url:
+        return url
+    upscale = re.sub(r'=w\d+-h\d+(-[a-z])?', '=w1200-h900', url)
+    upscale = re.sub(r'=s\d+(-[a-z])?', '=w1200-h900', upscale)
+    return upscale
+
+
+def make_corpus(n, distinct, seed=0):
+    """SerpAPI-style thumbnails: mostly Google-hosted, a few maps tiles and third-party images."""
+    rng = random.Random(seed)
+    token = lambda k: ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-')
+                              for _ in range(k))
+    templates = [
+        lambda: f"https://lh3.googleusercontent.com/{token(60)}=w120-h120-p-k-no",
+        lambda: f"https://lh5.googleusercontent.com/p/{token(40)}=s120-c",
+        lambda: f"https://lh3.googleusercontent.com/{token(60)}=w{rng.choice([72, 240, 400])}-h{rng.choice([72, 180, 300])}",
+        lambda: f"https://lh4.googleusercontent.com/{token(50)}=h120",
+        lambda: f"https://encrypted-tbn0.gstatic.com/images?q=tbn:{token(40)}&s",
+        lambda: f"https://maps.googleapis.com/maps/api/staticmap?center={rng.uniform(25, 48):.4f},"
+                f"{rng.uniform(-122, -71):.4f}&zoom=15&size=120x120&key={token(20)}",
+        lambda: f"https://images.unsplash.com/photo-{rng.randint(10**12, 10**13)}?w=1200&h=800&fit=crop&q=90",
+        lambda: f"https://www.eventbrite.com/e/_next/image?url=https%3A%2F%2Fimg.evbuc.com%2F{token(30)}",
+    ]
+    pool = [rng.choice(templates)() for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def timed(fn, corpus, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for url in corpus:
+            fn(url)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n, distinct, repeat):
+    corpus = make_corpus(n, distinct)
+    mismatches = [url for url in set(corpus) if images.normalize_image_url(url) != legacy_filter(legacy_image(url))]
+    # The old chain replaced '=h120' twice, so lone heights came out as '=h12000'; those are
+    # the only differences expected here
+    print(f"{len(set(corpus))} distinct URLs, {len(mismatches)} rewritten differently from the old code")
+    for url in mismatches[:5]:
+        print(f"  {url}\n    old: {legacy_filter(legacy_image(url))}\n    new: {images.normalize_image_url(url)}")
+
+    legacy = timed(lambda url: legacy_filter(legacy_image(url)), corpus, repeat)
+    images.normalize_image_url.cache_clear()
+    cold = timed(images.normalize_image_url.__wrapped__, corpus, repeat)
+    memo = timed(images.normalize_image_url, corpus, repeat)
+    print(f"{'':<28}{'total':>10}{'per URL':>12}")
+    for label, seconds in (('legacy chain + filter', legacy), ('compiled rules, no memo', cold),
+                           ('compiled rules, memoized', memo)):
+        print(f"{label:<28}{seconds * 1000:>8.2f}ms{seconds / n * 1e6:>10.2f}us")
+    print("at render time: 0 (image_url is stored with the cached event)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=20_000)
+    parser.add_argument('--distinct', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.urls, args.distinct, args.repeat)
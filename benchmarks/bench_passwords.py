@@ -0,0 +1,86 @@
+"""Benchmark: password hashing cost and end-to-end logins/sec, per core and across the hashing pool.
+
+Run from the repo root:
+    python -m benchmarks.bench_passwords [--seconds 2] [--threads N]
+"""
+import os
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+
+import db
+from apis import passwords
+from apis.db_pool import close_connections
+
+CANDIDATES = [
+    ('sha256 (legacy, unsalted)', passwords.LEGACY),
+    ('scrypt n=2^13', passwords.ScryptHasher(n=2 ** 13)),
+    ('scrypt n=2^14 (default)', passwords.ScryptHasher(n=2 ** 14)),
+    ('scrypt n=2^15', passwords.ScryptHasher(n=2 ** 15)),
+    ('pbkdf2_sha256 600k', passwords.Pbkdf2Hasher(iterations=600_000)),
+]
+
+
+def rate(fn, seconds, threads=1):
+    """Calls per second of fn, run back to back on threads threads for about seconds."""
+    deadline = time.perf_counter() + seconds
+
+    def loop():
+        n = 0
+        while time.perf_counter() < deadline:
+            fn()
+            n += 1
+        return n
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(lambda _: loop(), range(threads)))
+    return total / (time.perf_counter() - start)
+
+
+def bench_hashers(seconds, threads):
+    print(f"{'hasher':<30}{'ms/hash':>10}{'per core':>12}{f'{threads} threads':>14}")
+    salt = os.urandom(passwords.SALT_BYTES)
+    for label, hasher in CANDIDATES:
+        encoded = hasher.encode('correct horse battery staple', salt)
+        verify = lambda: hasher.verify('correct horse battery staple', encoded)
+        single = rate(verify, seconds)
+        parallel = rate(verify, seconds, threads)
+        print(f"{label:<30}{1000 / single:>10.2f}{single:>10.1f}/s{parallel:>12.1f}/s")
+
+
+def bench_logins(seconds, threads):
+    """Real login_user calls (index lookup + verify on the hashing pool) with the configured hasher."""
+    workdir = tempfile.mkdtemp()
+    db.DB_PATH = os.path.join(workdir, 'bench_user_info.db')
+    db.init_auth_db()
+    app = Flask(__name__)
+    app.secret_key = 'bench'
+    # hashing every user at full cost would take a while; they all share one hash
+    stored = db.hash_password('benchpass')
+    with db.transaction(db.DB_PATH) as conn:
+        conn.executemany("INSERT INTO users (name, email, password) VALUES (?, ?, ?)",
+                         [(f'bench{i}', f'bench{i}@example.com', stored) for i in range(1000)])
+
+    def login():
+        with app.test_request_context():
+            assert db.login_user('bench42', 'benchpass')['status'] == 'access granted'
+
+    hasher = passwords.get_hasher()
+    print(f"\nlogin_user with {hasher.algorithm} {hasher.params()}, pool of {passwords.HASH_WORKERS}:")
+    print(f"  1 client:          {rate(login, seconds):.1f} logins/s")
+    print(f"  {threads} clients:{' ' * (10 - len(str(threads)))}{rate(login, seconds, threads):.1f} logins/s")
+    close_connections()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=2, help='per measurement')
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPU(s)\n")
+    bench_hashers(args.seconds, args.threads)
+    bench_logins(args.seconds, max(args.threads, 4))
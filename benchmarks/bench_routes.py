@@ -0,0 +1,235 @@
+"""Route benchmark: throughput and p50/p99 latency of the main Flask routes on synthetic data.
+
+Run from the repo root:
+    python -m benchmarks.bench_routes [--scale 10000] [--requests 500] [--concurrency 1]
+        [--upstream-ms 0] [--routes for_you,api_events,like_event,saved_events]
+        [--out results.json] [--compare baseline.json]
+
+Builds a fresh dataset with benchmarks.synthetic in a temp directory, swaps every upstream
+provider (Yelp, Reddit, SerpAPI, Gemini) for a stub that returns canned events after
+--upstream-ms, and drives the app through Flask's test client. Results are written as JSON;
+--compare prints the change against an earlier results file.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+
+STUB_EVENTS = 20  # events each stub provider returns per call
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, seconds):
+    latencies = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(len(latencies) / seconds, 1) if seconds else None,
+        'mean_ms': ms(sum(latencies) / len(latencies)) if latencies else None,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+    }
+
+
+def stub_provider(source, pool, upstream_seconds):
+    """A provider that sleeps like a network call, then returns STUB_EVENTS events from the pool."""
+    from apis.event import Event
+    from benchmarks.synthetic import provider_event
+
+    def provider(location, *args, **kwargs):
+        if upstream_seconds:
+            time.sleep(upstream_seconds)
+        start = sum(map(ord, location)) % max(pool - STUB_EVENTS, 1)
+        events = []
+        for k in range(start, start + STUB_EVENTS):
+            event = Event.from_dict(provider_event(k))
+            if source != 'google':
+                event.source, event.global_id = source, f"{source}_bench{k}"
+            events.append(event)
+        return events
+    return provider
+
+
+def install_stubs(app_module, pool, upstream_seconds):
+    from apis import event_handler, tagging
+    event_handler.search_yelp_businesses = stub_provider('yelp', pool, upstream_seconds)
+    event_handler.search_reddit_events = stub_provider('reddit', pool, upstream_seconds)
+    app_module.feed_google_events = stub_provider('google', pool, upstream_seconds)
+    # keyword tagging (cached like model tags) instead of Gemini
+    tagging.tag_model = None
+
+
+def make_cases(users, pool):
+    """Route name -> fn(client, rng) that issues one request and returns the response."""
+    from benchmarks.synthetic import provider_event, CITIES
+
+    def login(client, rng):
+        user_id, location = rng.choice(users)
+        with client.session_transaction() as session:
+            session['user_id'] = user_id
+        return location
+
+    def for_you(client, rng):
+        return client.get('/for_you')
+
+    def api_events(client, rng):
+        city = rng.choice(CITIES)[0]
+        return client.get('/api/events', query_string={'location': city, 'interests': rng.choice(['music', 'art', ''])})
+
+    def like_event(client, rng):
+        # liking the same event twice unlikes it, so this exercises both paths
+        return client.post('/api/like_event', json=provider_event(rng.randrange(pool)))
+
+    def saved_events(client, rng):
+        return client.get('/api/saved_events')
+
+    return login, {'for_you': for_you, 'api_events': api_events, 'like_event': like_event,
+                   'saved_events': saved_events}
+
+
+def drive(app, login, case, requests, concurrency, warmup, seed):
+    """Run case requests times over concurrency threads. Returns (latencies, errors, wall seconds)."""
+    latencies, errors = [], []
+    per_thread = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index, count):
+        rng = random.Random(seed * 1000 + index)
+        client = app.test_client()
+        for _ in range(warmup):
+            login(client, rng)
+            case(client, rng)
+        barrier.wait()
+        local, failed = [], 0
+        for _ in range(count):
+            # picking the user is setup, not part of the request being timed
+            login(client, rng)
+            start = time.perf_counter()
+            response = case(client, rng)
+            response.get_data()
+            local.append(time.perf_counter() - start)
+            failed += response.status_code >= 400
+        latencies.extend(local)
+        errors.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(i, n)) for i, n in enumerate(per_thread)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return latencies, sum(errors), time.perf_counter() - started
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='bench_routes_')
+    # app.py opens its databases at import, so point it at the synthetic ones first
+    os.environ['USER_INFO_DB'] = os.path.join(workdir, 'user_info.db')
+    os.environ['USER_EVENTS_DB'] = os.path.join(workdir, 'user_events.db')
+    os.environ['CACHE_DB'] = os.path.join(workdir, 'cache.db')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    from benchmarks import synthetic
+    counts = synthetic.sizes(args.scale, args.users, args.user_events, args.saved, args.likes)
+    dataset = synthetic.populate(counts, os.environ['USER_INFO_DB'], os.environ['USER_EVENTS_DB'], seed=args.seed)
+    print(f"dataset: {dataset['rows']} in {dataset['seconds']}s", file=sys.stderr)
+
+    import app as app_module
+    pool = synthetic.event_pool_size(counts)
+    install_stubs(app_module, pool, args.upstream_ms / 1000)
+    login, cases = make_cases(dataset['users'], pool)
+
+    results = {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'rows': dataset['rows'],
+            'dataset_seconds': dataset['seconds'],
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup,
+            'upstream_ms': args.upstream_ms,
+            'seed': args.seed,
+        },
+        'routes': {},
+    }
+    for name in args.routes:
+        latencies, errors, seconds = drive(app_module.app, login, cases[name], args.requests, args.concurrency,
+                                           args.warmup, args.seed)
+        results['routes'][name] = summarize(latencies, errors, seconds)
+    return results
+
+
+def print_table(results, baseline=None):
+    header = f"{'route':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    print(header + ("   vs baseline (req/s, p50, p99)" if baseline else ""))
+    for name, stats in results['routes'].items():
+        line = f"{name:<14}{stats['throughput_rps']:>10.1f}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['errors']:>8}"
+        old = (baseline or {}).get('routes', {}).get(name)
+        if old:
+            change = lambda key: f"{(stats[key] - old[key]) / old[key] * 100:+.0f}%" if old[key] else 'n/a'
+            line += f"   {change('throughput_rps')}, {change('p50_ms')}, {change('p99_ms')}"
+        print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10_000, help='see benchmarks.synthetic')
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--user-events', type=int)
+    parser.add_argument('--saved', type=int)
+    parser.add_argument('--likes', type=int)
+    parser.add_argument('--requests', type=int, default=500, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=10, help='untimed requests per thread first')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads')
+    parser.add_argument('--upstream-ms', type=float, default=0, help='simulated latency of each stub provider')
+    parser.add_argument('--routes', type=lambda s: s.split(','), default=['for_you', 'api_events', 'like_event',
+                                                                          'saved_events'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='write results JSON here (default: stdout)')
+    parser.add_argument('--compare', help='earlier results JSON to print changes against')
+    args = parser.parse_args()
+
+    results = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print_table(results, baseline)
+    else:
+        print(json.dumps(results, indent=2))
+        if baseline:
+            print_table(results, baseline)
@@ -0,0 +1,159 @@
+"""Synthetic data generator: users, preferences, user events, saved and liked events at any scale.
+
+Run from the repo root to build a standalone dataset (e.g. to profile against):
+    python -m benchmarks.synthetic --scale 100000 --out /tmp/bench-data [--seed 0]
+
+Row counts default from --scale (user_events and saved_events = scale, users = scale / 10,
+likes = scale / 2) and can each be set on their own with --users, --user-events, --saved, --likes.
+The same seed always produces the same rows.
+"""
+import os
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# (gazetteer city, timezone); earlier cities get more users, like real traffic
+CITIES = [
+    ("New York", "America/New_York"), ("Los Angeles", "America/Los_Angeles"), ("Chicago", "America/Chicago"),
+    ("Houston", "America/Chicago"), ("Phoenix", "America/Phoenix"), ("Philadelphia", "America/New_York"),
+    ("San Antonio", "America/Chicago"), ("San Diego", "America/Los_Angeles"), ("Dallas", "America/Chicago"),
+    ("Austin", "America/Chicago"), ("Seattle", "America/Los_Angeles"), ("Boston", "America/New_York"),
+]
+CITY_WEIGHTS = [1 / (rank + 1) for rank in range(len(CITIES))]
+TAGS = ["food", "music", "sports", "comedy", "networking", "art", "education", "festival", "other"]
+TITLES = {
+    "food": ["Pizza Night", "Taco Tuesday", "Food Truck Rally", "Vegan Potluck", "BBQ Bash"],
+    "music": ["Jazz Night", "Rock Concert", "Open Mic", "Classical Recital", "DJ Dance Party"],
+    "sports": ["Soccer Tournament", "Basketball Game", "5K Run", "Yoga in the Park", "Pickleball Meetup"],
+    "comedy": ["Stand-Up Night", "Improv Show", "Comedy Jam", "Laugh Fest"],
+    "networking": ["Tech Mixer", "Startup Pitch", "Career Fair", "Young Professionals Night"],
+    "art": ["Art Walk", "Gallery Opening", "Craft Fair", "Photography Expo"],
+    "education": ["Coding Bootcamp", "Science Talk", "Book Club", "History Lecture"],
+    "festival": ["Spring Festival", "Cultural Parade", "Film Fest", "Street Fair"],
+    "other": ["Board Game Night", "Trivia Night", "Charity Auction", "Garden Tour"],
+}
+PASSWORD = "benchpass"
+CHUNK = 10_000
+
+
+def sizes(scale, users=None, user_events=None, saved=None, likes=None):
+    """Row counts per table for a scale, with per-table overrides."""
+    return {
+        'users': users if users is not None else max(scale // 10, 10),
+        'user_events': user_events if user_events is not None else scale,
+        'saved_events': saved if saved is not None else scale,
+        'liked_events': likes if likes is not None else scale // 2,
+    }
+
+
+def event_pool_size(counts):
+    """How many distinct provider events the saved/liked rows (and the stub providers) draw from."""
+    return max(counts['saved_events'] // 10, 100)
+
+
+def provider_event(k):
+    """Provider event number k as an Event payload; the same k always gives the same event."""
+    tag = TAGS[k % len(TAGS)]
+    titles = TITLES[tag]
+    return {'global_id': f'google_bench{k}', 'source': 'google', 'title': f"{titles[k % len(titles)]} #{k}",
+            'time': 'Sat, Aug 2, 7 PM', 'location': CITIES[k % len(CITIES)][0],
+            'url': f'https://example.com/events/{k}', 'description': f"{tag} event", 'tags': [tag], 'type': 'social'}
+
+
+def catalog_row(k):
+    """events (catalog) row for provider event k; its id is k + 1."""
+    event = provider_event(k)
+    return (k + 1, event['global_id'], event['source'], event['title'], event['time'], event['location'],
+            event['url'], event['type'])
+
+
+def saved_pairs(counts, rng):
+    """Sorted (user_id, k) pairs of saved provider events, and the liked subset of them."""
+    pool = event_pool_size(counts)
+    pairs = set()
+    while len(pairs) < min(counts['saved_events'], counts['users'] * pool):
+        pairs.add((rng.randint(1, counts['users']), rng.randrange(pool)))
+    pairs = sorted(pairs)
+    # liking an event saves it too, so likes are a subset of the saved rows
+    liked = rng.sample(pairs, min(counts['liked_events'], len(pairs)))
+    return pairs, liked
+
+
+def user_event_records(n, rng):
+    start = datetime(2025, 8, 1)
+    for i in range(n):
+        city, timezone = rng.choices(CITIES, CITY_WEIGHTS)[0]
+        tag = rng.choice(TAGS)
+        when = start + timedelta(days=rng.randrange(90), hours=rng.randrange(9, 22))
+        yield {'title': rng.choice(TITLES[tag]), 'location': city, 'event_time': when.isoformat(timespec='minutes'),
+               'timezone': timezone, 'tag': tag, 'description': f"Synthetic {tag} event {i}"}
+
+
+def _insert(db_path, sql, rows):
+    from apis.db_pool import transaction
+    for i in range(0, len(rows), CHUNK):
+        with transaction(db_path) as conn:
+            conn.executemany(sql, rows[i:i + CHUNK])
+
+
+def populate(counts, user_info_db, user_events_db, seed=0):
+    """Create and fill both databases, pointing db and apis.user_events at them.
+
+    Returns {'rows': actual row counts, 'users': [(user_id, location)], 'seconds': build time}.
+    """
+    import db
+    from apis import user_events
+    from apis.event_import import ingest
+
+    db.DB_PATH = user_info_db
+    user_events.DB_PATH = user_events_db
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    db.init_auth_db()
+    user_events.init_user_events_db()
+
+    password = db.hash_password(PASSWORD)
+    users, preferences, weights = [], [], []
+    for user_id in range(1, counts['users'] + 1):
+        users.append((user_id, f'bench{user_id}', f'bench{user_id}@example.com', password, '5555555555'))
+        location = rng.choices(CITIES, CITY_WEIGHTS)[0][0]
+        liked = {tag: rng.randint(1, 5) for tag in rng.sample(TAGS, rng.randint(2, 4))}
+        preferences.append((user_id, location, json.dumps(liked)))
+        weights.extend((user_id, tag, weight) for tag, weight in liked.items())
+    _insert(user_info_db, "INSERT INTO users (id, name, email, password, phone) VALUES (?, ?, ?, ?, ?)", users)
+    _insert(user_info_db, "INSERT INTO user_preferences (user_id, location, preferences) VALUES (?, ?, ?)", preferences)
+    _insert(user_info_db, "INSERT INTO user_tag_weights (user_id, tag, weight) VALUES (?, ?, ?)", weights)
+
+    pairs, liked = saved_pairs(counts, rng)
+    _insert(user_info_db, "INSERT INTO events (id, global_id, source, title, time, location, url, type) "
+                          "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [catalog_row(k) for k in sorted({k for _, k in pairs})])
+    _insert(user_info_db, "INSERT INTO saved_events (user_id, event_id) VALUES (?, ?)",
+            [(user_id, k + 1) for user_id, k in pairs])
+    _insert(user_info_db, "INSERT INTO liked_events (user_id, event_id) VALUES (?, ?)",
+            [(user_id, k + 1) for user_id, k in liked])
+
+    report = ingest(user_event_records(counts['user_events'], rng), chunk_size=CHUNK, db_path=user_events_db)
+
+    rows = dict(counts, saved_events=len(pairs), liked_events=len(liked), user_events=report['imported'])
+    return {'rows': rows, 'users': [(user_id, location) for user_id, location, _ in preferences],
+            'seconds': round(time.perf_counter() - started, 2)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10_000)
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--user-events', type=int)
+    parser.add_argument('--saved', type=int)
+    parser.add_argument('--likes', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help='directory for user_info.db and user_events.db')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    counts = sizes(args.scale, args.users, args.user_events, args.saved, args.likes)
+    result = populate(counts, os.path.join(args.out, 'user_info.db'), os.path.join(args.out, 'user_events.db'),
+                      seed=args.seed)
+    print(json.dumps({'rows': result['rows'], 'seconds': result['seconds'], 'out': args.out}, indent=2))
@@ -1,83 +1,177 @@
+import os
 import sqlite3
-import hashlib
 from flask import session 
 import json
+import logging
+from apis.db_pool import get_connection, transaction
+from apis.event import Event
+from apis import passwords
 
-DB_PATH = "user_info.db"
+log = logging.getLogger(__name__)
 
-def init_auth_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            phone TEXT
-        )
-    """)
+DB_PATH = os.getenv("USER_INFO_DB", "user_info.db")
+PAGE_SIZE = 20      # saved/liked events per page
+MAX_PAGE_SIZE = 100
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS saved_events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            event_global_id TEXT NOT NULL,
-            event_source TEXT NOT NULL,
-            event_title TEXT NOT NULL,
-            event_date TEXT,
-            event_location TEXT,
-            event_url TEXT,
-            type TEXT NOT NULL,
-            saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(user_id, event_global_id),
-            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_preferences (
-            user_id INTEGER PRIMARY KEY,
-            location TEXT,
-            preferences TEXT, -- JSON string (dict: category -> weight)
-            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-        )
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS liked_events (
+def init_auth_db():
+    with transaction(DB_PATH) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL,
+                phone TEXT
+            )
+        """)
+        # login looks users up by name
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_users_name ON users (name)")
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_preferences (
+                user_id INTEGER PRIMARY KEY,
+                location TEXT,
+                preferences TEXT, -- JSON string (dict: category -> weight)
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+        """)
+        if has_legacy_saved_events(conn):
+            # converting drops likes it can't place, so it's done by hand, not on every startup
+            raise RuntimeError(f"{DB_PATH} still stores saved events in the old layout; back it up and run "
+                               f"migrate_saved_events_to_catalog.py before starting the app")
+        ensure_event_catalog(conn)
+        ensure_tag_weights(conn)
+        tables = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        log.debug("Auth DB tables: %s", [name for (name,) in tables])
+
+# One row per event however many users save or like it; saved_events and liked_events are
+# (user_id, event_id) edges into it
+EVENTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        global_id TEXT UNIQUE NOT NULL,
+        source TEXT NOT NULL,
+        title TEXT NOT NULL,
+        time TEXT,
+        location TEXT,
+        url TEXT,
+        type TEXT NOT NULL
+    )
+"""
+EDGE_TABLE = """
+    CREATE TABLE IF NOT EXISTS {table} (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         user_id INTEGER NOT NULL,
-        event_global_id TEXT NOT NULL,
-        liked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        UNIQUE(user_id, event_global_id),
-        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        event_id INTEGER NOT NULL,
+        {stamp} TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(user_id, event_id),
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY (event_id) REFERENCES events (id)
     )
-""")
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    print(cursor.fetchall())
-
-
-    conn.commit()
-    conn.close()
+"""
+EDGES = {'saved_events': 'saved_at', 'liked_events': 'liked_at'}
+
+def has_legacy_saved_events(conn):
+    """Whether saved_events still has the old layout, a copy of the event's details in every saved row."""
+    return 'event_global_id' in {row[1] for row in conn.execute("PRAGMA table_info(saved_events)")}
+
+def ensure_event_catalog(conn):
+    """Create the events catalog and its edge tables, converting saved_events/liked_events from
+    the old layout if they still have it (see migrate_saved_events_to_catalog.py).
+
+    Returns (catalog rows created, likes dropped because no saved copy had their details).
+    """
+    conn.execute(EVENTS_TABLE)
+    legacy = has_legacy_saved_events(conn)
+    created = dropped = 0
+    if legacy:
+        # the most recently saved copy of each event has the freshest details
+        created = conn.execute("""
+            INSERT INTO events (global_id, source, title, time, location, url, type)
+            SELECT event_global_id, event_source, event_title, event_date, event_location, event_url,
+                   COALESCE(type, 'social')
+            FROM saved_events
+            WHERE id IN (SELECT MAX(id) FROM saved_events GROUP BY event_global_id)
+            ON CONFLICT(global_id) DO NOTHING
+        """).rowcount
+        # Rebuilt rather than altered (SQLite can't drop a UNIQUE constraint); ids are kept so
+        # listing order and outstanding page cursors carry over
+        for table, stamp in EDGES.items():
+            conn.execute(f"DROP TABLE IF EXISTS {table}_new")
+            conn.execute(EDGE_TABLE.format(table=f"{table}_new", stamp=stamp))
+            moved = conn.execute(f"""
+                INSERT INTO {table}_new (id, user_id, event_id, {stamp})
+                SELECT old.id, old.user_id, events.id, old.{stamp}
+                FROM {table} old JOIN events ON events.global_id = old.event_global_id
+            """).rowcount
+            if table == 'liked_events':
+                dropped = conn.execute("SELECT COUNT(*) FROM liked_events").fetchone()[0] - moved
+                if dropped:
+                    log.warning("Dropped %d likes of events nobody had saved (their details were never stored)",
+                                dropped)
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    for table, stamp in EDGES.items():
+        conn.execute(EDGE_TABLE.format(table=table, stamp=stamp))
+    if legacy:
+        # liking saves the event, which the old like_event skipped when another user had saved it
+        conn.execute("INSERT OR IGNORE INTO saved_events (user_id, event_id) SELECT user_id, event_id FROM liked_events")
+    # Per-user listings page backwards by id (keyset pagination, see _page); both indexes cover
+    # the whole scan of their table, leaving one catalog lookup by primary key per row
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_saved_events_user ON saved_events (user_id, id, event_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_liked_events_user ON liked_events (user_id, id, event_id)")
+    return created, dropped
+
+def ensure_tag_weights(conn):
+    """Create user_tag_weights and copy in the JSON preferences of users who have no rows yet.
+
+    Returns the number of users migrated.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_tag_weights (
+            user_id INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            weight INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, tag),
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    rows = conn.execute("""
+        SELECT user_id, preferences FROM user_preferences
+        WHERE preferences IS NOT NULL
+          AND user_id NOT IN (SELECT DISTINCT user_id FROM user_tag_weights)
+    """).fetchall()
+    weights = []
+    for user_id, preferences_json in rows:
+        try:
+            preferences = json.loads(preferences_json)
+        except ValueError:
+            continue
+        if isinstance(preferences, list):
+            preferences = {pref: 1 for pref in preferences}
+        weights.extend((user_id, tag, int(weight)) for tag, weight in preferences.items())
+    conn.executemany("INSERT OR IGNORE INTO user_tag_weights (user_id, tag, weight) VALUES (?, ?, ?)", weights)
+    return len(rows)
 
 def hash_password(password):
-    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+    """Salted KDF hash for the users.password column (see apis/passwords.py)."""
+    return passwords.hash_password(password)
 
 def register_user(name, email, password, phone):
-    hashed_pw = hash_password(password)
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     if '@' not in email:
         return {"status": "fail", "message": "Invalid email address"}
 
     try:
-        cursor.execute("""
-            INSERT INTO users (name, email, password, phone)
-            VALUES (?, ?, ?, ?)
-        """, (name, email, hashed_pw, phone))
-        conn.commit()
+        hashed_pw = hash_password(password)
+    except passwords.PasswordServiceBusy:
+        return {"status": "fail", "message": "Too many sign-ups right now, please try again in a moment."}
+
+    try:
+        with transaction(DB_PATH) as conn:
+            cursor = conn.execute("""
+                INSERT INTO users (name, email, password, phone)
+                VALUES (?, ?, ?, ?)
+            """, (name, email, hashed_pw, phone))
         
         user_id = cursor.lastrowid
         session['user_id'] = user_id
@@ -88,103 +182,123 @@ def register_user(name, email, password, phone):
     except Exception as e:
         result = {"status": "fail", "message": f"Registration failed: {e}"}
     
-    conn.close()
     return result
 
 def login_user(username, password):
-    hashed = hash_password(password)
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id FROM users
-        WHERE name = ? AND password = ?
-    """, (username, hashed))
-    result = cursor.fetchone()
-    conn.close()
-
-    if result:
-        user_id = result[0]
+    # Names aren't unique, so check the password against each account with this name
+    rows = get_connection(DB_PATH).execute("""
+        SELECT id, password FROM users
+        WHERE name = ?
+    """, (username,)).fetchall()
+
+    try:
+        if not rows:
+            passwords.dummy_verify(password)
+        match = next(((user_id, stored) for user_id, stored in rows
+                      if passwords.verify_password(password, stored)), None)
+    except passwords.PasswordServiceBusy:
+        return {"status": "busy", "message": "Too many sign-ins right now, please try again in a moment."}
+
+    if match:
+        user_id, stored = match
+        if passwords.needs_rehash(stored):
+            # Transparent upgrade of legacy SHA-256 hashes (and of older KDF settings). Hashed
+            # before taking the write lock, which would otherwise stall every other write for
+            # the length of the hash; skipped if the password changed meanwhile.
+            try:
+                rehashed = hash_password(password)
+            except passwords.PasswordServiceBusy:
+                rehashed = None  # the next login will upgrade it
+            if rehashed:
+                with transaction(DB_PATH) as conn:
+                    conn.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                                 (rehashed, user_id, stored))
         session['user_id'] = user_id # Set user_id in session upon successful login
         return {"status": "access granted", "user_id": user_id}
     else:
         return {"status": "access denied"}
 
-def save_event(user_id, event_data):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    source = event_data.get('source')
-    global_id = event_data.get('global_id')
-    title = event_data.get('title')
-    date = event_data.get('date')
-    location = event_data.get('location')
-    url = event_data.get('url')
-    event_type = event_data.get('type')  # "food" or "social"
-
+def save_event(user_id, event: Event):
     try:
-        cursor.execute("""
-            INSERT INTO saved_events (
-                user_id, event_global_id, event_source, event_title,
-                event_date, event_location, event_url, type
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (user_id, global_id, source, title, date, location, url, event_type))
-        
-        conn.commit()
+        with transaction(DB_PATH) as conn:
+            conn.execute("INSERT INTO saved_events (user_id, event_id) VALUES (?, ?)",
+                         (user_id, upsert_event(conn, event)))
         result = {"status": "success", "message": "Event saved successfully."}
     except sqlite3.IntegrityError:
         result = {"status": "fail", "message": "Event already saved by this user."}
     except Exception as e:
         result = {"status": "fail", "message": f"Error saving event: {e}"}
-    finally:
-        conn.close()
     
     return result
 
+def upsert_event(conn, event: Event):
+    """Add event to the catalog, or refresh the details of the row it already has; returns events.id.
+
+    Blank details (client payloads often carry just a few fields) never overwrite known ones, and
+    source and type ("food" or "social") stay as first recorded.
+    """
+    return conn.execute("""
+        INSERT INTO events (global_id, source, title, time, location, url, type)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(global_id) DO UPDATE SET
+            title = COALESCE(NULLIF(excluded.title, ''), title),
+            time = COALESCE(NULLIF(NULLIF(excluded.time, ''), 'TBD'), time),
+            location = COALESCE(NULLIF(excluded.location, ''), location),
+            url = COALESCE(NULLIF(excluded.url, ''), url)
+        RETURNING id
+    """, (event.global_id, event.source, event.title, event.time, event.location, event.url,
+          event.type or 'social')).fetchone()[0]
+
+def catalog_row_to_event(row):
+    """Adapt an events row (global id, source, title, time, location, url, type) to an Event."""
+    return Event.from_dict({"global_id": row[0], "source": row[1], "title": row[2], "time": row[3],
+                            "location": row[4], "url": row[5], "type": row[6]})
+
+def _page(sql, user_id, after=None, limit=None, key='id'):
+    """Run a newest-first listing keyed on an id column; returns (events, cursor for the next page or None).
+
+    sql selects the key column followed by the catalog_row_to_event columns and has an {after}
+    placeholder in its WHERE clause. The cursor is the last id returned, so any page costs one
+    index seek however deep it is, and rows added meanwhile don't shift it. Raises ValueError
+    for a cursor that isn't an id.
+    """
+    params = [user_id]
+    if after is not None:
+        params.append(int(after))
+    query = sql.format(after=f"AND {key} < ?" if after is not None else "")
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit + 1)
+    rows = get_connection(DB_PATH).execute(query, params).fetchall()
+    more = limit is not None and len(rows) > limit
+    rows = rows[:limit] if more else rows
+    return [catalog_row_to_event(row[1:]) for row in rows], (str(rows[-1][0]) if more else None)
+
+def get_saved_events_page(user_id: int, after=None, limit=PAGE_SIZE):
+    return _page("""
+        SELECT se.id, e.global_id, e.source, e.title, e.time, e.location, e.url, e.type
+        FROM saved_events se
+        JOIN events e ON e.id = se.event_id
+        WHERE se.user_id = ? {after}
+        ORDER BY se.id DESC
+    """, user_id, after, limit, key='se.id')
+
 def get_saved_events(user_id: int) -> list:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT event_global_id, event_source, event_title, event_date, event_location, event_url, type
-        FROM saved_events
-        WHERE user_id = ?
-        ORDER BY saved_at DESC
-    """, (user_id,))
-    
-    saved_events_raw = cursor.fetchall()
-    conn.close()
-
-    saved_events_list = []
-    for row in saved_events_raw:
-        saved_events_list.append({
-            "global_id": row[0],
-            "source": row[1],
-            "title": row[2],
-            "date": row[3], 
-            "location": row[4], 
-            "url": row[5],
-            "type": row[6]
-        })
-    return saved_events_list
+    return get_saved_events_page(user_id, limit=None)[0]
 
 def delete_saved_event(user_id: int, event_global_id: str) -> dict:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
     try:
-        cursor.execute("""
-            DELETE FROM saved_events
-            WHERE user_id = ? AND event_global_id = ?
-        """, (user_id, event_global_id))
-        conn.commit()
+        with transaction(DB_PATH) as conn:
+            cursor = conn.execute("""
+                DELETE FROM saved_events
+                WHERE user_id = ? AND event_id = (SELECT id FROM events WHERE global_id = ?)
+            """, (user_id, event_global_id))
         if cursor.rowcount > 0:
             result = {"status": "success", "message": "Event unsaved successfully."}
         else:
             result = {"status": "fail", "message": "Event not found for this user."}
     except Exception as e:
         result = {"status": "fail", "message": f"Error unsaving event: {e}"}
-    finally:
-        conn.close()
     return result
 
 def save_user_preferences(user_id, location, preferences):
@@ -193,161 +307,96 @@ def save_user_preferences(user_id, location, preferences):
         preferences = {pref: 1 for pref in preferences}
 
     preferences_json = json.dumps(preferences)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO user_preferences (user_id, location, preferences)
-        VALUES (?, ?, ?)
-        ON CONFLICT(user_id)
-        DO UPDATE SET location=excluded.location, preferences=excluded.preferences
-    """, (user_id, location, preferences_json))
-    conn.commit()
-    conn.close()
+    with transaction(DB_PATH) as conn:
+        conn.execute("""
+            INSERT INTO user_preferences (user_id, location, preferences)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id)
+            DO UPDATE SET location=excluded.location, preferences=excluded.preferences
+        """, (user_id, location, preferences_json))
+        # the weights table is what likes update and the feed reads
+        conn.execute("DELETE FROM user_tag_weights WHERE user_id = ?", (user_id,))
+        conn.executemany("""
+            INSERT INTO user_tag_weights (user_id, tag, weight) VALUES (?, ?, ?)
+        """, [(user_id, tag, weight) for tag, weight in preferences.items()])
 
 def get_user_preferences(user_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT location, preferences FROM user_preferences WHERE user_id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
+    conn = get_connection(DB_PATH)
+    row = conn.execute(
+        "SELECT location FROM user_preferences WHERE user_id = ?", (user_id,)
+    ).fetchone()
     if row:
-        return {"location": row[0], "preferences": json.loads(row[1])}
+        weights = conn.execute(
+            "SELECT tag, weight FROM user_tag_weights WHERE user_id = ?", (user_id,)
+        ).fetchall()
+        return {"location": row[0], "preferences": dict(weights)}
     return None
 
-def like_event(user_id, event_data):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    event_global_id = event_data.get('global_id')
-    tags = event_data.get('tags', [])
-    if isinstance(tags, str):
-        tags = [t.strip().lower() for t in tags.split(",")]
-    else:
-        tags = [t.strip().lower() for t in tags]
-
-    # Check if liked
-    cursor.execute("""
-        SELECT 1 FROM liked_events
-        WHERE user_id = ? AND event_global_id = ?
-    """, (user_id, event_global_id))
-    already_liked = cursor.fetchone()
-
-    print(f"[DEBUG] Liking event: {event_data}")
-    print(f"[DEBUG] Already liked? {already_liked}")
-
-    # Get prefs
-    cursor.execute("SELECT preferences FROM user_preferences WHERE user_id = ?", (user_id,))
-    row = cursor.fetchone()
-    preferences = json.loads(row[0]) if row else {}
-    print(f"[DEBUG] Preferences before update: {preferences}")
-
-    if already_liked:
-        # UNLIKE
-        cursor.execute("""
+def get_popular_locations(limit=25):
+    """The locations the most users have set, most popular first (what the prefetcher keeps warm)."""
+    rows = get_connection(DB_PATH).execute("""
+        SELECT location FROM user_preferences
+        WHERE location IS NOT NULL AND TRIM(location) != ''
+        GROUP BY location
+        ORDER BY COUNT(*) DESC, location
+        LIMIT ?
+    """, (limit,)).fetchall()
+    return [location for (location,) in rows]
+
+def like_event(user_id, event: Event):
+    event_global_id = event.global_id
+    tags = event.tags or ([event.tag] if event.tag else [])
+    tags = sorted({t.strip().lower() for t in tags if t and t.strip()})
+
+    log.debug("User %s toggling like on %s", user_id, event_global_id)
+
+    # One write transaction: the toggle and the counter updates commit (or roll back) together,
+    # and each counter is bumped in place so concurrent likes can't overwrite each other
+    with transaction(DB_PATH) as conn:
+        unliked = conn.execute("""
             DELETE FROM liked_events
-            WHERE user_id = ? AND event_global_id = ?
-        """, (user_id, event_global_id))
-
-        for tag in tags:
-            if tag in preferences:
-                preferences[tag] = max(0, preferences[tag] - 1)
-
-        result = {"status": "success", "message": "Event unliked."}
-
-    else:
-        # LIKE
-        cursor.execute("""
-            INSERT INTO liked_events (user_id, event_global_id)
-            VALUES (?, ?)
-        """, (user_id, event_global_id))
-
+            WHERE user_id = ? AND event_id = (SELECT id FROM events WHERE global_id = ?)
+        """, (user_id, event_global_id)).rowcount
+
+        if unliked:
+            conn.executemany("""
+                UPDATE user_tag_weights SET weight = MAX(weight - 1, 0)
+                WHERE user_id = ? AND tag = ?
+            """, [(user_id, tag) for tag in tags])
+            return {"status": "success", "message": "Event unliked."}
+
+        event_id = upsert_event(conn, event)
+        conn.execute("INSERT INTO liked_events (user_id, event_id) VALUES (?, ?)", (user_id, event_id))
         # ensure event is saved
-        cursor.execute("""
-            SELECT 1 FROM saved_events WHERE event_global_id = ?
-        """, (event_global_id,))
-        exists_in_saved = cursor.fetchone()
-
-        if not exists_in_saved:
-            cursor.execute("""
-                INSERT INTO saved_events (user_id, event_global_id, event_source, event_title, event_date, event_location, event_url, type)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                user_id,
-                event_global_id,
-                event_data.get('source', 'unknown'),
-                event_data.get('title', 'No title'),
-                event_data.get('date', ''),
-                event_data.get('location', ''),
-                event_data.get('url', ''),
-                event_data.get('type', 'social')
-            ))
-
-        for tag in tags:
-            if tag:
-                preferences[tag] = preferences.get(tag, 0) + 1
-
-        result = {"status": "success", "message": "Event liked."}
+        conn.execute("INSERT OR IGNORE INTO saved_events (user_id, event_id) VALUES (?, ?)", (user_id, event_id))
 
-    preferences_json = json.dumps(preferences)
-    cursor.execute("""
-        UPDATE user_preferences
-        SET preferences = ?
-        WHERE user_id = ?
-    """, (preferences_json, user_id))
+        conn.executemany("""
+            INSERT INTO user_tag_weights (user_id, tag, weight) VALUES (?, ?, 1)
+            ON CONFLICT(user_id, tag) DO UPDATE SET weight = weight + 1
+        """, [(user_id, tag) for tag in tags])
+        return {"status": "success", "message": "Event liked."}
 
-    print(f"[DEBUG] Preferences after update: {preferences}")
-
-    conn.commit()
-    conn.close()
-    return result
+def get_liked_events_page(user_id: int, after=None, limit=PAGE_SIZE):
+    events, cursor = _page("""
+        SELECT le.id, e.global_id, e.source, e.title, e.time, e.location, e.url, e.type
+        FROM liked_events le
+        JOIN events e ON e.id = le.event_id
+        WHERE le.user_id = ? {after}
+        ORDER BY le.id DESC
+    """, user_id, after, limit, key='le.id')
+    log.debug("Fetched %d liked events for user %s", len(events), user_id)
+    return events, cursor
 
 def get_liked_events(user_id: int) -> list:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    print(f"[DEBUG] Fetching liked events for user {user_id}")
-
-    cursor.execute("""
-        SELECT se.event_global_id, se.event_source, se.event_title, se.event_date, 
-               se.event_location, se.event_url, se.type
-        FROM liked_events le
-        JOIN saved_events se ON le.event_global_id = se.event_global_id
-        WHERE le.user_id = ?
-        ORDER BY le.liked_at DESC
-    """, (user_id,))
-    
-    liked_events_raw = cursor.fetchall()
-    conn.close()
-
-    print(f"[DEBUG] Raw rows: {liked_events_raw}")
-
-    liked_events = []
-    for row in liked_events_raw:
-        liked_events.append({
-            "global_id": row[0],
-            "source": row[1],
-            "title": row[2],
-            "date": row[3],
-            "location": row[4],
-            "url": row[5],
-            "type": row[6]
-        })
-    
-    return liked_events
+    return get_liked_events_page(user_id, limit=None)[0]
 
 def get_events_posted_by_user(user_id: int) -> list:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    posted_events_raw = get_connection(DB_PATH).execute("""
         SELECT id, title, location, event_time, timezone
         FROM user_events
         WHERE user_id = ?
         ORDER BY event_time DESC
-    """, (user_id,))
-    
-    posted_events_raw = cursor.fetchall()
-    conn.close()
+    """, (user_id,)).fetchall()
 
     posted_events = []
     for row in posted_events_raw:
@@ -362,16 +411,11 @@ def get_events_posted_by_user(user_id: int) -> list:
     return posted_events
 
 def get_user_info(user_id: int) -> dict:
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
+    row = get_connection(DB_PATH).execute("""
         SELECT name, email
         FROM users
         WHERE id = ?
-    """, (user_id,))
-    row = cursor.fetchone()
-    conn.close()
+    """, (user_id,)).fetchone()
 
     if row:
         return {"name": row[0], "email": row[1]}
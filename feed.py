@@ -0,0 +1,145 @@
+import time
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# --- BATCHING: 5 events per batch, 70% from liked tags (weighted), 30% from unliked tags ---
+BATCH_SIZE = 5
+LIKE_RATIO = 0.7
+MAX_USER_EVENTS = 200  # community events pulled into one feed
+NEARBY_RADIUS_MILES = 50
+
+FEED_TTL = 30 * 60   # a feed cursor stays valid for 30 minutes
+MAX_FEEDS = 1000     # feeds kept per worker process, least recently used dropped first
+
+
+class FeedSession:
+    """A user's For You feed, ordered once and then served batch by batch."""
+
+    def __init__(self, token, user_id, events):
+        self.token = token
+        self.user_id = user_id
+        self.events = events
+        self.created_at = time.time()
+
+    def expired(self):
+        return time.time() - self.created_at > FEED_TTL
+
+    def batch(self, batch_num):
+        """Return (events in batch batch_num, whether more batches follow). Batches start at 1."""
+        start_idx = (max(batch_num, 1) - 1) * BATCH_SIZE
+        end_idx = start_idx + BATCH_SIZE
+        return self.events[start_idx:end_idx], end_idx < len(self.events)
+
+
+def score_events(tags, user_prefs, rng):
+    """Score every candidate in one vectorized pass.
+
+    tags is an array of tag names, one per event. Returns (liked, keys): a boolean mask of
+    events whose tag the user likes, and a sort key per event where lower means "serve sooner".
+
+    Liked events get the arrival time of a Poisson process per tag whose rate is the tag's
+    weight, accumulated over the events of that tag in their original order. Merging those
+    processes picks each next event's tag with probability proportional to its weight among
+    the tags that still have events left, which is the same draw as a weighted choice of tag
+    per slot. Unliked events get rank-within-tag plus jitter, so unliked tags take turns in a
+    random order.
+    """
+    n = len(tags)
+    tag_names, tag_idx = np.unique(tags, return_inverse=True)
+    tag_weights = np.array([max(user_prefs.get(t, 0), 0) for t in tag_names], dtype=float)
+    weights = tag_weights[tag_idx]
+    liked = weights > 0
+
+    # rank of each event within its tag, keeping the original order inside a tag
+    order = np.lexsort((np.arange(n), tag_idx))
+    group_start = np.searchsorted(tag_idx[order], tag_idx[order])
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n) - group_start
+
+    keys = rank + rng.random(n)
+    if liked.any():
+        gaps = rng.exponential(1.0 / np.where(liked, weights, 1.0))[order]
+        arrival = np.cumsum(gaps)
+        # restart the running sum at each tag boundary
+        arrival -= np.concatenate(([0.0], arrival))[group_start]
+        keys[order[liked[order]]] = arrival[liked[order]]
+    return liked, keys
+
+
+def order_feed(all_events, user_prefs, rng):
+    """Flatten events into batch order, mixing liked and unliked tags per LIKE_RATIO.
+
+    rng is a numpy Generator; the same seed gives the same order.
+    """
+    n = len(all_events)
+    if n == 0:
+        return []
+    tags = np.array([e.tag or 'other' for e in all_events])
+    liked, keys = score_events(tags, user_prefs, rng)
+
+    liked_idx = np.flatnonzero(liked)
+    liked_idx = liked_idx[np.argsort(keys[liked_idx], kind='stable')]
+    unliked_idx = np.flatnonzero(~liked)
+    unliked_idx = unliked_idx[np.argsort(keys[unliked_idx], kind='stable')]
+
+    # Calculate how many liked/unliked events per batch
+    num_liked = round(BATCH_SIZE * LIKE_RATIO)
+    num_unliked = BATCH_SIZE - num_liked
+
+    # Full batches with the exact liked/unliked mix, shuffled within each batch
+    full = min(len(liked_idx) // num_liked if num_liked else n, len(unliked_idx) // num_unliked if num_unliked else n)
+    batches = np.hstack((
+        liked_idx[:full * num_liked].reshape(full, num_liked),
+        unliked_idx[:full * num_unliked].reshape(full, num_unliked),
+    ))
+    batches = np.take_along_axis(batches, np.argsort(rng.random(batches.shape), axis=1), axis=1)
+
+    # Once one side runs out, whatever is left is served in random order
+    rest = np.concatenate((liked_idx[full * num_liked:], unliked_idx[full * num_unliked:]))
+    rest = rest[rng.permutation(len(rest))]
+
+    return [all_events[i] for i in np.concatenate((batches.ravel(), rest))]
+
+
+# ---------- SERVER-SIDE FEED STORE ----------
+
+_feeds = OrderedDict()
+_feeds_lock = threading.Lock()
+
+
+def create_feed(user_id, all_events, user_prefs, token=None):
+    """Order a feed once and store it under a cursor token.
+
+    The order is seeded from the token, so rebuilding a feed for a known token (e.g. after it
+    expired or on another worker process) gives the same batches for the same events.
+    """
+    token = token or secrets.token_urlsafe(16)
+    seed = int.from_bytes(hashlib.sha256(token.encode('utf-8')).digest()[:8], 'big')
+    feed = FeedSession(token, user_id, order_feed(all_events, user_prefs, np.random.default_rng(seed)))
+    with _feeds_lock:
+        _feeds[token] = feed
+        _feeds.move_to_end(token)
+        while len(_feeds) > MAX_FEEDS:
+            _feeds.popitem(last=False)
+    return feed
+
+
+def get_feed(token, user_id):
+    """Return the stored feed for token if it belongs to user_id and hasn't expired."""
+    if not token:
+        return None
+    with _feeds_lock:
+        feed = _feeds.get(token)
+        if feed is None:
+            return None
+        if feed.expired():
+            del _feeds[token]
+            return None
+        if feed.user_id != user_id:
+            # someone else's token: refuse it, but leave the owner's feed alone
+            return None
+        _feeds.move_to_end(token)
+        return feed
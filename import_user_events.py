@@ -0,0 +1,33 @@
+"""Bulk-load user events from CSV or JSON-lines files.
+
+    python import_user_events.py partners.csv feed.jsonl [--chunk-size 1000] [--restart]
+
+Columns/keys: title, location, event_time, timezone (required), tag, description.
+Interrupted imports pick up where they stopped when run again with the same file;
+finished ones are imported again from the top.
+"""
+import argparse
+from apis.user_events import init_user_events_db
+from apis.event_import import import_file, CHUNK_SIZE
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--restart', action='store_true', help='ignore saved progress and import from the top')
+    args = parser.parse_args()
+
+    init_user_events_db()
+    for path in args.paths:
+        try:
+            report = import_file(path, fmt=args.format, chunk_size=args.chunk_size, resume=not args.restart)
+        except ValueError as e:
+            print(f"{path}: {e}")
+            continue
+        if report["skipped"]:
+            print(f"{path}: resumed after row {report['skipped']}")
+        for error in report["errors"]:
+            print(f"{path}: row {error['row']}: {error['error']}")
+        print(f"{path}: {report['imported']} imported, {report['rejected']} rejected "
+              f"in {report['seconds']}s ({report['rows_per_sec']} rows/sec)")
@@ -0,0 +1,10 @@
+from apis.db_pool import transaction
+from apis.user_events import DB_PATH, ensure_city_column
+
+def add_city_column_to_user_events(db_path=DB_PATH):
+    with transaction(db_path) as conn:
+        backfilled = ensure_city_column(conn)
+    print(f"Column 'city' and feed indexes in place; backfilled {backfilled} events.")
+
+if __name__ == "__main__":
+    add_city_column_to_user_events()
@@ -0,0 +1,11 @@
+from apis.db_pool import transaction
+from apis.user_events import DB_PATH, ensure_geo_columns
+
+def add_geo_columns_to_user_events(db_path=DB_PATH):
+    with transaction(db_path) as conn:
+        geocoded = ensure_geo_columns(conn)
+        missing = conn.execute("SELECT COUNT(*) FROM user_events WHERE lat IS NULL").fetchone()[0]
+    print(f"Columns 'lat', 'lon', 'geo_cell' in place; geocoded {geocoded} events, {missing} not in the gazetteer.")
+
+if __name__ == "__main__":
+    add_geo_columns_to_user_events()
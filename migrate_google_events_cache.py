@@ -0,0 +1,30 @@
+import os
+import json
+import time
+from apis.google_events import CACHE_FILE, CACHE_TTL, STALE_TTL, events_cache, from_google
+
+def import_json_cache(cache_file=CACHE_FILE):
+    """Copy still-servable entries from the old google_events_cache.json into the shared cache."""
+    if not os.path.exists(cache_file):
+        print(f"No legacy cache at {cache_file}.")
+        return
+    try:
+        with open(cache_file, 'r') as f:
+            legacy = json.load(f)
+    except Exception as e:
+        print(f"Error reading {cache_file}: {e}")
+        return
+
+    now = time.time()
+    imported = 0
+    for cache_key, cached in legacy.items():
+        fetched_at = cached.get('timestamp', 0)
+        remaining = CACHE_TTL + STALE_TTL - (now - fetched_at)
+        if remaining > 0:
+            events = [from_google(e).to_dict() for e in cached.get('events', [])]
+            events_cache.set(cache_key, {'fetched_at': fetched_at, 'events': events}, ttl=remaining)
+            imported += 1
+    print(f"Imported {imported} of {len(legacy)} cached searches ({len(legacy) - imported} expired).")
+
+if __name__ == "__main__":
+    import_json_cache()
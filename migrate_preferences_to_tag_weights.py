@@ -0,0 +1,11 @@
+from db import DB_PATH, ensure_tag_weights
+from apis.db_pool import transaction
+
+def migrate_preferences_to_tag_weights(db_path=DB_PATH):
+    with transaction(db_path) as conn:
+        migrated = ensure_tag_weights(conn)
+        rows = conn.execute("SELECT COUNT(*) FROM user_tag_weights").fetchone()[0]
+    print(f"Table 'user_tag_weights' in place; migrated preferences for {migrated} users ({rows} tag rows total).")
+
+if __name__ == "__main__":
+    migrate_preferences_to_tag_weights()
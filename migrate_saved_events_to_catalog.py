@@ -0,0 +1,20 @@
+import os
+import logging
+from db import DB_PATH, ensure_event_catalog
+from apis.db_pool import transaction, get_connection
+
+def migrate_saved_events_to_catalog(db_path=DB_PATH):
+    before = os.path.getsize(db_path)
+    with transaction(db_path) as conn:
+        created, _ = ensure_event_catalog(conn)  # logs the likes it had to drop
+        counts = [conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('events', 'saved_events', 'liked_events')]
+    # the dropped tables' pages are only reused, not returned to the OS, until a VACUUM
+    get_connection(db_path).execute("VACUUM")
+    print(f"Catalog in place: {created} events created; {counts[0]} events, {counts[1]} saved and "
+          f"{counts[2]} liked edges in total.")
+    print(f"{db_path}: {before / 1e6:.1f} MB -> {os.path.getsize(db_path) / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    migrate_saved_events_to_catalog()
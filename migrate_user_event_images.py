@@ -0,0 +1,36 @@
+import os
+from apis import uploads
+from apis.db_pool import transaction
+from apis.user_events import DB_PATH, ensure_image_column
+
+def migrate_user_event_images(db_path=DB_PATH):
+    """Move '[IMAGE]' URLs into image_url, then re-store every uploaded image under its content hash
+    with resized copies (uploads from before the pipeline kept their client file names)."""
+    with transaction(db_path) as conn:
+        moved = ensure_image_column(conn)
+        urls = [row[0] for row in conn.execute("SELECT DISTINCT image_url FROM user_events WHERE image_url IS NOT NULL")]
+    converted, missing = 0, 0
+    for url in urls:
+        name = uploads.uploaded_name(url)
+        if name is None or uploads.is_variant(name):
+            continue
+        path = os.path.join(uploads.UPLOAD_DIR, name)
+        if not os.path.exists(path):
+            missing += 1
+            continue
+        try:
+            with open(path, 'rb') as f:
+                stored = uploads.store_image(f, max_bytes=None)
+            new_url = uploads.card_url(stored) or uploads.upload_url(stored)
+        except (uploads.UploadRejected, OSError, ValueError) as e:
+            print(f"Skipping {url}: {e}")
+            continue
+        if new_url != url:
+            with transaction(db_path) as conn:
+                conn.execute("UPDATE user_events SET image_url = ? WHERE image_url = ?", (new_url, url))
+            converted += 1
+    print(f"Moved {moved} image URLs out of descriptions; re-stored {converted} uploads, {missing} files missing.")
+    print("Pre-migration files in the upload folder are left in place.")
+
+if __name__ == "__main__":
+    migrate_user_event_images()
@@ -1,4 +1,4 @@
-from apis.user_events import add_user_event
+from apis.event_import import ingest
 
 
 import random
@@ -64,14 +64,6 @@ for i in range(100):
     })
 
 
-for event in sample_events:
-    add_user_event(
-        event["title"],
-        event["location"],
-        event["event_time"],
-        event["timezone"],
-        event.get("tag"),
-        event.get("description")
-    )
+report = ingest(sample_events)
 
-print("User events database populated with sample events.")
+print(f"User events database populated with {report['imported']} sample events ({report['rows_per_sec']} rows/sec).")
@@ -0,0 +1,35 @@
+"""Keep the Google events and tags of the most popular user locations warm.
+
+    python prefetch_worker.py [--top 25] [--interval 900] [--margin 3600] [--once]
+
+Run one per deployment; entries are refreshed shortly before they go stale, so the first
+For You visit of the day finds them cached instead of waiting on SerpAPI and tagging. The app's
+workers read the refreshed entries from the shared cache table within CACHE_MEMORY_TTL seconds.
+"""
+import logging
+import argparse
+from db import init_auth_db, get_popular_locations
+from apis.prefetch import Prefetcher, run_once, PREFETCH_INTERVAL, PREFETCH_TOP, REFRESH_MARGIN
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=PREFETCH_TOP, help='how many locations to keep warm')
+    parser.add_argument('--interval', type=float, default=PREFETCH_INTERVAL, help='seconds between passes')
+    parser.add_argument('--margin', type=float, default=REFRESH_MARGIN,
+                        help='refresh entries that go stale within this many seconds')
+    parser.add_argument('--once', action='store_true', help='run a single pass and exit')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    init_auth_db()
+    if args.once:
+        locations = get_popular_locations(args.top)
+        report = run_once(locations, margin=args.margin)
+        print(f"{report['checked']} locations checked, {report['refreshed']} refreshed, {report['failed']} failed")
+    else:
+        worker = Prefetcher(get_popular_locations, interval=args.interval, top=args.top, margin=args.margin)
+        worker.start()
+        try:
+            worker.join()
+        except KeyboardInterrupt:
+            worker.stop()
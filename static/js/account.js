@@ -0,0 +1,52 @@
+document.addEventListener("DOMContentLoaded", () => {
+  const list = document.getElementById("liked-events");
+  const loading = document.getElementById("liked-loading");
+  const more = document.getElementById("liked-more");
+  const empty = document.getElementById("liked-empty");
+  let next = null;
+
+  function escapeHtml(text) {
+    const div = document.createElement("div");
+    div.textContent = text == null ? "" : String(text);
+    return div.innerHTML;
+  }
+
+  function createLikedCard(event) {
+    const card = document.createElement("div");
+    card.className = "border-l-4 border-green-500 bg-green-50 p-4 rounded-r-lg";
+    card.innerHTML = `
+      <h4 class="font-semibold text-gray-800">${escapeHtml(event.title)}</h4>
+      <p class="text-gray-600 text-sm mt-1">
+        📍 ${escapeHtml(event.location || "Location not available")}
+        ${event.time ? `| 📅 ${escapeHtml(event.time)}` : ""}
+      </p>
+      <span class="inline-block mt-2 px-2 py-1 bg-green-200 text-green-800 text-xs rounded-full">
+        ${escapeHtml(event.source || "Unknown")} Event
+      </span>`;
+    return card;
+  }
+
+  async function loadPage() {
+    more.disabled = true;
+    const url = next ? `/api/liked_events?after=${encodeURIComponent(next)}` : "/api/liked_events";
+    try {
+      const response = await fetch(url);
+      const data = await response.json();
+      if (!response.ok) throw new Error(data.message);
+
+      data.events.forEach((event) => list.appendChild(createLikedCard(event)));
+      next = data.next;
+      more.classList.toggle("hidden", !next);
+      empty.classList.toggle("hidden", list.children.length > 0);
+      loading.classList.add("hidden");
+    } catch (error) {
+      console.error("Error fetching liked events:", error);
+      loading.textContent = "Couldn't load liked events.";
+    } finally {
+      more.disabled = false;
+    }
+  }
+
+  more.addEventListener("click", loadPage);
+  loadPage();
+});
@@ -72,11 +72,12 @@ document.addEventListener("DOMContentLoaded", () => {
     }, 3000);
   }
 
-  async function fetchEvents(location, interests) {
-    results.innerHTML =
-      '<p class="text-gray-500 text-center">Searching for events...</p>'; // Loading message
-    resultsContainer.classList.remove("hidden");
-
+  // Fetches /api/events (one search runs a single provider, so there is nothing to render
+  // progressively) and hands the events to onEvents. Complete results are cacheable, so a repeat
+  // search may be answered by the browser's cache. Resolves to the number of events received,
+  // or null after an error response.
+  async function fetchEvents(location, interests, onEvents) {
+    let found = 0;
     try {
       const response = await fetch(
         `/api/events?location=${encodeURIComponent(
@@ -90,34 +91,55 @@ document.addEventListener("DOMContentLoaded", () => {
         results.innerHTML = `<p class="text-gray-500 text-center">Error: ${
           data.error || "Failed to load events."
         }</p>`;
-        return [];
+        return null;
       }
 
       if (data.events && data.events.length > 0) {
-        return data.events;
+        found = data.events.length;
+        onEvents(data.events);
       }
-      return [];
     } catch (error) {
       console.error("Error fetching events:", error);
-      return [];
     }
+    return found;
   }
 
-  async function fetchSavedEvents() {
+  // Searches reuse this page's copy of the saved list; saveEvent and deleteEvent drop it, and a
+  // reload revalidates each page against its ETag (a 304 when nothing changed)
+  let savedEventsPromise = null;
+
+  function fetchSavedEvents() {
+    if (!savedEventsPromise) {
+      savedEventsPromise = loadSavedEvents();
+    }
+    return savedEventsPromise;
+  }
+
+  async function loadSavedEvents() {
     try {
-      const response = await fetch("/api/saved_events");
-      const data = await response.json();
+      // The API pages its results; results cards need every saved id, so follow the cursors
+      const events = [];
+      let next = null;
+      do {
+        const url = next ? `/api/saved_events?limit=100&after=${encodeURIComponent(next)}` : "/api/saved_events?limit=100";
+        const response = await fetch(url);
+        const data = await response.json();
+
+        if (!response.ok) {
+          // If the response is not OK, something went wrong (e.g., not logged in)
+          console.error("Error fetching saved events:", data.message);
+          // savedEventsDiv.innerHTML = `<p class="text-red-500">Error loading saved events: ${data.message}</p>`;
+          savedEventsContainer.classList.add("hidden"); // Hide if not logged in or error
+          savedEventsPromise = null;
+          return [];
+        }
+        events.push(...(data.events || []));
+        next = data.next;
+      } while (next);
 
-      if (!response.ok) {
-        // If the response is not OK, something went wrong (e.g., not logged in)
-        console.error("Error fetching saved events:", data.message);
-        // savedEventsDiv.innerHTML = `<p class="text-red-500">Error loading saved events: ${data.message}</p>`;
-        savedEventsContainer.classList.add("hidden"); // Hide if not logged in or error
-        return [];
-      }
-      if (data.events && data.events.length > 0) {
+      if (events.length > 0) {
         savedEventsContainer.classList.remove("hidden");
-        return data.events;
+        return events;
       } else {
         savedEventsContainer.classList.add("hidden");
         return [];
@@ -125,6 +147,7 @@ document.addEventListener("DOMContentLoaded", () => {
     } catch (error) {
       console.error("Network error fetching saved events:", error);
       savedEventsContainer.classList.add("hidden"); // Hide if network error
+      savedEventsPromise = null;
       return [];
     }
   }
@@ -141,6 +164,7 @@ document.addEventListener("DOMContentLoaded", () => {
       const result = await response.json();
 
       if (response.ok) {
+        savedEventsPromise = null;
         showNotification(result.message, "success");
         return true;
       } else {
@@ -164,6 +188,7 @@ document.addEventListener("DOMContentLoaded", () => {
       const result = await response.json();
 
       if (response.ok) {
+        savedEventsPromise = null;
         showNotification(result.message, "success");
         return true;
       }
@@ -216,96 +241,107 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   }
 
-  function renderEvents(events, savedEvents) {
-    results.innerHTML = "";
-
-    if (!events.length) {
-      results.innerHTML =
-        '<p class="text-gray-500">No events found matching your criteria.</p>';
-      return;
-    }
-
+  async function searchEvents(location, interests, savedEvents) {
     const savedGlobalIds = new Set(savedEvents.map((e) => e.global_id));
+    results.innerHTML = "";
+    const status = document.createElement("p");
+    status.className = "text-gray-500 text-center";
+    status.textContent = "Searching for events...";
+    results.appendChild(status);
+    resultsContainer.classList.remove("hidden");
 
-    events.forEach((event) => {
-      const isSaved = savedGlobalIds.has(event.globalId_id);
-      const eventEl = document.createElement("div");
-      eventEl.className =
-        "result-item bg-white rounded-lg shadow-md p-4 border-l-4 border-orange-500";
-
-      eventEl.innerHTML = `
-        <div>
-            <h3 class="font-semibold text-lg">${event.title}</h3>
-            <div class="flex items-center text-gray-600 mt-1">
-                <span class="mr-1">📍</span>
-                <span>${event.location}</span>
-            </div>
-            ${
-              event.url
-                ? `<a href="${event.url}" target="_blank" class="text-blue-500 hover:underline text-sm mt-1 inline-block">More Info</a>`
-                : ""
-            }
-        </div>
-        <button 
-            data-global-id="${event.global_id}" 
-            data-source="${event.source}"
-            data-title="${event.title}"
-            data-location="${event.location}"
-            data-url="${event.url}"
-            class="save-toggle-btn mt-3 px-3 py-1 rounded text-white font-semibold ${
-              isSaved
-                ? "bg-green-600 hover:bg-green-700"
-                : "bg-orange-500 hover:bg-orange-600"
-            }">
-            ${isSaved ? "Saved" : "Save"}
-        </button>
-            `;
-
-      results.appendChild(eventEl);
+    // Cards go in above the status line
+    const found = await fetchEvents(location, interests, (events) => {
+      events.forEach((event) =>
+        results.insertBefore(createEventCard(event, savedGlobalIds), status)
+      );
     });
 
-    // Add event listeners for save buttons
-    document.querySelectorAll("#results button").forEach((btn) => {
-      btn.addEventListener("click", async (e) => {
-        const globalId = btn.getAttribute("data-global-id");
-        const source = btn.getAttribute("data-source");
-        const title = btn.getAttribute("data-title");
-        const date = btn.getAttribute("data-date");
-        const location = btn.getAttribute("data-location");
-        const url = btn.getAttribute("data-url");
-
-        const eventData = {
-          global_id: globalId,
-          source,
-          title,
-          date,
-          location,
-          url,
-        };
-
-        let savedEventStatus = savedGlobalIds.has(globalId);
-
-        if (savedEventStatus) {
-          const success = await deleteEvent(globalId);
-          if (success) {
-            savedGlobalIds.delete(globalId);
-            btn.textContent = "Save";
-            btn.classList.remove("bg-green-600", "hover:bg-green-700");
-            btn.classList.add("bg-orange-500", "hover:bg-orange-600");
-            renderSavedEvents();
-          }
-        } else {
-          const success = await saveEvent(eventData);
-          if (success) {
-            savedGlobalIds.add(globalId);
-            btn.textContent = "Saved";
-            btn.classList.remove("bg-orange-500", "hover:bg-orange-600");
-            btn.classList.add("bg-green-600", "hover:bg-green-700");
-            renderSavedEvents();
+    if (found === null) return;
+    if (found === 0) {
+      status.textContent = "No events found matching your criteria.";
+    } else {
+      status.remove();
+    }
+  }
+
+  function createEventCard(event, savedGlobalIds) {
+    const isSaved = savedGlobalIds.has(event.global_id);
+    const eventEl = document.createElement("div");
+    eventEl.className =
+      "result-item bg-white rounded-lg shadow-md p-4 border-l-4 border-orange-500";
+
+    eventEl.innerHTML = `
+      <div>
+          <h3 class="font-semibold text-lg">${event.title}</h3>
+          <div class="flex items-center text-gray-600 mt-1">
+              <span class="mr-1">📍</span>
+              <span>${event.location}</span>
+          </div>
+          ${
+            event.url
+              ? `<a href="${event.url}" target="_blank" class="text-blue-500 hover:underline text-sm mt-1 inline-block">More Info</a>`
+              : ""
           }
+      </div>
+      <button 
+          data-global-id="${event.global_id}" 
+          data-source="${event.source}"
+          data-title="${event.title}"
+          data-location="${event.location}"
+          data-url="${event.url}"
+          class="save-toggle-btn mt-3 px-3 py-1 rounded text-white font-semibold ${
+            isSaved
+              ? "bg-green-600 hover:bg-green-700"
+              : "bg-orange-500 hover:bg-orange-600"
+          }">
+          ${isSaved ? "Saved" : "Save"}
+      </button>
+          `;
+
+    // Add event listener for the save button
+    const btn = eventEl.querySelector("button");
+    btn.addEventListener("click", async (e) => {
+      const globalId = btn.getAttribute("data-global-id");
+      const source = btn.getAttribute("data-source");
+      const title = btn.getAttribute("data-title");
+      const date = btn.getAttribute("data-date");
+      const location = btn.getAttribute("data-location");
+      const url = btn.getAttribute("data-url");
+
+      const eventData = {
+        global_id: globalId,
+        source,
+        title,
+        date,
+        location,
+        url,
+      };
+
+      let savedEventStatus = savedGlobalIds.has(globalId);
+
+      if (savedEventStatus) {
+        const success = await deleteEvent(globalId);
+        if (success) {
+          savedGlobalIds.delete(globalId);
+          btn.textContent = "Save";
+          btn.classList.remove("bg-green-600", "hover:bg-green-700");
+          btn.classList.add("bg-orange-500", "hover:bg-orange-600");
+          renderSavedEvents();
         }
-      });
+      } else {
+        const success = await saveEvent(eventData);
+        if (success) {
+          savedGlobalIds.add(globalId);
+          btn.textContent = "Saved";
+          btn.classList.remove("bg-orange-500", "hover:bg-orange-600");
+          btn.classList.add("bg-green-600", "hover:bg-green-700");
+          renderSavedEvents();
+        }
+      }
     });
+
+    return eventEl;
   }
 
   // --- Event Listeners and Initial Load ---
@@ -324,8 +360,7 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     const savedEventsForUser = await fetchSavedEvents();
-    const searchResults = await fetchEvents(location, interests);
-    renderEvents(searchResults, savedEventsForUser);
+    await searchEvents(location, interests, savedEventsForUser);
   });
 
   // Events search event listener
@@ -342,8 +377,7 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     const savedEventsForUser = await fetchSavedEvents();
-    const searchResults = await fetchEvents(location, interests);
-    renderEvents(searchResults, savedEventsForUser);
+    await searchEvents(location, interests, savedEventsForUser);
   });
 
   // Initialize the page with food tab active
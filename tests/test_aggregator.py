@@ -0,0 +1,88 @@
+import time
+import unittest
+from apis.aggregator import fan_out, start, as_completed
+
+
+def stub_provider(events, delay=0.0, error=None):
+    def provider():
+        time.sleep(delay)
+        if error:
+            raise error
+        return events
+    return provider
+
+
+class TestFanOut(unittest.TestCase):
+    def test_all_providers_return(self):
+        results, status = fan_out({
+            'yelp': stub_provider([{'title': 'Taco Stand'}], delay=0.05),
+            'google': stub_provider([{'title': 'Street Fair'}], delay=0.05),
+        }, deadline=1)
+        self.assertEqual(results['yelp'], [{'title': 'Taco Stand'}])
+        self.assertEqual(results['google'], [{'title': 'Street Fair'}])
+        self.assertEqual(status, {'yelp': 'ok', 'google': 'ok'})
+
+    def test_providers_run_in_parallel(self):
+        providers = {name: stub_provider([name], delay=0.2) for name in ('yelp', 'reddit', 'google')}
+        start = time.monotonic()
+        results, _ = fan_out(providers, deadline=1)
+        elapsed = time.monotonic() - start
+        self.assertEqual(len(results), 3)
+        self.assertLess(elapsed, 0.5)
+
+    def test_slow_provider_returns_partial_results(self):
+        start = time.monotonic()
+        results, status = fan_out({
+            'yelp': stub_provider([{'title': 'Taco Stand'}], delay=0.05),
+            'google': stub_provider([{'title': 'Too Late'}], delay=1.0),
+        }, deadline=0.2)
+        elapsed = time.monotonic() - start
+        self.assertEqual(results, {'yelp': [{'title': 'Taco Stand'}]})
+        self.assertEqual(status['google'], 'timeout')
+        self.assertLess(elapsed, 0.6)
+
+    def test_per_provider_deadline(self):
+        results, status = fan_out({
+            'yelp': stub_provider(['a'], delay=0.3),
+            'reddit': stub_provider(['b'], delay=0.3),
+        }, deadline=0.1, deadlines={'reddit': 1})
+        self.assertEqual(status, {'yelp': 'timeout', 'reddit': 'ok'})
+        self.assertEqual(results, {'reddit': ['b']})
+
+    def test_failing_provider_is_skipped(self):
+        results, status = fan_out({
+            'yelp': stub_provider([], error=RuntimeError('502 from upstream')),
+            'reddit': stub_provider(['free pizza']),
+        }, deadline=1)
+        self.assertEqual(results, {'reddit': ['free pizza']})
+        self.assertEqual(status['yelp'], 'error')
+
+    def test_none_result_becomes_empty_list(self):
+        results, _ = fan_out({'google': stub_provider(None)}, deadline=1)
+        self.assertEqual(results['google'], [])
+
+
+class TestAsCompleted(unittest.TestCase):
+    def test_yields_fastest_provider_first(self):
+        futures = start({
+            'google': stub_provider(['slow'], delay=0.3),
+            'yelp': stub_provider(['fast'], delay=0.02),
+        })
+        began = time.monotonic()
+        stream = as_completed(futures, deadline=1)
+        self.assertEqual(next(stream), ('yelp', ['fast'], 'ok'))
+        # the first result doesn't wait on the slow provider
+        self.assertLess(time.monotonic() - began, 0.2)
+        self.assertEqual(list(stream), [('google', ['slow'], 'ok')])
+
+    def test_timeouts_and_errors_are_yielded(self):
+        futures = start({
+            'yelp': stub_provider([], error=RuntimeError('502 from upstream')),
+            'google': stub_provider(['too late'], delay=1.0),
+        })
+        outcomes = {name: (events, status) for name, events, status in as_completed(futures, deadline=0.1)}
+        self.assertEqual(outcomes, {'yelp': ([], 'error'), 'google': ([], 'timeout')})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,41 @@
-
-
-import unittest
 import os
+import tempfile
+import unittest
+from unittest import mock
 from dotenv import load_dotenv
 load_dotenv()
+
+# The app creates its databases at import; keep them (and the caches) out of the checked-in files
+_workdir = tempfile.mkdtemp()
+os.environ['USER_INFO_DB'] = os.path.join(_workdir, 'user_info.db')
+os.environ['USER_EVENTS_DB'] = os.path.join(_workdir, 'user_events.db')
+os.environ['CACHE_DB'] = os.path.join(_workdir, 'cache.db')
+os.environ['UPLOAD_DIR'] = os.path.join(_workdir, 'uploads')
+
+import io
+import app as app_module
 from app import app
 import db
+from apis import user_events
+from apis import event_handler, reddit_api, yelp
+from apis.event import Event
 from apis.event_handler import search_all_events
-from apis.yelp import format_date, search_yelp_events
+from apis.yelp import format_date, search_yelp_businesses
 from apis.reddit_api import genai_call, search_reddit_events
 
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        pass
+
 class AppTestCase(unittest.TestCase):
     def setUp(self):
         self.app = app.test_client()
@@ -55,6 +81,103 @@ class AppTestCase(unittest.TestCase):
         response = self.app.post('/api/delete_saved_event', json={})
         self.assertEqual(response.status_code, 400)
 
+    def test_api_saved_events_pages(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 99
+        for i in range(3):
+            db.save_event(99, Event('google', f'page{i}', f'Event {i}'))
+        first = self.app.get('/api/saved_events?limit=2').get_json()
+        self.assertEqual(len(first['events']), 2)
+        rest = self.app.get(f"/api/saved_events?limit=2&after={first['next']}").get_json()
+        self.assertEqual([e['title'] for e in rest['events']], ['Event 0'])
+        self.assertIsNone(rest['next'])
+        self.assertEqual(self.app.get('/api/liked_events?after=oops').status_code, 400)
+
+    def test_saved_events_revalidate(self):
+        with self.app.session_transaction() as sess:
+            sess['user_id'] = 98
+        db.save_event(98, Event('google', 'etag1', 'Event 1'))
+        etag = self.app.get('/api/saved_events').headers['ETag']
+        self.assertEqual(self.app.get('/api/saved_events', headers={'If-None-Match': etag}).status_code, 304)
+        db.save_event(98, Event('google', 'etag2', 'Event 2'))
+        changed = self.app.get('/api/saved_events', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.get_json()['events']), 2)
+
+    def test_api_events_shared_only_when_complete(self):
+        events = [Event('google', str(i), f'Fair {i}') for i in range(3)]
+        with mock.patch.object(app_module, 'search_events', return_value=(events, {'yelp': 'ok', 'google': 'ok'})):
+            response = self.app.get('/api/events?location=Austin')
+        self.assertTrue(response.headers['Cache-Control'].startswith('public, max-age='))
+        self.assertNotIn('Cookie', response.headers.get('Vary', ''))
+        with mock.patch.object(app_module, 'search_events', return_value=(events, {'yelp': 'timeout', 'google': 'ok'})):
+            response = self.app.get('/api/events?location=Austin')
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+
+    def test_post_event_with_image(self):
+        form = {'title': 'Art Walk', 'location': 'Austin, TX', 'event_time': '2025-08-01T18:00',
+                'timezone': 'America/Chicago', 'tag': 'art', 'description': 'Bring friends'}
+        png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 100
+        with mock.patch.object(app_module, 'process_image') as process:
+            response = self.app.post('/post_event', content_type='multipart/form-data',
+                                     data={**form, 'image': (io.BytesIO(png), 'same-name.png')})
+            self.assertEqual(response.status_code, 302)
+            rejected = self.app.post('/post_event', content_type='multipart/form-data',
+                                     data={**form, 'image': (io.BytesIO(b'MZ not an image'), 'same-name.png')})
+            self.assertIn(b'PNG, JPEG, GIF or WebP', rejected.data)
+        name, = process.call_args.args[:1]
+        self.assertEqual(process.call_args.args[1], user_events.replace_image_url)
+        event = [e for e in user_events.get_user_events() if e.title == 'Art Walk'][-1]
+        self.assertEqual((event.description, event.image), ('Bring friends', f'/static/uploads/{name}'))
+        self.assertEqual(os.listdir(os.path.join(_workdir, 'uploads')), [name])
+
+    def test_oversized_upload_refused_before_reading(self):
+        self.assertGreater(app.config['MAX_CONTENT_LENGTH'], app_module.MAX_UPLOAD_BYTES)
+        form = {'title': 'Big Picture', 'location': 'Austin, TX', 'event_time': '2025-08-01T18:00',
+                'timezone': 'America/Chicago', 'tag': 'art'}
+        png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 4096
+        with mock.patch.dict(app.config, {'MAX_CONTENT_LENGTH': 1024}), \
+                mock.patch.object(app_module, 'store_image') as store_image:
+            response = self.app.post('/post_event', content_type='multipart/form-data',
+                                     data={**form, 'image': (io.BytesIO(png), 'big.png')})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn(b'Images must be under', response.data)
+        store_image.assert_not_called()
+        self.assertNotIn('Big Picture', [e.title for e in user_events.get_user_events()])
+
+    def test_imports_have_their_own_size_limit(self):
+        csv = 'title,location,event_time,timezone\n' + 'Fair,"Austin, TX",2025-08-01T18:00,America/Chicago\n' * 50
+        with mock.patch.dict(app.config, {'MAX_CONTENT_LENGTH': 1024}), \
+                mock.patch.object(app_module, 'ADMIN_TOKEN', 'secret'):
+            response = self.app.post('/admin/import_events', content_type='multipart/form-data',
+                                     headers={'X-Admin-Token': 'secret'},
+                                     data={'file': (io.BytesIO(csv.encode()), 'fairs.csv')})
+            self.assertEqual(response.get_json()['imported'], 50)
+            with mock.patch.object(app_module, 'MAX_IMPORT_BYTES', 1024):
+                response = self.app.post('/admin/import_events', content_type='multipart/form-data',
+                                         headers={'X-Admin-Token': 'secret'},
+                                         data={'file': (io.BytesIO(csv.encode()), 'fairs.csv'), 'restart': '1'})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.get_json()['status'], 'fail')
+
+    def test_admin_breakers(self):
+        with mock.patch.object(app_module, 'ADMIN_TOKEN', 'secret'):
+            self.assertEqual(self.app.get('/admin/breakers').status_code, 403)
+            response = self.app.get('/admin/breakers', headers={'X-Admin-Token': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        breakers = response.get_json()['breakers']
+        self.assertTrue({'yelp', 'serpapi', 'gemini', 'reddit'} <= set(breakers))
+        self.assertIn(breakers['gemini']['state'], ('closed', 'open', 'half_open'))
+
+    def test_feed_keeps_upcoming_user_events_past_the_cap(self):
+        for day in range(1, 6):
+            user_events.add_user_event(f'Past {day}', 'Testville', f'2020-01-0{day}T12:00', 'America/Chicago', 'food')
+        user_events.add_user_event('Upcoming', 'Testville', '2999-01-01T12:00', 'America/Chicago', 'music')
+        with mock.patch.object(app_module, 'MAX_USER_EVENTS', 3), \
+                mock.patch.object(app_module, 'feed_google_events', return_value=[]):
+            events = app_module.collect_feed_events('Testville')
+        self.assertEqual([e.title for e in events], ['Upcoming'])
+
     def test_api_events_no_location(self):
         response = self.app.get('/api/events?interests=food')
         self.assertEqual(response.status_code, 400)
@@ -71,8 +194,10 @@ class TestDB(unittest.TestCase):
         name = 'Test User'
         email = 'testuser@example.com'
         password = 'testpass'
-        db.register_user(name, email, password)
-        user = db.login_user(email, password)
+        # both set the session, so they need a request context
+        with app.test_request_context():
+            db.register_user(name, email, password, '5555555555')
+            user = db.login_user(name, password)
         self.assertIsNotNone(user)
         self.assertIn('status', user)
         self.assertEqual(user['status'], 'access granted')
@@ -80,17 +205,28 @@ class TestDB(unittest.TestCase):
     def test_save_and_get_and_delete_event(self):
         user_id = 1
         event_data = {'global_id': 'event1', 'source': 'test', 'title': 'Test Event', 'date': '2025-07-24', 'location': 'NY', 'url': 'http://test.com'}
-        db.save_event(user_id, event_data)
+        db.save_event(user_id, Event.from_dict(event_data))
         events = db.get_saved_events(user_id)
-        self.assertTrue(any(e['global_id'] == 'event1' for e in events))
+        self.assertTrue(any(e.global_id == 'event1' for e in events))
         db.delete_saved_event(user_id, 'event1')
         events = db.get_saved_events(user_id)
-        self.assertFalse(any(e['global_id'] == 'event1' for e in events))
+        self.assertFalse(any(e.global_id == 'event1' for e in events))
 
 class TestEventHandler(unittest.TestCase):
     def test_search_all_events(self):
-        result = search_all_events('New York', 'food')
+        with mock.patch.object(event_handler, 'search_yelp_businesses', return_value=[Event('yelp', '1', 'Tacos')]), \
+                mock.patch.object(event_handler, 'search_reddit_events') as reddit:
+            result = search_all_events('New York', 'food')
         self.assertIsInstance(result, list)
+        self.assertEqual([e.global_id for e in result], ['yelp_1'])
+        reddit.assert_not_called()
+
+    def test_free_food_searches_reddit_only(self):
+        with mock.patch.object(event_handler, 'search_yelp_businesses') as yelp_search, \
+                mock.patch.object(event_handler, 'search_reddit_events', return_value=[Event('reddit', 'p1', 'Free pizza')]):
+            result = search_all_events('nyc', 'free food')
+        self.assertEqual([e.global_id for e in result], ['reddit_p1'])
+        yelp_search.assert_not_called()
 
 class TestYelp(unittest.TestCase):
     def test_format_date(self):
@@ -98,22 +234,29 @@ class TestYelp(unittest.TestCase):
         formatted = format_date(iso)
         self.assertIsInstance(formatted, str)
 
-    def test_search_yelp_events(self):
+    def test_search_yelp_businesses(self):
         yelp_api_key = os.getenv('YELP_KEY')
-        result = search_yelp_events('New York', 'food', yelp_api_key, 1, 1000)
+        business = {'id': 'b1', 'name': 'Taqueria', 'price': '$', 'url': 'https://yelp.com/biz/b1',
+                    'location': {'display_address': ['1 Main St', 'New York, NY']}}
+        with mock.patch.object(yelp.http_client, 'get', return_value=StubResponse({'businesses': [business]})):
+            result = search_yelp_businesses('New York', 'food', yelp_api_key, 1, 1000)
         self.assertIsInstance(result, list)
+        self.assertEqual(result[0].title, 'Taqueria')
 
 class TestRedditAPI(unittest.TestCase):
     def test_genai_call(self):
         prompt = 'Tell me a joke.'
-        result = genai_call(prompt)
+        reply = type('Response', (), {'text': 'A joke.'})()
+        with mock.patch.object(reddit_api.model_text, 'generate_content', return_value=reply):
+            result = genai_call(prompt)
         self.assertIsInstance(result, str)
 
     def test_search_reddit_events(self):
         reddit_client_id = os.getenv('REDDIT_CLIENT_ID')
         reddit_client_secret = os.getenv('REDDIT_CLIENT_SECRET')
         reddit_user_agent = os.getenv('REDDIT_USER_AGENT')
-        result = search_reddit_events('New York', 'food', reddit_client_id, reddit_client_secret, reddit_user_agent)
+        with mock.patch.object(reddit_api, 'fetch_subreddit_posts', return_value=[]):
+            result = search_reddit_events('New York', 'food', reddit_client_id, reddit_client_secret, reddit_user_agent)
         self.assertIsInstance(result, list)
 
 if __name__ == '__main__':
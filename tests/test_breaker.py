@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+from unittest import mock
+import requests
+from apis import breaker, throttle, yelp, tagging
+from apis.cache import Cache
+from apis.event import Event
+from apis.db_pool import close_connections
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class FaultyUpstream:
+    """A provider call that fails, hangs or answers as told, counting how often it is reached."""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+        self.delay = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return ['ok']
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = breaker.CircuitBreaker('test', slow_call=1.0, window=10, min_calls=4, failure_rate=0.5,
+                                              open_seconds=30, clock=self.clock)
+
+    def fail(self, times=1):
+        for _ in range(times):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record(0.1, ConnectionError('refused'))
+
+    def succeed(self, times=1, seconds=0.1):
+        for _ in range(times):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record(seconds)
+
+    def test_opens_on_failure_rate(self):
+        self.succeed(2)
+        self.fail(1)
+        self.assertEqual(self.breaker.state, breaker.CLOSED)  # 1 of 3, under min_calls anyway
+        self.fail(1)
+        self.assertEqual(self.breaker.state, breaker.OPEN)    # 2 of 4
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.snapshot()['rejected'], 1)
+
+    def test_waits_for_min_calls(self):
+        self.fail(3)
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+        self.fail(1)
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+
+    def test_slow_calls_count_as_failures(self):
+        self.succeed(4, seconds=2.5)
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+        self.assertEqual(self.breaker.snapshot()['max_seconds'], 2.5)
+
+    def test_client_errors_dont_count(self):
+        for _ in range(4):
+            self.breaker.allow()
+            self.breaker.record(0.1, http_error(400))
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+        for _ in range(4):
+            self.breaker.allow()
+            self.breaker.record(0.1, http_error(429))
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+
+    def test_half_open_lets_one_probe_through(self):
+        self.fail(4)
+        self.clock.now = 29
+        self.assertFalse(self.breaker.allow())
+        self.clock.now = 30
+        self.assertEqual(self.breaker.state, breaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record(0.1)
+        self.assertEqual(self.breaker.state, breaker.CLOSED)
+        self.assertEqual(self.breaker.snapshot()['failure_rate'], 0.0)
+
+    def test_failed_probe_opens_it_again(self):
+        self.fail(4)
+        self.clock.now = 30
+        self.fail(1)
+        self.assertEqual(self.breaker.state, breaker.OPEN)
+        self.assertEqual(self.breaker.snapshot()['retry_in_seconds'], 30)
+        self.clock.now = 59
+        self.assertFalse(self.breaker.allow())
+
+    def test_abandoned_probe_frees_the_slot(self):
+        self.fail(4)
+        self.clock.now = 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.abandon()
+        self.assertTrue(self.breaker.allow())
+
+
+class TestThroughThrottle(unittest.TestCase):
+    def setUp(self):
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+        unlimited = mock.patch.object(throttle, 'bucket', return_value=None)
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+        self.upstream = FaultyUpstream()
+
+    def call(self, provider='yelp'):
+        return throttle.call(provider, 'key', self.upstream)
+
+    def test_open_circuit_skips_the_upstream(self):
+        self.upstream.error = requests.ConnectionError('connection refused')
+        for _ in range(breaker.MIN_CALLS):
+            with self.assertRaises(requests.ConnectionError):
+                self.call()
+        with self.assertRaises(breaker.CircuitOpen):
+            self.call()
+        self.assertEqual(self.upstream.calls, breaker.MIN_CALLS)
+        self.assertEqual(breaker.snapshot()['yelp']['state'], breaker.OPEN)
+        self.assertEqual(breaker.snapshot()['serpapi']['state'], breaker.CLOSED)
+
+    def test_hung_upstream_opens_it(self):
+        self.upstream.delay = 0.02
+        with mock.patch.dict(breaker.SLOW_CALL_SECONDS, {'gemini': 0.01}):
+            for _ in range(breaker.MIN_CALLS):
+                self.assertEqual(self.call('gemini'), ['ok'])
+        with self.assertRaises(breaker.CircuitOpen):
+            self.call('gemini')
+
+    def test_rate_limited_calls_arent_failures(self):
+        with mock.patch.object(throttle, 'bucket', return_value=mock.Mock(acquire=mock.Mock(return_value=False))):
+            for _ in range(breaker.MIN_CALLS * 2):
+                with self.assertRaises(throttle.RateLimited):
+                    self.call()
+        self.assertEqual(breaker.snapshot()['yelp']['calls'], 0)
+        self.assertEqual(self.call(), ['ok'])
+
+
+class TestFallbacks(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig = yelp.search_cache, tagging.tag_cache
+        yelp.search_cache = Cache('yelp_search:v2', ttl=yelp.YELP_CACHE_TTL + yelp.YELP_STALE_TTL, db_path=self.db_path)
+        tagging.tag_cache = Cache('event_tags', ttl=tagging.TAG_TTL, db_path=self.db_path)
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+        unlimited = mock.patch.object(throttle, 'bucket', return_value=None)
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+
+    def tearDown(self):
+        yelp.search_cache, tagging.tag_cache = self._orig
+        close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def trip(self, provider):
+        circuit = breaker.breaker(provider)
+        for _ in range(breaker.MIN_CALLS):
+            circuit.allow()
+            circuit.record(0.1, ConnectionError('down'))
+
+    def test_yelp_serves_stale_results_while_open(self):
+        params = {'categories': 'tacos', 'term': 'tacos', 'limit': 5, 'radius': 1000, 'location': 'Austin'}
+        yelp.search_cache.set(json.dumps(params, sort_keys=True), {
+            'fetched_at': time.time() - yelp.YELP_CACHE_TTL - 1,
+            'events': [Event('yelp', 'b1', 'Taqueria').to_dict()],
+        })
+        self.trip('yelp')
+        with mock.patch.object(yelp.http_client, 'get') as get:
+            events = yelp.search_yelp_businesses('Austin', 'tacos', 'key', 5, 1000)
+            with self.assertRaises(breaker.CircuitOpen):
+                yelp.search_yelp_businesses('Boston', 'tacos', 'key', 5, 1000)
+        self.assertEqual([e.title for e in events], ['Taqueria'])
+        get.assert_not_called()
+
+    def test_tagging_classifies_locally_without_waiting(self):
+        model = mock.Mock()
+        model.generate_content.side_effect = TimeoutError('deadline exceeded')
+        events = [Event('google', 'a', 'Jazz Night', description='Live music'),
+                  Event('google', 'b', 'Taco Tuesday', description='Food trucks')]
+        with self.assertLogs('apis.tagging', 'WARNING'):
+            for _ in range(breaker.MIN_CALLS):
+                tagging.tag_events(events, model=model)
+        self.assertEqual(model.generate_content.call_count, breaker.MIN_CALLS)
+        with self.assertLogs('apis.tagging', 'WARNING'):
+            self.assertEqual(tagging.tag_events(events, model=model), ['music', 'food'])
+        self.assertEqual(model.generate_content.call_count, breaker.MIN_CALLS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import time
+import tempfile
+import unittest
+from apis.cache import Cache
+from apis.db_pool import close_connections
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+
+    def tearDown(self):
+        close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def make_cache(self, namespace='test', **kwargs):
+        kwargs.setdefault('ttl', 60)
+        return Cache(namespace, db_path=self.db_path, **kwargs)
+
+    def test_set_and_get(self):
+        cache = self.make_cache()
+        cache.set('nyc', [{'title': 'Jazz Night'}])
+        self.assertEqual(cache.get('nyc'), [{'title': 'Jazz Night'}])
+        self.assertIsNone(cache.get('chicago'))
+
+    def test_shared_between_instances(self):
+        self.make_cache().set('nyc', ['event'])
+        # A second instance (e.g. another worker) has a cold memory layer but sees the disk entry
+        other = self.make_cache()
+        self.assertEqual(other.get('nyc'), ['event'])
+        self.assertEqual(other.stats()['memory_hits'], 0)
+
+    def test_sees_other_instances_writes_after_memory_ttl(self):
+        a, b = self.make_cache(memory_ttl=0.05), self.make_cache(memory_ttl=0.05)
+        a.set('k', {'v': 1})
+        self.assertEqual(a.get('k'), {'v': 1})
+        b.set('k', {'v': 2})
+        time.sleep(0.1)
+        self.assertEqual(a.get('k'), {'v': 2})
+        self.assertEqual(a.stats()['memory_hits'], 1)
+
+    def test_namespaces_are_separate(self):
+        self.make_cache('yelp').set('nyc', ['yelp'])
+        self.assertIsNone(self.make_cache('google').get('nyc'))
+
+    def test_returned_values_are_copies(self):
+        cache = self.make_cache()
+        cache.set('nyc', [{'date': {'when': 'Fri'}}])
+        cache.get('nyc')[0]['date'] = 'Fri'
+        self.assertEqual(cache.get('nyc'), [{'date': {'when': 'Fri'}}])
+
+    def test_per_key_ttl(self):
+        cache = self.make_cache()
+        cache.set('short', 1, ttl=0.05)
+        cache.set('long', 2)
+        time.sleep(0.1)
+        self.assertEqual(cache.get_many(['short', 'long']), {'long': 2})
+
+    def test_lru_eviction(self):
+        cache = self.make_cache(max_entries=2, memory_entries=0)
+        cache.set('a', 1)
+        time.sleep(0.01)
+        cache.set('b', 2)
+        time.sleep(0.01)
+        cache.get('a')  # a is now more recently used than b
+        time.sleep(0.01)
+        cache.set('c', 3)
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1, 'c': 3})
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_stats(self):
+        cache = self.make_cache()
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('missing')
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import db
+from apis.event import Event
+from apis.db_pool import get_connection, transaction, close_connections
+
+
+class TestLikes(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig_path = db.DB_PATH
+        db.DB_PATH = self.db_path
+        db.init_auth_db()
+        db.save_user_preferences(1, 'Austin', ['food'])
+
+    def tearDown(self):
+        db.DB_PATH = self._orig_path
+        close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def weights(self, user_id=1):
+        return db.get_user_preferences(user_id)['preferences']
+
+    def event(self, i, tags='food, music'):
+        return Event.from_dict({'global_id': f'google_{i}', 'source': 'google', 'title': f'Event {i}', 'tags': tags})
+
+    def test_like_then_unlike(self):
+        self.assertEqual(db.like_event(1, self.event(1))['message'], 'Event liked.')
+        self.assertEqual(self.weights(), {'food': 2, 'music': 1})
+        self.assertEqual([e.global_id for e in db.get_liked_events(1)], ['google_1'])
+
+        self.assertEqual(db.like_event(1, self.event(1))['message'], 'Event unliked.')
+        self.assertEqual(self.weights(), {'food': 1, 'music': 0})
+        self.assertEqual(db.get_liked_events(1), [])
+
+    def test_unlike_never_goes_negative(self):
+        db.like_event(1, self.event(1, tags=['art']))
+        db.save_user_preferences(1, 'Austin', ['food'])
+        db.like_event(1, self.event(1, tags=['art', 'food']))
+        self.assertEqual(self.weights(), {'food': 0})
+
+    def test_failed_like_rolls_back(self):
+        # fail after the catalog upsert, before the edges and counters are written
+        upsert = db.upsert_event
+
+        def upsert_then_fail(conn, event):
+            upsert(conn, event)
+            raise RuntimeError('boom')
+
+        with mock.patch.object(db, 'upsert_event', side_effect=upsert_then_fail):
+            with self.assertRaises(RuntimeError):
+                db.like_event(1, self.event(1))
+        self.assertEqual(self.weights(), {'food': 1})
+        self.assertEqual(db.get_liked_events(1), [])
+        self.assertEqual(get_connection(self.db_path).execute("SELECT COUNT(*) FROM events").fetchone()[0], 0)
+
+    def test_migrates_json_preferences(self):
+        conn = get_connection(self.db_path)
+        conn.execute("INSERT INTO user_preferences (user_id, location, preferences) VALUES (2, 'Boston', ?)",
+                     (json.dumps({'music': 3, 'art': 1}),))
+        conn.commit()
+        db.init_auth_db()
+        self.assertEqual(self.weights(2), {'music': 3, 'art': 1})
+        # running it again doesn't double up
+        db.init_auth_db()
+        self.assertEqual(self.weights(2), {'music': 3, 'art': 1})
+
+    def test_popular_locations(self):
+        for user_id, location in ((2, 'Denver'), (3, 'Denver'), (4, 'Boise'), (5, ' ')):
+            db.save_user_preferences(user_id, location, ['art'])
+        self.assertEqual(db.get_popular_locations(), ['Denver', 'Austin', 'Boise'])
+        self.assertEqual(db.get_popular_locations(limit=1), ['Denver'])
+
+    def test_concurrent_likes_lose_no_updates(self):
+        threads, per_thread = 8, 25
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(per_thread):
+                    db.like_event(1, self.event(f'{n}_{i}'))
+                    # a like/unlike pair on a shared event must net out to nothing
+                    db.like_event(1, self.event(f'shared_{n}', tags='music'))
+                    db.like_event(1, self.event(f'shared_{n}', tags='music'))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                close_connections()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.weights(), {'food': 1 + threads * per_thread, 'music': threads * per_thread})
+        self.assertEqual(len(db.get_liked_events(1)), threads * per_thread)
+
+
+class TestListings(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig_path = db.DB_PATH
+        db.DB_PATH = self.db_path
+        db.init_auth_db()
+
+    def tearDown(self):
+        db.DB_PATH = self._orig_path
+        close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def event(self, i):
+        return Event('google', str(i), f'Event {i}', tag='food')
+
+    def pages(self, fetch, user_id, limit):
+        ids, after = [], None
+        while True:
+            events, after = fetch(user_id, after=after, limit=limit)
+            ids.append([e.global_id for e in events])
+            if after is None:
+                return ids
+
+    def test_saved_events_keyset_pages(self):
+        for i in range(45):
+            db.save_event(1, self.event(i))
+        pages = self.pages(db.get_saved_events_page, 1, 20)
+        self.assertEqual([len(p) for p in pages], [20, 20, 5])
+        flat = [gid for page in pages for gid in page]
+        self.assertEqual(flat, [f'google_{i}' for i in reversed(range(45))])
+        self.assertEqual([e.global_id for e in db.get_saved_events(1)], flat)
+
+    def test_cursor_is_stable_under_inserts(self):
+        for i in range(10):
+            db.save_event(1, self.event(i))
+        first, after = db.get_saved_events_page(1, limit=5)
+        db.save_event(1, self.event('new'))
+        second, after = db.get_saved_events_page(1, after=after, limit=5)
+        self.assertEqual([e.global_id for e in second], [f'google_{i}' for i in (4, 3, 2, 1, 0)])
+        self.assertIsNone(after)
+
+    def test_bad_cursor(self):
+        with self.assertRaises(ValueError):
+            db.get_saved_events_page(1, after='abc')
+
+    def test_one_catalog_row_per_event(self):
+        for user_id in (1, 2, 3):
+            db.save_event(user_id, self.event(1))
+        db.like_event(4, self.event(1))
+        conn = get_connection(self.db_path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM events").fetchone()[0], 1)
+        self.assertEqual(conn.execute("SELECT COUNT(DISTINCT event_id) FROM saved_events").fetchone()[0], 1)
+        for user_id in (1, 2, 3, 4):
+            self.assertEqual([e.global_id for e in db.get_saved_events(user_id)], ['google_1'])
+        self.assertEqual([e.global_id for e in db.get_liked_events(4)], ['google_1'])
+        self.assertEqual(db.get_liked_events(1), [])
+        self.assertEqual(db.delete_saved_event(2, 'google_1')['status'], 'success')
+        self.assertEqual(db.get_saved_events(2), [])
+        self.assertEqual(len(db.get_saved_events(1)), 1)
+
+    def test_partial_payloads_keep_known_details(self):
+        db.save_event(1, Event('google', '1', 'Street Fair', time='Sat, Aug 2', location='Austin', url='https://x'))
+        db.like_event(2, Event.from_dict({'global_id': 'google_1', 'source': 'google'}))
+        db.save_event(3, Event('google', '1', 'Street Fair (moved)', location='Round Rock'))
+        event, = db.get_liked_events(2)
+        self.assertEqual((event.title, event.time, event.location, event.url),
+                         ('Street Fair (moved)', 'Sat, Aug 2', 'Round Rock', 'https://x'))
+
+    def test_liked_events_pages(self):
+        for i in range(7):
+            db.like_event(1, self.event(i))
+        pages = self.pages(db.get_liked_events_page, 1, 3)
+        self.assertEqual(pages, [['google_6', 'google_5', 'google_4'], ['google_3', 'google_2', 'google_1'],
+                                 ['google_0']])
+
+    def test_migrates_copies_to_catalog(self):
+        close_connections()
+        os.remove(self.db_path)
+        conn = get_connection(self.db_path)
+        conn.executescript("""
+            CREATE TABLE saved_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, event_global_id TEXT NOT NULL,
+                event_source TEXT NOT NULL, event_title TEXT NOT NULL, event_date TEXT, event_location TEXT,
+                event_url TEXT, type TEXT NOT NULL, saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(user_id, event_global_id));
+            CREATE TABLE liked_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, event_global_id TEXT NOT NULL,
+                liked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE(user_id, event_global_id));
+            CREATE INDEX idx_saved_events_user ON saved_events (user_id, id);
+            INSERT INTO saved_events (id, user_id, event_global_id, event_source, event_title, type) VALUES
+                (5, 1, 'google_1', 'google', 'Old title', 'social'),
+                (6, 2, 'google_1', 'google', 'New title', 'social'),
+                (7, 1, 'yelp_2', 'yelp', 'Tacos', 'food');
+            -- user 3 liked an event without a saved row of their own; google_9 was never saved by anyone
+            INSERT INTO liked_events (id, user_id, event_global_id) VALUES
+                (3, 1, 'yelp_2'), (4, 3, 'google_1'), (5, 3, 'google_9');
+        """)
+        # startup leaves an old database alone rather than converting it on the fly
+        with self.assertRaisesRegex(RuntimeError, 'migrate_saved_events_to_catalog'):
+            db.init_auth_db()
+        self.assertTrue(db.has_legacy_saved_events(conn))
+
+        with self.assertLogs('db', 'WARNING') as logs, transaction(self.db_path) as migration:
+            self.assertEqual(db.ensure_event_catalog(migration), (2, 1))
+        self.assertIn('Dropped 1 likes', logs.output[0])
+        db.init_auth_db()
+        self.assertEqual(conn.execute("SELECT global_id, title FROM events ORDER BY global_id").fetchall(),
+                         [('google_1', 'New title'), ('yelp_2', 'Tacos')])
+        self.assertEqual([e.global_id for e in db.get_saved_events(1)], ['yelp_2', 'google_1'])
+        self.assertEqual([e.global_id for e in db.get_saved_events(3)], ['google_1'])
+        self.assertEqual([e.global_id for e in db.get_liked_events(3)], ['google_1'])
+        # ids carried over, so cursors handed out before the migration still work
+        self.assertEqual([e.global_id for e in db.get_saved_events_page(1, after='7')[0]], ['google_1'])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name LIKE '%_new'").fetchone()[0], 0)
+        self.assertEqual(db.like_event(1, self.event(3))['message'], 'Event liked.')
+
+    def test_listings_use_indexes(self):
+        conn = get_connection(self.db_path)
+        plan = lambda sql: ' '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, (1, 10)))
+        for table, index in (('saved_events', 'idx_saved_events_user'), ('liked_events', 'idx_liked_events_user')):
+            listing = plan(f"""
+                SELECT x.id, e.global_id, e.title FROM {table} x JOIN events e ON e.id = x.event_id
+                WHERE x.user_id = ? AND x.id < ? ORDER BY x.id DESC
+            """)
+            self.assertIn(f'COVERING INDEX {index}', listing)
+            self.assertIn('INTEGER PRIMARY KEY', listing)
+            self.assertNotIn('TEMP B-TREE', listing)
+
+if __name__ == '__main__':
+    unittest.main()
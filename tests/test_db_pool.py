@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from apis import db_pool
+from apis.db_pool import get_connection, transaction, close_connections
+
+
+class TestDbPool(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'pool.db')
+
+    def tearDown(self):
+        close_connections()
+        for name in os.listdir(self.dir):
+            os.remove(os.path.join(self.dir, name))
+        os.rmdir(self.dir)
+
+    def test_one_connection_per_thread(self):
+        conn = get_connection(self.path)
+        self.assertIs(get_connection(self.path), conn)
+        self.assertIsNot(get_connection(os.path.join(self.dir, 'other.db')), conn)
+
+        seen = []
+
+        def worker():
+            seen.append(get_connection(self.path))
+            close_connections()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertIsNot(seen[0], conn)
+        # the other thread closing its connections leaves this one's open
+        conn.execute("SELECT 1")
+
+    def test_close_connections(self):
+        conn = get_connection(self.path)
+        close_connections()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        self.assertIsNot(get_connection(self.path), conn)
+
+    def test_pragmas_applied(self):
+        conn = get_connection(self.path)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)     # NORMAL
+        self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)      # MEMORY
+        self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+        self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -16000)
+
+    def test_on_connect_runs_once(self):
+        on_connect = mock.Mock()
+        conn = get_connection(self.path, on_connect)
+        get_connection(self.path, on_connect)
+        on_connect.assert_called_once_with(conn)
+
+    def test_reconnects_after_fork(self):
+        conn = get_connection(self.path)
+        with mock.patch.object(db_pool.os, 'getpid', return_value=os.getpid() + 1):
+            self.assertIsNot(get_connection(self.path), conn)
+            close_connections()
+        conn.close()
+
+    def test_transaction_commits_or_rolls_back(self):
+        get_connection(self.path).execute("CREATE TABLE t (x INTEGER)")
+        with transaction(self.path) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+        with self.assertRaises(RuntimeError):
+            with transaction(self.path) as conn:
+                conn.execute("INSERT INTO t VALUES (2)")
+                raise RuntimeError
+        self.assertEqual(get_connection(self.path).execute("SELECT x FROM t").fetchall(), [(1,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import sys
+import unittest
+from apis.event import Event
+from apis.yelp import from_yelp
+from apis.user_events import row_to_event
+
+
+class TestEvent(unittest.TestCase):
+    def test_global_id(self):
+        self.assertEqual(Event('yelp', 'abc', 'Taco Stand').global_id, 'yelp_abc')
+        self.assertEqual(Event('google', 'x', 'Fair', global_id='legacy-url').global_id, 'legacy-url')
+
+    def test_round_trip(self):
+        event = Event('yelp', 'abc', 'Taco Stand', location='1 Main St', tags=['Mexican'], rating=4.5)
+        self.assertEqual(Event.from_dict(event.to_dict()), event)
+
+    def test_from_client_payload(self):
+        event = Event.from_dict({'global_id': 'google_1a2b', 'source': 'google', 'title': 'Street Fair',
+                                 'date': 'Sat, Aug 2', 'address': ['Main St', 'Austin, TX'],
+                                 'link': 'https://example.com', 'tags': 'food, music', 'unknown': 1})
+        self.assertEqual(event.external_id, '1a2b')
+        self.assertEqual(event.time, 'Sat, Aug 2')
+        self.assertEqual(event.location, 'Main St, Austin, TX')
+        self.assertEqual(event.url, 'https://example.com')
+        self.assertEqual(event.tags, ['food', 'music'])
+
+    def test_slotted(self):
+        event = Event('user', '1', 'Pizza Night')
+        self.assertFalse(hasattr(event, '__dict__'))
+        with self.assertRaises(AttributeError):
+            event.link = 'https://example.com'
+        self.assertLess(sys.getsizeof(event), sys.getsizeof(event.to_dict()))
+
+    def test_yelp_adapter(self):
+        event = from_yelp({'id': 'taco-1', 'name': 'Taco Stand', 'url': 'https://yelp.com/biz/taco-1',
+                           'location': {'display_address': ['1 Main St', 'Austin, TX']},
+                           'categories': [{'title': 'Mexican'}], 'rating': 4.5})
+        self.assertEqual((event.global_id, event.location, event.tags), ('yelp_taco-1', '1 Main St, Austin, TX', ['Mexican']))
+
+    def test_user_event_adapter(self):
+        event = row_to_event((7, 'Art Walk', 'Museum, Austin', '2025-08-01 18:00', 'America/Chicago', 'art',
+                              'Bring friends', '2025-07-28T09:57:06', '/static/uploads/walk.png'))
+        self.assertEqual(event.global_id, 'user_7')
+        self.assertEqual(event.description, 'Bring friends')
+        self.assertEqual(event.image, '/static/uploads/walk.png')
+        self.assertEqual(event.time, 'August 01, 2025 at 06:00 PM')
+
+
+if __name__ == '__main__':
+    unittest.main()
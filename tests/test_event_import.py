@@ -0,0 +1,118 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+from apis import user_events, event_import
+from apis.db_pool import get_connection, close_connections
+
+CSV = """title,location,event_time,timezone,tag,description
+Pizza Night,"Local Cafe, New York",2025-08-01T18:00,America/New_York,Food,Slices on us
+Jazz Night,"City Park, Chicago",2025-08-03 20:00,America/Chicago,music,
+No Time,"City Park, Chicago",,America/Chicago,music,
+Bad Zone,"City Park, Chicago",2025-08-03 20:00,Mars/Olympus,music,
+Mystery,"Tech Hub, Austin",2025-08-04 19:00,America/Chicago,jazz,
+"""
+
+
+class TestEventImport(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig_db = user_events.DB_PATH
+        user_events.DB_PATH = self.db_path
+        user_events.init_user_events_db()
+
+    def tearDown(self):
+        close_connections()
+        user_events.DB_PATH = self._orig_db
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def rows(self):
+        return get_connection(self.db_path).execute(
+            "SELECT title, event_time, tag, city, geo_cell FROM user_events ORDER BY id").fetchall()
+
+    def test_csv_validates_and_normalizes(self):
+        report = event_import.import_events(io.StringIO(CSV), 'csv', chunk_size=2)
+        self.assertEqual((report['rows'], report['imported'], report['rejected']), (5, 3, 2))
+        self.assertEqual([e['row'] for e in report['errors']], [3, 4])
+        self.assertIn('missing event_time', report['errors'][0]['error'])
+        rows = self.rows()
+        self.assertEqual(rows[0][:4], ('Pizza Night', '2025-08-01T18:00', 'food', 'new york'))
+        self.assertIsNotNone(rows[0][4])
+        self.assertEqual(rows[1][1], '2025-08-03T20:00')
+        self.assertEqual(rows[2][2], 'other')
+        self.assertGreater(report['rows_per_sec'], 0)
+
+    def test_jsonl_bad_line_is_one_rejection(self):
+        lines = [json.dumps({'title': 'Open Mic', 'location': 'Austin, TX', 'event_time': '2025-08-05 19:00',
+                             'timezone': 'America/Chicago', 'tag': 'music'}), '{not json', '["a list"]', '']
+        report = event_import.import_events(io.StringIO('\n'.join(lines)), 'jsonl')
+        self.assertEqual((report['imported'], report['rejected']), (1, 2))
+        self.assertEqual(user_events.query_user_events(city='Austin')[0].title, 'Open Mic')
+
+    def test_resumes_after_interruption(self):
+        records = [{'title': f'Event {i}', 'location': 'Austin, TX', 'event_time': f'2025-08-{i + 1:02d} 19:00',
+                    'timezone': 'America/Chicago'} for i in range(10)]
+
+        def dies_after(n):
+            for record in records[:n]:
+                yield record
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            event_import.ingest(dies_after(7), name='partner-feed', chunk_size=3)
+        self.assertEqual(len(self.rows()), 6)  # the two full chunks committed, the partial one didn't
+
+        report = event_import.ingest(records, name='partner-feed', chunk_size=3)
+        self.assertEqual((report['skipped'], report['imported']), (6, 4))
+        self.assertEqual([r[0] for r in self.rows()], [f'Event {i}' for i in range(10)])
+
+        # a finished import isn't resumed: running it again starts from the top
+        report = event_import.ingest(records, name='partner-feed')
+        self.assertEqual((report['skipped'], report['imported']), (0, 10))
+
+    def test_different_file_under_the_same_name(self):
+        def feed(prefix, n):
+            return [{'title': f'{prefix} {i}', 'location': 'Austin, TX', 'event_time': f'2025-08-{i + 1:02d} 19:00',
+                     'timezone': 'America/Chicago'} for i in range(n)]
+
+        event_import.ingest(feed('Monday', 5), name='upload:events.csv')
+        report = event_import.ingest(feed('Tuesday', 5), name='upload:events.csv')
+        self.assertEqual((report['skipped'], report['imported']), (0, 5))
+        self.assertEqual(len(self.rows()), 10)
+
+        def dies_after(records, n):
+            yield from records[:n]
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            event_import.ingest(dies_after(feed('Wednesday', 6), 4), name='upload:events.csv', chunk_size=2)
+        with self.assertRaisesRegex(ValueError, 'different file'):
+            event_import.ingest(feed('Thursday', 6), name='upload:events.csv', chunk_size=2)
+        with self.assertRaisesRegex(ValueError, 'different file'):
+            event_import.ingest(feed('Wednesday', 3), name='upload:events.csv', chunk_size=2)
+        self.assertEqual(len(self.rows()), 14)
+        report = event_import.ingest(feed('Thursday', 6), name='upload:events.csv', resume=False)
+        self.assertEqual((report['skipped'], report['imported']), (0, 6))
+        self.assertEqual(len(self.rows()), 20)
+
+    def test_old_event_times_are_rewritten(self):
+        conn = get_connection(self.db_path)
+        conn.execute(user_events.INSERT_EVENT_SQL, user_events.event_values(
+            'Jazz Night', 'City Park, Chicago', '2025-08-03 20:00', 'America/Chicago', 'music'))
+        conn.commit()
+        user_events.init_user_events_db()
+        self.assertEqual(self.rows()[0][1], '2025-08-03T20:00')
+
+    def test_detect_format(self):
+        self.assertEqual(event_import.detect_format('Partners.CSV'), 'csv')
+        self.assertEqual(event_import.detect_format('feed.ndjson'), 'jsonl')
+        with self.assertRaises(ValueError):
+            event_import.detect_format('feed.xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import random
+import unittest
+import numpy as np
+import feed
+from apis.event import Event
+from benchmarks.bench_feed import legacy_order_feed, as_dicts
+
+
+def make_events(n):
+    tags = ['food', 'music', 'art', 'sports']
+    return [Event('user', str(i), f'Event {i}', tag=tags[i % len(tags)]) for i in range(n)]
+
+
+class TestFeed(unittest.TestCase):
+    def test_batches_are_stable_for_a_cursor(self):
+        prefs = {'food': 3, 'music': 1}
+        first = feed.create_feed(1, make_events(23), prefs)
+        again = feed.create_feed(1, make_events(23), prefs, token=first.token)
+        self.assertEqual([e.title for e in first.events], [e.title for e in again.events])
+
+    def test_every_event_served_once(self):
+        session = feed.create_feed(1, make_events(23), {'food': 2})
+        titles = [e.title for e in session.events]
+        self.assertEqual(len(titles), 23)
+        self.assertEqual(len(set(titles)), 23)
+
+    def test_batch_slicing(self):
+        session = feed.create_feed(1, make_events(12), {'art': 1})
+        events, more = session.batch(1)
+        self.assertEqual(len(events), feed.BATCH_SIZE)
+        self.assertTrue(more)
+        events, more = session.batch(3)
+        self.assertEqual(len(events), 2)
+        self.assertFalse(more)
+
+    def test_liked_tags_fill_most_of_each_batch(self):
+        session = feed.create_feed(1, make_events(40), {'food': 5})
+        events, _ = session.batch(1)
+        self.assertEqual(sum(1 for e in events if e.tag == 'food'), round(feed.BATCH_SIZE * feed.LIKE_RATIO))
+
+    def test_get_feed_checks_owner(self):
+        session = feed.create_feed(7, make_events(5), {})
+        self.assertIs(feed.get_feed(session.token, 7), session)
+        self.assertIsNone(feed.get_feed(session.token, 8))
+        # a stranger presenting the token doesn't reset the owner's feed
+        self.assertIs(feed.get_feed(session.token, 7), session)
+        self.assertIsNone(feed.get_feed('unknown', 7))
+
+
+def tag_of(event):
+    return event['tag'] if isinstance(event, dict) else event.tag
+
+
+def batches(events, count):
+    return [events[i * feed.BATCH_SIZE:(i + 1) * feed.BATCH_SIZE] for i in range(count)]
+
+
+class TestOrderFeed(unittest.TestCase):
+    """order_feed against the per-slot loop it replaced (benchmarks.bench_feed.legacy_order_feed).
+
+    The two draw from different generators, so orders differ event by event; what has to match
+    is the mix per batch and the share each liked tag gets.
+    """
+    PREFS = {'food': 3, 'music': 1}
+
+    def vectorized(self, events, prefs, seed):
+        return feed.order_feed(events, prefs, np.random.default_rng(seed))
+
+    def legacy(self, events, prefs, seed):
+        random.seed(seed)
+        return legacy_order_feed(as_dicts(events), prefs)
+
+    def test_liked_unliked_mix_in_every_batch(self):
+        events = make_events(200)  # 50 of each tag, food and music liked
+        num_liked = round(feed.BATCH_SIZE * feed.LIKE_RATIO)
+        for order in (self.vectorized(events, self.PREFS, 7), self.legacy(events, self.PREFS, 7)):
+            for batch in batches(order, 10):
+                self.assertEqual(sum(self.PREFS.get(tag_of(e), 0) > 0 for e in batch), num_liked)
+
+    def test_liked_tags_share_by_weight(self):
+        events = make_events(200)
+        shares = []
+        for order_fn in (self.vectorized, self.legacy):
+            food = liked = 0
+            for seed in range(50):
+                head = order_fn(events, self.PREFS, seed)[:10 * feed.BATCH_SIZE]
+                food += sum(tag_of(e) == 'food' for e in head)
+                liked += sum(tag_of(e) in self.PREFS for e in head)
+            shares.append(food / liked)
+        vectorized_share, legacy_share = shares
+        self.assertAlmostEqual(vectorized_share, 0.75, delta=0.05)
+        self.assertAlmostEqual(vectorized_share, legacy_share, delta=0.05)
+
+    def test_unliked_tags_take_turns(self):
+        order = self.vectorized(make_events(200), self.PREFS, 3)
+        unliked = [tag_of(e) for batch in batches(order, 2) for e in batch if tag_of(e) not in self.PREFS]
+        self.assertEqual(sorted(unliked), ['art', 'sports'])
+
+    def test_tied_weights_keep_order_within_a_tag(self):
+        events = make_events(40)
+        prefs = {'food': 1, 'music': 1}
+        order = self.vectorized(events, prefs, 11)
+        self.assertEqual({tag_of(e) for e in order[:feed.BATCH_SIZE]} & set(prefs), set(prefs))
+        # 20 liked events make 5 full batches; within those each tag is served in its original
+        # order (the leftovers after them are shuffled, as they always were)
+        full = 5
+        position = {e.title: i // feed.BATCH_SIZE for i, e in enumerate(order)}
+        for tag in ('food', 'music', 'art', 'sports'):
+            served = [position[e.title] for e in events if e.tag == tag]
+            in_full = [p for p in served if p < full]
+            self.assertEqual(in_full, served[:len(in_full)], tag)
+            self.assertEqual(in_full, sorted(in_full), tag)
+
+    def test_same_seed_same_order(self):
+        events = make_events(30)
+        self.assertEqual([e.title for e in self.vectorized(events, self.PREFS, 5)],
+                         [e.title for e in self.vectorized(events, self.PREFS, 5)])
+
+    def test_empty_and_one_sided_input(self):
+        self.assertEqual(self.vectorized([], self.PREFS, 0), [])
+        for prefs in ({}, {'food': 0, 'music': -1}, {'food': 1, 'music': 1, 'art': 1, 'sports': 1}):
+            events = make_events(13)
+            order = self.vectorized(events, prefs, 0)
+            self.assertEqual(sorted(e.title for e in order), sorted(e.title for e in events), prefs)
+            self.assertEqual(len(self.legacy(events, prefs, 0)), 13, prefs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+from flask import Flask, Response, jsonify, stream_with_context
+from apis import http_cache
+
+
+def make_app():
+    app = Flask(__name__)
+    http_cache.install(app)
+    payload = {'events': [{'title': f'Event {i}', 'location': 'Austin, TX'} for i in range(50)]}
+
+    @app.route('/big')
+    def big():
+        return jsonify(payload)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/shared')
+    def shared():
+        return http_cache.cache_publicly(jsonify(payload), 300, stale_while_revalidate=60)
+
+    @app.route('/stream')
+    def stream():
+        return Response(stream_with_context(iter(['{"a": 1}\n'] * 100)), mimetype='application/json')
+
+    @app.route('/post', methods=['POST'])
+    def post():
+        return jsonify(payload)
+
+    app.payload = payload
+    return app
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app()
+        self.client = self.app.test_client()
+
+    def test_etag_and_304(self):
+        first = self.client.get('/big')
+        etag = first.headers['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(first.headers['Cache-Control'], 'private, no-cache')
+        again = self.client.get('/big', headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b'')
+        self.assertEqual(self.client.get('/big', headers={'If-None-Match': 'W/"other"'}).status_code, 200)
+
+    def test_etag_follows_the_body(self):
+        etag = self.client.get('/big').headers['ETag']
+        self.app.payload['events'].pop()
+        changed = self.client.get('/big', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_gzip(self):
+        with mock.patch.object(http_cache, 'brotli', None):
+            response = self.client.get('/big', headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertEqual(json.loads(gzip.decompress(response.data)), self.app.payload)
+        # the same ETag revalidates the compressed copy
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get('/big', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code,
+                         304)
+
+    def test_brotli_when_available(self):
+        fake = mock.Mock()
+        fake.compress.return_value = b'brotli bytes'
+        with mock.patch.object(http_cache, 'brotli', fake):
+            self.assertEqual(self.client.get('/big', headers={'Accept-Encoding': 'br'}).headers['Content-Encoding'], 'br')
+            self.assertEqual(self.client.get('/big', headers={'Accept-Encoding': 'gzip'}).headers['Content-Encoding'],
+                             'gzip')
+
+    def test_left_alone(self):
+        self.assertNotIn('Content-Encoding', self.client.get('/big').headers)
+        self.assertNotIn('Content-Encoding', self.client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers)
+        streamed = self.client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', streamed.headers)
+        self.assertNotIn('ETag', streamed.headers)
+        self.assertNotIn('ETag', self.client.post('/post').headers)
+
+    def test_public_responses_keep_their_cache_control(self):
+        response = self.client.get('/shared')
+        self.assertEqual(response.headers['Cache-Control'], 'public, max-age=300, stale-while-revalidate=60')
+        self.assertEqual(self.client.get('/shared', headers={'If-None-Match': response.headers['ETag']}).status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
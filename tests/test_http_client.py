@@ -0,0 +1,106 @@
+import time
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from apis import http_client
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+        if self.path == '/slow':
+            time.sleep(0.5)
+        if self.path == '/flaky' and hits <= 2:
+            return self.reply(503, b'{"error": "try again"}')
+        if self.path == '/limited':
+            return self.reply(429, b'{"error": "slow down"}', {'Retry-After': '0'})
+        self.reply(200, b'{"events_results": []}')
+
+    def reply(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass  # the client gave up (timeout test)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.connections = set()
+        self.server.hits = {}
+        self._orig_backoff = http_client.BACKOFF_BASE
+        http_client.BACKOFF_BASE = 0.01
+        http_client._session = None
+
+    def tearDown(self):
+        http_client.BACKOFF_BASE = self._orig_backoff
+
+    def test_keep_alive_reuses_one_connection(self):
+        for _ in range(20):
+            self.assertEqual(http_client.get(self.base + '/ok').status_code, 200)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_bare_requests_open_a_connection_each_time(self):
+        for _ in range(5):
+            requests.get(self.base + '/ok')
+        self.assertEqual(len(self.server.connections), 5)
+
+    def test_timeout(self):
+        start = time.perf_counter()
+        with self.assertRaises(requests.Timeout):
+            http_client.get(self.base + '/slow', timeout=(1, 0.1), retries=0)
+        self.assertLess(time.perf_counter() - start, 0.4)
+
+    def test_retries_server_errors(self):
+        response = http_client.get(self.base + '/flaky', retries=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.hits['/flaky'], 3)
+
+    def test_gives_up_after_retries(self):
+        response = http_client.get(self.base + '/limited', retries=1)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.server.hits['/limited'], 2)
+
+    def test_async_get_runs_concurrently(self):
+        async def fetch_all():
+            return await asyncio.gather(*(http_client.async_get(self.base + '/slow') for _ in range(4)))
+        start = time.perf_counter()
+        responses = asyncio.run(fetch_all())
+        self.assertEqual([r.status_code for r in responses], [200] * 4)
+        self.assertLess(time.perf_counter() - start, 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
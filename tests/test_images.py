@@ -0,0 +1,39 @@
+import unittest
+from apis.images import normalize_image_url
+from apis.google_events import from_google
+
+
+class TestNormalizeImageUrl(unittest.TestCase):
+    def test_google_size_suffixes(self):
+        self.assertEqual(normalize_image_url('https://lh3.googleusercontent.com/abc=w120-h120-p-k-no'),
+                         'https://lh3.googleusercontent.com/abc=w1200-h900-k-no')
+        self.assertEqual(normalize_image_url('https://lh5.googleusercontent.com/p/abc=s120-c'),
+                         'https://lh5.googleusercontent.com/p/abc=w1200-h900')
+        self.assertEqual(normalize_image_url('https://lh4.googleusercontent.com/abc=h120'),
+                         'https://lh4.googleusercontent.com/abc=h1200')
+
+    def test_static_maps(self):
+        self.assertEqual(
+            normalize_image_url('https://maps.googleapis.com/maps/api/staticmap?center=1,2&zoom=15&size=120x120'),
+            'https://maps.googleapis.com/maps/api/staticmap?center=1,2&zoom=18&size=1200x800')
+
+    def test_other_urls_untouched(self):
+        url = 'https://images.unsplash.com/photo-1?w=1200&h=800&fit=crop&q=90'
+        self.assertEqual(normalize_image_url(url), url)
+        self.assertIsNone(normalize_image_url(None))
+
+    def test_idempotent(self):
+        for url in ('https://lh3.googleusercontent.com/abc=w120-h120-p', 'https://lh4.googleusercontent.com/abc=w120',
+                    'https://maps.googleapis.com/maps/api/staticmap?zoom=15&size=120x120'):
+            once = normalize_image_url(url)
+            self.assertEqual(normalize_image_url(once), once)
+
+    def test_event_gets_best_image(self):
+        event = from_google({'title': 'Street Fair', 'thumbnail': 'https://lh3.googleusercontent.com/t=s120',
+                             'image': 'https://lh3.googleusercontent.com/i=w120-h120'})
+        self.assertEqual(event.image, 'https://lh3.googleusercontent.com/i=w1200-h900')
+        self.assertIsNone(from_google({'title': 'No picture'}).image)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from flask import Flask
+from apis import metrics
+from apis.metrics import Histogram, upstream, statement_kind
+from apis.db_pool import get_connection, close_connections
+
+
+class TestHistogram(unittest.TestCase):
+    def test_render_is_cumulative(self):
+        h = Histogram('demo_seconds', 'Demo.', ('route',), buckets=(0.1, 1.0))
+        h.observe(0.05, route='/a')
+        h.observe(0.5, route='/a')
+        h.observe(3, route='/a')
+        lines = h.render().splitlines()
+        self.assertEqual(lines[:2], ['# HELP demo_seconds Demo.', '# TYPE demo_seconds histogram'])
+        self.assertIn('demo_seconds_bucket{route="/a",le="0.1"} 1', lines)
+        self.assertIn('demo_seconds_bucket{route="/a",le="1.0"} 2', lines)
+        self.assertIn('demo_seconds_bucket{route="/a",le="+Inf"} 3', lines)
+        self.assertIn('demo_seconds_count{route="/a"} 3', lines)
+        self.assertIn('demo_seconds_sum{route="/a"} 3.55', lines)
+
+    def test_label_values_are_escaped(self):
+        h = Histogram('demo_seconds', 'Demo.', ('route',))
+        h.observe(0.01, route='say "hi"')
+        self.assertIn('route="say \\"hi\\""', h.render())
+
+    def test_statement_kind(self):
+        self.assertEqual(statement_kind('  select * from users'), 'SELECT')
+        self.assertEqual(statement_kind('\n        INSERT INTO t VALUES (?)'), 'INSERT')
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        for metric in metrics.REGISTRY:
+            metric.reset()
+
+    def test_upstream_records_outcome(self):
+        with upstream('yelp'):
+            pass
+        with self.assertRaises(RuntimeError):
+            with upstream('yelp'):
+                raise RuntimeError('boom')
+        samples = metrics.UPSTREAM_SECONDS.samples()
+        self.assertEqual(samples[('yelp', 'ok')][1], 1)
+        self.assertEqual(samples[('yelp', 'error')][1], 1)
+
+    def test_sql_statements_are_timed(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            conn = get_connection(path)
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(10)])
+            conn.commit()
+            conn.execute("SELECT x FROM t").fetchall()
+        finally:
+            close_connections()
+            os.remove(path)
+        samples = metrics.SQL_SECONDS.samples()
+        name = os.path.basename(path)
+        for kind in ('CREATE', 'INSERT', 'SELECT', 'COMMIT'):
+            self.assertEqual(samples[(name, kind)][1], 1, kind)
+
+    def make_app(self):
+        app = Flask(__name__)
+        metrics.instrument(app)
+
+        @app.route('/items/<int:item_id>')
+        def item(item_id):
+            return {'id': item_id}
+
+        return app.test_client()
+
+    def test_routes_are_timed_by_rule(self):
+        client = self.make_app()
+        client.get('/items/1')
+        client.get('/items/2')
+        client.get('/missing')
+        samples = metrics.REQUEST_SECONDS.samples()
+        self.assertEqual(samples[('/items/<int:item_id>', 'GET', '200')][1], 2)
+        self.assertEqual(samples[('unmatched', 'GET', '404')][1], 1)
+
+    def test_profile_is_opt_in(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            with mock.patch.object(metrics, 'PROFILE_DIR', profile_dir):
+                client = self.make_app()
+                self.assertNotIn('X-Profile-Dump', client.get('/items/1').headers)
+                response = client.get('/items/1', headers={'X-Profile': '1'})
+                dump = response.headers['X-Profile-Dump']
+                self.assertTrue(os.path.exists(os.path.join(profile_dir, dump)))
+
+    def test_no_profile_without_profile_dir(self):
+        with mock.patch.object(metrics, 'PROFILE_DIR', None):
+            response = self.make_app().get('/items/1?profile=1')
+        self.assertNotIn('X-Profile-Dump', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from flask import Flask
+import db
+from apis import passwords
+from apis.db_pool import get_connection, close_connections
+
+# Cheap settings so the suite stays fast; the format and code paths are the same
+FAST_HASHERS = {'scrypt': passwords.ScryptHasher(n=2 ** 8), 'pbkdf2_sha256': passwords.Pbkdf2Hasher(iterations=1000)}
+
+
+class TestHashers(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.dict(passwords.HASHERS, FAST_HASHERS)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_round_trip_with_each_hasher(self):
+        for algorithm in FAST_HASHERS:
+            with self.subTest(algorithm), mock.patch.object(passwords, 'PASSWORD_HASHER', algorithm):
+                encoded = passwords.hash_password('hunter2')
+                self.assertTrue(encoded.startswith(algorithm + '$'))
+                self.assertTrue(passwords.verify_password('hunter2', encoded))
+                self.assertFalse(passwords.verify_password('hunter3', encoded))
+                self.assertFalse(passwords.needs_rehash(encoded))
+
+    def test_salted(self):
+        self.assertNotEqual(passwords.hash_password('hunter2'), passwords.hash_password('hunter2'))
+
+    def test_legacy_sha256_verifies_and_needs_rehash(self):
+        legacy = hashlib.sha256(b'hunter2').hexdigest()
+        self.assertTrue(passwords.verify_password('hunter2', legacy))
+        self.assertFalse(passwords.verify_password('hunter3', legacy))
+        self.assertTrue(passwords.needs_rehash(legacy))
+
+    def test_cost_change_needs_rehash(self):
+        encoded = passwords.hash_password('hunter2')
+        with mock.patch.dict(passwords.HASHERS, {'scrypt': passwords.ScryptHasher(n=2 ** 9)}):
+            self.assertTrue(passwords.needs_rehash(encoded))
+            # old hashes still verify, their parameters are stored with them
+            self.assertTrue(passwords.verify_password('hunter2', encoded))
+
+    def test_malformed_hashes_never_match(self):
+        for stored in ('', 'scrypt$garbage', 'bcrypt$12$abc$def', 'scrypt$1,8,1$!!$!!'):
+            self.assertFalse(passwords.verify_password('hunter2', stored), stored)
+
+    def test_full_queue_is_rejected(self):
+        release = threading.Event()
+        with mock.patch.object(passwords, '_pending', threading.BoundedSemaphore(1)):
+            blocked = threading.Thread(target=passwords._submit, args=(release.wait,))
+            blocked.start()
+            try:
+                with self.assertRaises(passwords.PasswordServiceBusy):
+                    passwords.hash_password('hunter2')
+            finally:
+                release.set()
+                blocked.join()
+            self.assertTrue(passwords.hash_password('hunter2'))
+
+    def test_slow_hash_is_busy_not_an_error(self):
+        release = threading.Event()
+        slow = mock.Mock(encode=lambda password, salt: release.wait(5) and 'late')
+        with mock.patch.object(passwords, 'HASH_TIMEOUT', 0.05), \
+                mock.patch.object(passwords, 'get_hasher', return_value=slow):
+            try:
+                with self.assertRaises(passwords.PasswordServiceBusy):
+                    passwords.hash_password('hunter2')
+            finally:
+                release.set()
+
+
+class TestLogin(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.dict(passwords.HASHERS, FAST_HASHERS)
+        patch.start()
+        self.addCleanup(patch.stop)
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig_path = db.DB_PATH
+        db.DB_PATH = self.db_path
+        db.init_auth_db()
+        # login_user and register_user set the session
+        app = Flask(__name__)
+        app.secret_key = 'test'
+        self.context = app.test_request_context()
+        self.context.push()
+
+    def tearDown(self):
+        self.context.pop()
+        db.DB_PATH = self._orig_path
+        close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def stored_hash(self, user_id):
+        return get_connection(self.db_path).execute("SELECT password FROM users WHERE id = ?", (user_id,)).fetchone()[0]
+
+    def test_register_then_login(self):
+        user_id = db.register_user('ana', 'ana@example.com', 'hunter2', '5555555555')['user_id']
+        self.assertTrue(self.stored_hash(user_id).startswith('scrypt$'))
+        self.assertEqual(db.login_user('ana', 'hunter2'), {'status': 'access granted', 'user_id': user_id})
+        self.assertEqual(db.login_user('ana', 'wrong')['status'], 'access denied')
+        self.assertEqual(db.login_user('nobody', 'hunter2')['status'], 'access denied')
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        conn = get_connection(self.db_path)
+        conn.execute("INSERT INTO users (id, name, email, password) VALUES (7, 'old', 'old@example.com', ?)",
+                     (hashlib.sha256(b'hunter2').hexdigest(),))
+        conn.commit()
+        self.assertEqual(db.login_user('old', 'wrong')['status'], 'access denied')
+        self.assertEqual(len(self.stored_hash(7)), 64)  # failed logins don't rehash
+
+        self.assertEqual(db.login_user('old', 'hunter2')['status'], 'access granted')
+        self.assertTrue(self.stored_hash(7).startswith('scrypt$'))
+        self.assertEqual(db.login_user('old', 'hunter2')['status'], 'access granted')
+
+    def test_rehash_doesnt_hold_the_write_lock(self):
+        conn = get_connection(self.db_path)
+        conn.execute("INSERT INTO users (id, name, email, password) VALUES (7, 'old', 'old@example.com', ?)",
+                     (hashlib.sha256(b'hunter2').hexdigest(),))
+        conn.commit()
+
+        def hash_while_writing(password):
+            other = sqlite3.connect(self.db_path, timeout=0)
+            try:
+                other.execute("BEGIN IMMEDIATE")  # 'database is locked' if login held the write lock
+                other.rollback()
+            finally:
+                other.close()
+            return passwords.hash_password(password)
+
+        with mock.patch.object(db, 'hash_password', side_effect=hash_while_writing):
+            self.assertEqual(db.login_user('old', 'hunter2')['status'], 'access granted')
+        self.assertTrue(self.stored_hash(7).startswith('scrypt$'))
+
+    def test_shared_names_match_the_right_account(self):
+        first = db.register_user('sam', 'sam1@example.com', 'first-pass', None)['user_id']
+        second = db.register_user('sam', 'sam2@example.com', 'second-pass', None)['user_id']
+        self.assertEqual(db.login_user('sam', 'first-pass')['user_id'], first)
+        self.assertEqual(db.login_user('sam', 'second-pass')['user_id'], second)
+
+    def test_busy_service(self):
+        db.register_user('ana', 'ana@example.com', 'hunter2', None)
+        with mock.patch.object(passwords, '_submit', side_effect=passwords.PasswordServiceBusy):
+            self.assertEqual(db.login_user('ana', 'hunter2')['status'], 'busy')
+
+    def test_slow_hashing_is_busy(self):
+        db.register_user('ana', 'ana@example.com', 'hunter2', None)
+        release = threading.Event()
+        slow = mock.Mock(verify=lambda password, encoded: release.wait(5))
+        with mock.patch.object(passwords, 'HASH_TIMEOUT', 0.05), \
+                mock.patch.dict(passwords.HASHERS, {'scrypt': slow}):
+            try:
+                self.assertEqual(db.login_user('ana', 'hunter2')['status'], 'busy')
+            finally:
+                release.set()
+
+    def test_name_lookup_uses_index(self):
+        plan = get_connection(self.db_path).execute(
+            "EXPLAIN QUERY PLAN SELECT id, password FROM users WHERE name = ?", ('ana',)).fetchall()
+        self.assertIn('idx_users_name', ' '.join(str(row) for row in plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from apis import prefetch, google_events, throttle, breaker
+from apis.cache import Cache
+from apis.db_pool import close_connections
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, title):
+        self.title = title
+
+    def json(self):
+        return {'events_results': [{'title': self.title, 'link': f'https://example.com/{self.title}'}]}
+
+
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig_cache = google_events.events_cache
+        google_events.events_cache = Cache('google_events:v4', ttl=google_events.CACHE_TTL + google_events.STALE_TTL,
+                                           db_path=self.db_path)
+        self.fetches = []
+        self.release = threading.Event()
+        self.release.set()
+        patches = [
+            mock.patch.dict(os.environ, {'SERPAPI_KEY': 'test'}),
+            mock.patch.object(google_events.http_client, 'get', side_effect=self.fake_get),
+            mock.patch.object(prefetch, 'tag_events', side_effect=lambda events: ['other'] * len(events)),
+            mock.patch.object(throttle, 'bucket', return_value=None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+
+    def tearDown(self):
+        google_events.events_cache = self._orig_cache
+        close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def fake_get(self, url, params=None):
+        self.release.wait(5)
+        self.fetches.append(params['location'])
+        return FakeResponse(f"Fresh {params['location']}")
+
+    def seed(self, location, age, title='Cached'):
+        google_events.events_cache.set(google_events.cache_key(location), {
+            'fetched_at': time.time() - age,
+            'events': [google_events.from_google({'title': title}).to_dict()],
+        })
+
+    def titles(self, events):
+        return [e.title for e in events]
+
+    def wait_idle(self):
+        deadline = time.time() + 5
+        while prefetch._inflight and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(prefetch._inflight)
+
+    def test_fresh_entry_is_served_without_fetching(self):
+        self.seed('Austin', age=60)
+        self.assertEqual(self.titles(prefetch.feed_google_events('Austin')), ['Cached'])
+        self.assertEqual(self.fetches, [])
+
+    def test_cold_location_blocks_on_fetch(self):
+        self.assertEqual(self.titles(prefetch.feed_google_events('Austin')), ['Fresh Austin'])
+        self.assertEqual(self.fetches, ['Austin'])
+
+    def test_stale_entry_is_served_while_it_refreshes(self):
+        self.seed('Austin', age=google_events.CACHE_TTL + 60)
+        self.release.clear()
+        started = time.perf_counter()
+        self.assertEqual(self.titles(prefetch.feed_google_events('Austin')), ['Cached'])
+        self.assertLess(time.perf_counter() - started, 1)
+        # a second stale hit doesn't start another refresh
+        self.assertIsNone(prefetch.revalidate('Austin'))
+
+        self.release.set()
+        self.wait_idle()
+        self.assertEqual(self.fetches, ['Austin'])
+        self.assertEqual(self.titles(prefetch.feed_google_events('Austin')), ['Fresh Austin'])
+
+    def test_warm_refreshes_only_entries_about_to_go_stale(self):
+        self.seed('Austin', age=60)
+        self.seed('Denver', age=google_events.CACHE_TTL - 600)
+        self.assertFalse(prefetch.warm('Austin', margin=3600))
+        self.assertTrue(prefetch.warm('Denver', margin=3600))
+        self.assertTrue(prefetch.warm('Boise', margin=3600))
+        self.assertEqual(self.fetches, ['Denver', 'Boise'])
+
+    def test_worker_refresh_reaches_app_processes(self):
+        # prefetch_worker.py and each app worker have their own Cache over the shared table
+        google_events.events_cache = Cache('google_events:v4', ttl=google_events.CACHE_TTL + google_events.STALE_TTL,
+                                           db_path=self.db_path, memory_ttl=0.05)
+        worker_cache = Cache('google_events:v4', ttl=google_events.CACHE_TTL + google_events.STALE_TTL,
+                             db_path=self.db_path)
+        self.seed('Austin', age=google_events.CACHE_TTL - 600)
+        self.assertEqual(self.titles(prefetch.feed_google_events('Austin')), ['Cached'])
+
+        with mock.patch.object(google_events, 'events_cache', worker_cache):
+            self.assertEqual(prefetch.run_once(['Austin'])['refreshed'], 1)
+        time.sleep(0.1)
+        self.assertEqual(self.titles(prefetch.feed_google_events('Austin')), ['Fresh Austin'])
+        self.assertEqual(self.fetches, ['Austin'])
+
+    def test_run_once_continues_past_failures(self):
+        self.seed('Austin', age=60)
+        with mock.patch.object(prefetch, 'tag_events', side_effect=[RuntimeError('model down'), ['other']]):
+            report = prefetch.run_once(['Boise', 'Austin', 'Denver'])
+        self.assertEqual(report, {'checked': 3, 'refreshed': 1, 'failed': 1})
+
+    def test_prefetcher_thread_runs_and_stops(self):
+        worker = prefetch.Prefetcher(lambda top: ['Austin', 'Denver'][:top], interval=60, top=1)
+        worker.start()
+        deadline = time.time() + 5
+        while not self.fetches and time.time() < deadline:
+            time.sleep(0.01)
+        worker.stop()
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(self.fetches, ['Austin'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from apis import reddit_api, throttle, breaker
+from apis.cache import Cache
+from apis.db_pool import close_connections
+
+
+class StubModel:
+    def __init__(self, reply=None, error=None):
+        self.reply = reply
+        self.error = error
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        if self.error:
+            raise self.error
+        return type('Response', (), {'text': self.reply})()
+
+
+def fake_post(post_id, title):
+    return mock.Mock(id=post_id, title=title, permalink=f'/r/nyc/comments/{post_id}/')
+
+
+POSTS = [
+    fake_post('a1', 'Free pizza at Union Square'),
+    fake_post('b2', 'Free vegan tacos tonight'),
+    fake_post('c3', 'Parking tips for the marathon'),
+    fake_post('d4', 'FREE bbq in the park'),
+]
+
+
+class TestRedditApi(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig_caches = reddit_api.search_cache, reddit_api.verdict_cache
+        reddit_api.search_cache = Cache('reddit_search:v2', ttl=reddit_api.REDDIT_SEARCH_TTL + reddit_api.REDDIT_STALE_TTL,
+                                        db_path=self.db_path)
+        reddit_api.verdict_cache = Cache('reddit_dietary', ttl=reddit_api.DIETARY_VERDICT_TTL, db_path=self.db_path)
+        reddit_api._clients.clear()
+        patcher = mock.patch.object(reddit_api.praw, 'Reddit')
+        self.Reddit = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.Reddit.return_value.subreddit.return_value.search.return_value = POSTS
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+        unlimited = mock.patch.object(throttle, 'bucket', return_value=None)
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+
+    def tearDown(self):
+        reddit_api.search_cache, reddit_api.verdict_cache = self._orig_caches
+        reddit_api._clients.clear()
+        close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def search(self, terms='', location='nyc', model=None):
+        return reddit_api.search_reddit_events(location, terms, 'id', 'secret', 'agent', model=model)
+
+    def test_free_posts_only(self):
+        events = self.search()
+        self.assertEqual([e.global_id for e in events], ['reddit_a1', 'reddit_b2', 'reddit_d4'])
+        self.assertEqual(events[0].url, 'https://reddit.com/r/nyc/comments/a1/')
+        self.assertEqual(events[0].location, 'nyc')
+
+    def test_client_is_reused(self):
+        self.search()
+        self.search(location='chicago')
+        self.assertEqual(self.Reddit.call_count, 1)
+
+    def test_search_results_are_cached(self):
+        self.search()
+        self.search()
+        self.assertEqual(self.Reddit.return_value.subreddit.return_value.search.call_count, 1)
+
+    def test_unknown_city(self):
+        self.assertEqual(self.search(location='atlantis'), [])
+
+    def test_one_model_call_for_all_posts(self):
+        model = StubModel(reply='["no", "yes", "no"]')
+        events = self.search(terms='vegan', model=model)
+        self.assertEqual([e.global_id for e in events], ['reddit_b2'])
+        self.assertEqual(len(model.prompts), 1)
+        self.assertNotIn('Parking tips', model.prompts[0])
+
+    def test_verdicts_cached_per_post_and_filter(self):
+        self.search(terms='vegan', model=StubModel(reply='["no", "yes", "no"]'))
+        model = StubModel(reply='["yes", "yes", "yes"]')
+        events = self.search(terms='Vegan ', model=model)
+        self.assertEqual([e.global_id for e in events], ['reddit_b2'])
+        self.assertEqual(model.prompts, [])
+        # a different filter is judged afresh
+        self.search(terms='halal', model=model)
+        self.assertEqual(len(model.prompts), 1)
+
+    def test_only_uncached_posts_are_sent(self):
+        reddit_api.classify_dietary([{'id': 'a1', 'title': 'Free pizza at Union Square'}], 'vegan',
+                                    model=StubModel(reply='["no"]'))
+        model = StubModel(reply='["yes", "yes"]')
+        events = self.search(terms='vegan', model=model)
+        self.assertEqual([e.global_id for e in events], ['reddit_b2', 'reddit_d4'])
+        self.assertNotIn('Free pizza', model.prompts[0])
+
+    def test_model_failure_drops_posts_without_caching(self):
+        self.assertEqual(self.search(terms='vegan', model=StubModel(error=RuntimeError('quota exceeded'))), [])
+        model = StubModel(reply='["yes", "no", "yes"]')
+        events = self.search(terms='vegan', model=model)
+        self.assertEqual([e.global_id for e in events], ['reddit_a1', 'reddit_d4'])
+
+    def test_malformed_reply_drops_posts(self):
+        self.assertEqual(self.search(terms='vegan', model=StubModel(reply='["yes"]')), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
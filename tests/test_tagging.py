@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from apis import tagging, throttle, breaker
+from apis.cache import Cache
+from apis.event import Event
+from apis.db_pool import close_connections
+
+
+class StubModel:
+    def __init__(self, reply=None, error=None):
+        self.reply = reply
+        self.error = error
+        self.calls = 0
+
+    def generate_content(self, prompt, request_options=None):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return type('Response', (), {'text': self.reply})()
+
+
+class TestTagging(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig_cache = tagging.tag_cache
+        tagging.tag_cache = Cache('event_tags', ttl=tagging.TAG_TTL, db_path=self.db_path)
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+        unlimited = mock.patch.object(throttle, 'bucket', return_value=None)
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+        self.events = [
+            Event('google', 'a', 'Jazz Night', description='Live music downtown'),
+            Event('google', 'b', 'Taco Tuesday', description='Cheap tacos and food trucks'),
+        ]
+
+    def tearDown(self):
+        tagging.tag_cache = self._orig_cache
+        close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_keyword_tag(self):
+        self.assertEqual(tagging.keyword_tag('Stand-Up Night', 'Laugh out loud with local comedians'), 'comedy')
+        self.assertEqual(tagging.keyword_tag('Untitled', ''), 'other')
+
+    def test_one_model_call_for_many_events(self):
+        model = StubModel(reply='["music", "food"]')
+        self.assertEqual(tagging.tag_events(self.events, model=model), ['music', 'food'])
+        self.assertEqual(model.calls, 1)
+
+    def test_cached_tags_skip_the_model(self):
+        tagging.tag_events(self.events, model=StubModel(reply='["music", "food"]'))
+        model = StubModel(reply='["other", "other"]')
+        self.assertEqual(tagging.tag_events(self.events, model=model), ['music', 'food'])
+        self.assertEqual(model.calls, 0)
+
+    def test_unknown_tags_become_other(self):
+        model = StubModel(reply='```json\n["jazz", "FOOD"]\n```')
+        self.assertEqual(tagging.tag_events(self.events, model=model), ['other', 'food'])
+
+    def test_falls_back_to_keywords_when_model_fails(self):
+        model = StubModel(error=RuntimeError('quota exceeded'))
+        self.assertEqual(tagging.tag_events(self.events, model=model), ['music', 'food'])
+        # Fallback tags aren't cached, so a recovered model is asked again
+        self.assertIsNone(tagging.tag_cache.get(tagging.event_key('Jazz Night', 'Live music downtown')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from apis import throttle, breaker, yelp, google_events, tagging
+from apis.cache import Cache
+from apis.event import Event
+from apis.db_pool import close_connections
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = throttle.TokenBucket(rate=2.0, burst=3, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst_then_waits_in_line(self):
+        self.assertTrue(all(self.bucket.acquire(timeout=0) for _ in range(3)))
+        self.assertEqual(self.clock.slept, [])
+        # the next two queue for the tokens due at 0.5s and 1s
+        self.assertTrue(self.bucket.acquire(timeout=1))
+        self.assertEqual(self.clock.slept, [0.5])
+        self.clock.now = 0.5
+        self.assertTrue(self.bucket.acquire(timeout=1))
+        self.assertEqual(self.clock.slept, [0.5, 0.5])
+
+    def test_gives_up_past_the_timeout_without_taking_a_token(self):
+        for _ in range(3):
+            self.bucket.acquire(timeout=0)
+        self.assertFalse(self.bucket.acquire(timeout=0.4))
+        self.assertEqual(self.clock.slept, [])
+        self.clock.now = 0.5
+        self.assertTrue(self.bucket.acquire(timeout=0))
+
+    def test_refills_up_to_burst(self):
+        for _ in range(3):
+            self.bucket.acquire(timeout=0)
+        self.clock.now = 60
+        self.assertTrue(all(self.bucket.acquire(timeout=0) for _ in range(3)))
+        self.assertFalse(self.bucket.acquire(timeout=0))
+
+
+class TestSingleFlight(unittest.TestCase):
+    def run_concurrently(self, flights, fn, callers=5):
+        results, errors = [], []
+
+        def caller():
+            try:
+                results.append(flights.do('key', fn))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=caller) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_concurrent_calls_share_one(self):
+        flights, release, calls = throttle.SingleFlight(), threading.Event(), []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return ['result']
+
+        threads, results, errors = self.run_concurrently(flights, fetch)
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [['result']] * 5)
+        self.assertEqual(errors, [])
+        # finished calls aren't remembered
+        self.assertEqual(flights.do('key', lambda: 'again'), 'again')
+
+    def test_errors_are_shared_too(self):
+        flights, release = throttle.SingleFlight(), threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise RuntimeError('429')
+
+        threads, results, errors = self.run_concurrently(flights, fail, callers=3)
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, [])
+        self.assertEqual([str(e) for e in errors], ['429'] * 3)
+
+
+class TestCall(unittest.TestCase):
+    def test_rate_limited_past_the_wait(self):
+        empty = throttle.TokenBucket(rate=0.1, burst=1)
+        empty.acquire()
+        fetch = mock.Mock()
+        with mock.patch.object(throttle, 'bucket', return_value=empty):
+            with self.assertRaises(throttle.RateLimited):
+                throttle.call('yelp', 'key', fetch, wait=0.01)
+        fetch.assert_not_called()
+
+    def test_unlisted_providers_are_not_limited(self):
+        self.assertIsNone(throttle.bucket('reddit'))
+        self.assertEqual(throttle.call('reddit', 'key', lambda x: x * 2, 21), 42)
+
+
+class TestDegradesToCache(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig = yelp.search_cache, google_events.events_cache, tagging.tag_cache
+        yelp.search_cache = Cache('yelp_search:v2', ttl=yelp.YELP_CACHE_TTL + yelp.YELP_STALE_TTL, db_path=self.db_path)
+        google_events.events_cache = Cache('google_events:v4', ttl=google_events.CACHE_TTL + google_events.STALE_TTL,
+                                           db_path=self.db_path)
+        tagging.tag_cache = Cache('event_tags', ttl=tagging.TAG_TTL, db_path=self.db_path)
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+        patch = mock.patch.object(throttle.TokenBucket, 'acquire', return_value=False)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        yelp.search_cache, google_events.events_cache, tagging.tag_cache = self._orig
+        close_connections()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def search_yelp(self):
+        return yelp.search_yelp_businesses('Austin', 'tacos', 'key', 5, 1000)
+
+    def test_yelp_serves_stale_results(self):
+        params = {'categories': 'tacos', 'term': 'tacos', 'limit': 5, 'radius': 1000, 'location': 'Austin'}
+        yelp.search_cache.set(json.dumps(params, sort_keys=True), {
+            'fetched_at': time.time() - yelp.YELP_CACHE_TTL - 1,
+            'events': [Event('yelp', 'b1', 'Taqueria').to_dict()],
+        })
+        with mock.patch.object(yelp.http_client, 'get') as get:
+            self.assertEqual([e.title for e in self.search_yelp()], ['Taqueria'])
+        get.assert_not_called()
+
+    def test_yelp_raises_with_nothing_cached(self):
+        with mock.patch.object(yelp.http_client, 'get') as get:
+            with self.assertRaises(throttle.RateLimited):
+                self.search_yelp()
+        get.assert_not_called()
+
+    def test_google_serves_stale_events(self):
+        google_events.events_cache.set(google_events.cache_key('Austin'), {
+            'fetched_at': time.time() - google_events.CACHE_TTL - 1,
+            'events': [google_events.from_google({'title': 'Stale Fair'}).to_dict()],
+        })
+        with mock.patch.dict(os.environ, {'SERPAPI_KEY': 'test'}), \
+                mock.patch.object(google_events.http_client, 'get') as get:
+            self.assertEqual([e.title for e in google_events.get_google_events('Austin')], ['Stale Fair'])
+            with self.assertRaises(throttle.RateLimited):
+                google_events.get_google_events('Boston')
+        get.assert_not_called()
+
+    def test_tagging_falls_back_to_keywords(self):
+        model = mock.Mock()
+        with self.assertLogs('apis.tagging', 'WARNING'):
+            tags = tagging.tag_events([Event('google', 'a', 'Jazz Night', description='Live music')], model=model)
+        self.assertEqual(tags, ['music'])
+        model.generate_content.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from apis import uploads
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def image_bytes(fmt='PNG', size=(300, 200), mode='RGB', color=(200, 30, 30)):
+    out = io.BytesIO()
+    Image.new(mode, size, color).save(out, format=fmt)
+    return out.getvalue()
+
+
+class UploadsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        patch = mock.patch.object(uploads, 'UPLOAD_DIR', self.dir)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def files(self):
+        return sorted(os.listdir(self.dir))
+
+
+class TestStoreImage(UploadsTestCase):
+    PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 200
+
+    def test_content_addressed_and_deduplicated(self):
+        name = uploads.store_image(io.BytesIO(self.PNG))
+        self.assertRegex(name, r'^[0-9a-f]{64}\.png$')
+        self.assertEqual(uploads.store_image(io.BytesIO(self.PNG)), name)
+        self.assertEqual(self.files(), [name])
+        with open(os.path.join(self.dir, name), 'rb') as f:
+            self.assertEqual(f.read(), self.PNG)
+
+    def test_reads_in_chunks(self):
+        stream = io.BytesIO(self.PNG * 1000)
+        with mock.patch.object(stream, 'read', wraps=stream.read) as read:
+            uploads.store_image(stream)
+        self.assertTrue(all(call.args == (uploads.CHUNK_SIZE,) for call in read.call_args_list))
+        self.assertGreater(read.call_count, 2)
+
+    def test_over_the_cap_is_rejected(self):
+        with self.assertRaises(uploads.UploadRejected):
+            uploads.store_image(io.BytesIO(self.PNG * 10), max_bytes=len(self.PNG))
+        self.assertEqual(self.files(), [])
+
+    def test_type_comes_from_the_bytes(self):
+        self.assertEqual(uploads.sniff(b'RIFF\x00\x00\x00\x00WEBPVP8 '), 'webp')
+        self.assertEqual(uploads.sniff(b'\xff\xd8\xff\xe0'), 'jpg')
+        for data in (b'<svg xmlns="http://www.w3.org/2000/svg"/>', b'', b'GIF8'):
+            with self.assertRaises(uploads.UploadRejected):
+                uploads.store_image(io.BytesIO(data))
+        self.assertEqual(self.files(), [])
+
+    def test_uploaded_name(self):
+        self.assertEqual(uploads.uploaded_name('/static/uploads/abc.png'), 'abc.png')
+        for url in (None, 'https://example.com/a.png', '/static/uploads/../app.py', '/static/uploads/..'):
+            self.assertIsNone(uploads.uploaded_name(url), url)
+
+
+@unittest.skipIf(Image is None, "Pillow isn't installed")
+class TestVariants(UploadsTestCase):
+    def test_resized_webp_and_jpeg(self):
+        name = uploads.store_image(io.BytesIO(image_bytes(size=(400, 300))))
+        webp, jpeg = uploads.make_variants(name, width=100)
+        self.assertEqual((webp, jpeg), (name[:-4] + '-100.webp', name[:-4] + '-100.jpg'))
+        for variant, fmt in ((webp, 'WEBP'), (jpeg, 'JPEG')):
+            with Image.open(os.path.join(self.dir, variant)) as img:
+                self.assertEqual((img.format, img.size), (fmt, (100, 75)))
+        self.assertTrue(uploads.is_variant(webp))
+        self.assertFalse(uploads.is_variant(name))
+
+    def test_small_images_are_not_enlarged_and_alpha_is_flattened_for_jpeg(self):
+        name = uploads.store_image(io.BytesIO(image_bytes(size=(40, 20), mode='RGBA', color=(0, 0, 0, 0))))
+        _, jpeg = uploads.make_variants(name, width=100)
+        with Image.open(os.path.join(self.dir, jpeg)) as img:
+            self.assertEqual((img.mode, img.size), ('RGB', (40, 20)))
+            self.assertGreater(img.getpixel((0, 0))[0], 240)  # white, not black
+
+    def test_existing_variants_are_reused(self):
+        name = uploads.store_image(io.BytesIO(image_bytes()))
+        self.assertIsNone(uploads.ready_card_url(name))
+        first = uploads.card_url(name)
+        self.assertEqual(uploads.ready_card_url(name), first)
+        with mock.patch.object(uploads, '_card_image') as decode:
+            self.assertEqual(uploads.card_url(name), first)
+        decode.assert_not_called()
+
+    def test_process_image_in_background(self):
+        name = uploads.store_image(io.BytesIO(image_bytes()))
+        ready = []
+        future = uploads.process_image(name, lambda old, new: ready.append((old, new)))
+        self.assertEqual(future.result(timeout=10), uploads.ready_card_url(name))
+        self.assertEqual(ready, [(uploads.upload_url(name), uploads.ready_card_url(name))])
+
+    def test_one_job_per_image(self):
+        name = uploads.store_image(io.BytesIO(image_bytes()))
+        release = threading.Event()
+        with mock.patch.object(uploads, 'card_url', side_effect=lambda _: release.wait(10) and None):
+            first = uploads.process_image(name, mock.Mock())
+            self.assertIsNone(uploads.process_image(name, mock.Mock()))
+            release.set()
+            first.result(timeout=10)
+        uploads.process_image(name, mock.Mock()).result(timeout=10)
+
+    def test_broken_image_keeps_the_original(self):
+        name = uploads.store_image(io.BytesIO(b'\x89PNG\r\n\x1a\n' + b'\x00' * 50))
+        on_ready = mock.Mock()
+        with self.assertLogs('apis.uploads', 'WARNING'):
+            self.assertIsNone(uploads.process_image(name, on_ready).result(timeout=10))
+        on_ready.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
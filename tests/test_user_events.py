@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime
+from apis import user_events, geo
+from apis.db_pool import close_connections
+
+
+class TestUserEventsQuery(unittest.TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self._orig_db = user_events.DB_PATH
+        user_events.DB_PATH = self.db_path
+        user_events.init_user_events_db()
+        user_events.add_user_event('Pizza Night', 'Local Cafe, New York', '2025-08-01T18:00', 'America/New_York', 'food')
+        user_events.add_user_event('Jazz Night', 'City Park, New York', '2025-08-03T20:00', 'America/New_York', 'music')
+        user_events.add_user_event('BBQ Bash', 'Downtown Plaza, Chicago', '2025-08-02T17:00', 'America/Chicago', 'food')
+
+    def tearDown(self):
+        close_connections()
+        user_events.DB_PATH = self._orig_db
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+
+    def test_normalize_city(self):
+        self.assertEqual(user_events.normalize_city('New York, NY 10001, USA'), 'new york')
+        self.assertEqual(user_events.normalize_city('123 Main St, Chicago, IL'), 'chicago')
+        self.assertEqual(user_events.normalize_city('NYC'), 'new york')
+
+    def test_filter_by_city(self):
+        titles = [e.title for e in user_events.query_user_events(city='New York, NY')]
+        self.assertEqual(titles, ['Pizza Night', 'Jazz Night'])
+
+    def test_filter_by_time_window_and_tag(self):
+        events = user_events.query_user_events(start='2025-08-02', end='2025-08-03', tag='food')
+        self.assertEqual([e.title for e in events], ['BBQ Bash'])
+
+    def test_upcoming_start(self):
+        self.assertEqual(user_events.upcoming_start(datetime(2025, 8, 2, 6, 30)), '2025-08-01T18:30')
+        # 01:00 UTC is 21:00 the evening before in New York, so its 23:00 show is still upcoming
+        user_events.add_user_event('Late Show', 'New York', '2025-08-01T23:00', 'America/New_York', 'music')
+        user_events.add_user_event('Last Week', 'New York', '2025-07-25T23:00', 'America/New_York', 'music')
+        events = user_events.query_user_events(city='New York', start=user_events.upcoming_start(datetime(2025, 8, 2, 1, 0)))
+        self.assertEqual([e.title for e in events], ['Pizza Night', 'Late Show', 'Jazz Night'])
+
+    def test_limit_and_offset(self):
+        events = user_events.query_user_events(limit=1, offset=1)
+        self.assertEqual([e.title for e in events], ['BBQ Bash'])
+
+    def test_city_query_uses_index(self):
+        conn = user_events.get_connection(self.db_path)
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM user_events WHERE city = ? ORDER BY event_time", ('new york',)
+        ).fetchall()
+        self.assertTrue(any('idx_user_events_city_time' in row[-1] for row in plan))
+
+    def test_events_geocoded_at_post_time(self):
+        row = user_events.get_connection(self.db_path).execute(
+            "SELECT lat, lon, geo_cell FROM user_events WHERE title = 'BBQ Bash'"
+        ).fetchone()
+        self.assertEqual(row, (41.8781, -87.6298, geo.cell_id(41.8781, -87.6298)))
+
+    def test_near_query(self):
+        user_events.add_user_event('Art Walk', 'Hoboken, NJ', '2025-08-04T12:00', 'America/New_York', 'art')
+        user_events.add_user_event('Food Fest', 'Philadelphia, PA', '2025-08-05T12:00', 'America/New_York', 'food')
+        events = user_events.query_user_events(near=geo.geocode('New York, NY'), radius_miles=50)
+        # Hoboken is a few miles away, Philadelphia about 80
+        self.assertEqual([e.title for e in events], ['Pizza Night', 'Jazz Night', 'Art Walk'])
+
+    def test_near_query_stops_reading_at_the_limit(self):
+        for day in range(10, 30):
+            user_events.add_user_event(f'Show {day}', 'Brooklyn, NY', f'2025-08-{day}T20:00', 'America/New_York', 'music')
+        with mock.patch.object(user_events, 'haversine', wraps=geo.haversine) as haversine:
+            events = user_events.query_user_events(near=geo.geocode('New York, NY'), limit=3, offset=1)
+        self.assertEqual([e.title for e in events], ['Jazz Night', 'Show 10', 'Show 11'])
+        self.assertEqual(haversine.call_count, 4)
+
+    def test_near_query_falls_back_to_city_for_unknown_places(self):
+        user_events.add_user_event('Block Party', 'Smallville', '2025-08-06T12:00', 'America/Chicago', 'festival')
+        events = user_events.query_user_events(city='Smallville', near=geo.geocode('Chicago, IL'))
+        self.assertEqual([e.title for e in events], ['BBQ Bash', 'Block Party'])
+
+    def test_image_url_column(self):
+        user_events.add_user_event('Art Walk', 'Austin, TX', '2025-08-04T12:00', 'America/Chicago', 'art',
+                                   'Bring friends', image_url='/static/uploads/a.png')
+        self.assertEqual(user_events.replace_image_url('/static/uploads/a.png', '/static/uploads/a-1080.webp'), 1)
+        event, = user_events.query_user_events(tag='art')
+        self.assertEqual((event.description, event.image), ('Bring friends', '/static/uploads/a-1080.webp'))
+
+    def test_image_suffixes_move_out_of_descriptions(self):
+        conn = user_events.get_connection(self.db_path)
+        conn.execute("UPDATE user_events SET description = 'Bring friends\n[IMAGE]/static/uploads/walk.png' "
+                     "WHERE title = 'Jazz Night'")
+        conn.commit()
+        user_events.init_user_events_db()
+        user_events.init_user_events_db()
+        row = conn.execute("SELECT description, image_url FROM user_events WHERE title = 'Jazz Night'").fetchone()
+        self.assertEqual(row, ('Bring friends', '/static/uploads/walk.png'))
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM user_events WHERE image_url IS NULL").fetchone()[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()